@@ -1,11 +1,46 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
-from src.bot.utils.artefact_gen import generate_artefact
+from src.bot.core.dungeon import RESULTADOS, RUN_KEY, DungeonRules, Room, Run, room_loot
+from src.bot.core.game_data import GameData
+from src.bot.core.inventory import ARTEFACT_SORTS, ArtefactQuery, artefact_page, inventory_items
+from src.bot.core.leveling import LevelChange, grant_xp, set_level
+from src.bot.core.loadout import LOADOUT_SLOTS, OBJECTIVES, loadout_snapshot, optimize_loadout
+from src.bot.core.stacks import STACK_BUCKETS, StackChange, plan_add, plan_remove, split_stacks, stack_counts, stack_rule
+from src.bot.core.stats import (
+    BONUS_TOLERANCE,
+    ARTEFACT_SLOTS,
+    BONUS_TOTALS_KEY,
+    STAT_KEYS,
+    WEAPON_SOURCE,
+    StatCache,
+    bonus_drift,
+    bonus_totals_after,
+    rebuild_bonus_totals,
+)
+from src.bot.services.user_journal import (
+    op_add_item,
+    op_add_items,
+    op_add_xp,
+    op_delete_character,
+    op_equip,
+    op_equip_weapon,
+    op_put_character,
+    op_remove_item,
+    op_set_bonus_totals,
+    op_set_dungeon,
+    op_set_level,
+    op_set_skills,
+    op_set_stacks,
+    op_unequip,
+)
+from src.bot.services.user_store import UserStore, UserTransaction
+from src.bot.utils.artefact_gen import MIX, expand_artefacts, generate_artefact, generate_artefacts
 
 import discord
 from discord import app_commands
@@ -22,19 +57,41 @@ DATA_DIR = os.path.join(BOT_DIR, "data")               # .../src/bot/data
 
 USERS_DIR = os.path.join(DATA_DIR, "users")            # .../src/bot/data/users
 
-PATHWAY_DB = os.path.join(DATA_DIR, "pathways.json")
-PROFESIONES_DB = os.path.join(DATA_DIR, "profesiones.json")
-ROL_DB = os.path.join(DATA_DIR, "rol.json")
-
 # Roles de staff permitidos para borrar/setear nivel/xp
 STAFF_ROLE_NAMES = {"Staff", "Admin", "GM", "Moderador"}
 
+# Reparto masivo de artefactos (staff): tope por personaje y por comando
+MAX_REPARTO_POR_PJ = 100
+MAX_REPARTO_TOTAL = 20000
+
+# Mazmorras (core/dungeon.py): acciones de `pj mazmorra`
+DUNGEON_ACTIONS = ("estado", "entrar", "avanzar", "huir", "salir")
+
 
 # ============================================================
 # Helpers I/O
 # ============================================================
-def _ensure_dirs() -> None:
-    os.makedirs(USERS_DIR, exist_ok=True)
+def _parse_item_counts(spec: str) -> Tuple[Dict[str, int], List[str]]:
+    """`"mat_x:50 con_y:3, pap_z"` -> ({item_id: cantidad}, tokens inválidos)."""
+    out: Dict[str, int] = {}
+    bad: List[str] = []
+    for token in spec.replace(",", " ").split():
+        item_id, _, n = token.partition(":")
+        try:
+            cantidad = int(n) if n else 1
+        except ValueError:
+            bad.append(token)
+            continue
+        if not item_id or cantidad <= 0:
+            bad.append(token)
+            continue
+        out[item_id] = out.get(item_id, 0) + cantidad
+    return out, bad
+
+
+def _stack_ops(cname: str, change: StackChange) -> List[Dict[str, Any]]:
+    return [op_set_stacks(cname, bucket, finales) for bucket, finales in change.finales.items() if finales]
+
 
 def _can_create_more(root: Dict[str, Any]) -> Tuple[bool, str]:
     current = len(root.get("personajes", {}))
@@ -42,39 +99,6 @@ def _can_create_more(root: Dict[str, Any]) -> Tuple[bool, str]:
         return False, "🚫 Este usuario ya tiene el máximo de 4 personajes."
     return True, ""
 
-def _read_json(path: str) -> Any:
-    if not os.path.exists(path):
-        return None
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def _write_json(path: str, data: Any) -> None:
-    tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
-    os.replace(tmp, path)
-
-
-def _user_file(user_id: int) -> str:
-    return os.path.join(USERS_DIR, f"{user_id}.json")
-
-
-def _load_user(user_id: int) -> Dict[str, Any]:
-    _ensure_dirs()
-    path = _user_file(user_id)
-    data = _read_json(path)
-    if not data:
-        data = {str(user_id): {"personajes": {}}}
-        _write_json(path, data)
-    return data
-
-
-def _save_user(user_id: int, data: Dict[str, Any]) -> None:
-    _ensure_dirs()
-    _write_json(_user_file(user_id), data)
-
-
 def _get_user_root(data: Dict[str, Any], user_id: int) -> Dict[str, Any]:
     key = str(user_id)
     if key not in data:
@@ -89,93 +113,25 @@ def _get_character(data: Dict[str, Any], user_id: int, nombre_personaje: str) ->
     return root["personajes"].get(nombre_personaje)
 
 
-def _is_staff(member: discord.Member) -> bool:
-    role_names = {r.name for r in member.roles}
-    return len(role_names.intersection(STAFF_ROLE_NAMES)) > 0
-
-
-# ============================================================
-# DB loaders (roles/profesiones/pathways)
-# ============================================================
-def _load_db(path: str) -> Dict[str, Any]:
-    data = _read_json(path)
-    return data if isinstance(data, dict) else {}
-
-
-def _db_block(data: Dict[str, Any], key: str) -> Dict[str, Any]:
-    block = data.get(key)
-    return block if isinstance(block, dict) else {}
-
-
-def _normalize_label(s: str) -> str:
-    return " ".join(str(s).strip().split())
-
-
-def _load_options(path: str) -> List[str]:
-    """
-    Devuelve lista de NOMBRES human-friendly:
-    - rol.json: {"roles": {"guerrero": {"nombre": "Guerrero", ...}, ...}}
-    - profesiones.json: {"profesiones": {"cocinero": {"nombre": "Cocinero", ...}, ...}}
-    - pathways.json: {"pathways": {"The Fool": {"nombre":"The Fool", ...}, ...}}
-    """
-    data = _load_db(path)
-    if not data:
-        return []
-
-    if "roles" in data:
-        roles = _db_block(data, "roles")
-        return [_normalize_label(v.get("nombre", k)) for k, v in roles.items() if isinstance(v, dict)]
-
-    if "profesiones" in data:
-        profs = _db_block(data, "profesiones")
-        return [_normalize_label(v.get("nombre", k)) for k, v in profs.items() if isinstance(v, dict)]
+def _resolve_character(
+    root: Dict[str, Any], nombre: Optional[str]
+) -> Tuple[Optional[Dict[str, Any]], Optional[str], str]:
+    """Devuelve (personaje, nombre, error). Sin nombre usa el primer personaje."""
+    if not root["personajes"]:
+        return None, None, "No tienes personaje. Usa `/pj crear` o `=pj crear <Nombre> <Apodo>`."
 
-    if "pathways" in data:
-        paths = _db_block(data, "pathways")
-        return [_normalize_label(v.get("nombre", k)) for k, v in paths.items() if isinstance(v, dict)]
+    if not nombre:
+        nombre = next(iter(root["personajes"].keys()))
 
-    # fallback: dict plano
-    return [_normalize_label(k) for k in data.keys()]
+    ch = root["personajes"].get(nombre)
+    if not ch:
+        return None, None, f"No encontré el personaje **{nombre}**."
+    return ch, nombre, ""
 
-def _db_lookup_by_display_name(db_path: str, display_name: str) -> Optional[Dict[str, Any]]:
-    """
-    Busca un entry en rol/profesiones/pathways comparando por 'nombre' (o key fallback)
-    y devuelve el dict completo (donde viene 'imagen', 'descripcion', etc).
-    """
-    data = _load_db(db_path)
-    target = _normalize_label(display_name).lower()
-
-    # roles
-    if "roles" in data:
-        block = _db_block(data, "roles")
-        for k, v in block.items():
-            if not isinstance(v, dict):
-                continue
-            nm = _normalize_label(v.get("nombre", k)).lower()
-            if nm == target:
-                return v
-
-    # profesiones
-    if "profesiones" in data:
-        block = _db_block(data, "profesiones")
-        for k, v in block.items():
-            if not isinstance(v, dict):
-                continue
-            nm = _normalize_label(v.get("nombre", k)).lower()
-            if nm == target:
-                return v
-
-    # pathways
-    if "pathways" in data:
-        block = _db_block(data, "pathways")
-        for k, v in block.items():
-            if not isinstance(v, dict):
-                continue
-            nm = _normalize_label(v.get("nombre", k)).lower()
-            if nm == target:
-                return v
 
-    return None
+def _is_staff(member: discord.Member) -> bool:
+    role_names = {r.name for r in member.roles}
+    return len(role_names.intersection(STAFF_ROLE_NAMES)) > 0
 
 
 def _safe_image_url(entry: Optional[Dict[str, Any]]) -> Optional[str]:
@@ -199,18 +155,6 @@ def _safe_desc(entry: Optional[Dict[str, Any]], limit: int = 250) -> str:
     return desc
 
 
-def _find_role_by_name(role_name: str) -> Optional[Dict[str, Any]]:
-    db = _load_db(ROL_DB)
-    roles = _db_block(db, "roles")
-    for k, v in roles.items():
-        if not isinstance(v, dict):
-            continue
-        nombre = _normalize_label(v.get("nombre", k))
-        if nombre.lower() == _normalize_label(role_name).lower():
-            return v
-    return None
-
-
 # ============================================================
 # Base template
 # ============================================================
@@ -260,9 +204,11 @@ def _empty_equipment() -> Dict[str, Any]:
     }
 
 
-def _new_character(nombre: str, apodo: str, rol: str, profesion: str, nacion: str) -> Dict[str, Any]:
+def _new_character(
+    nombre: str, apodo: str, rol: str, profesion: str, nacion: str, game_data: GameData
+) -> Dict[str, Any]:
 
-    role_def = _find_role_by_name(rol) or {}
+    role_def = game_data.role(rol) or {}
     recurso_def = role_def.get("recurso_por_defecto") if isinstance(role_def.get("recurso_por_defecto"), dict) else {}
     recurso_tipo = str(recurso_def.get("tipo", "Mana"))
 
@@ -281,11 +227,9 @@ def _new_character(nombre: str, apodo: str, rol: str, profesion: str, nacion: st
         },
         "inventario": {
             "artefactos": [],
-            "materiales": [],
-            "consumibles": [],
             "armas": [],
-            "recetas": [],
-            "papiros": []
+            # Apilables: {item_id: cantidad} (core/stacks.py)
+            **{bucket: {} for bucket in STACK_BUCKETS},
         },
         "dinero": {
             "efectivo": 0,
@@ -296,6 +240,7 @@ def _new_character(nombre: str, apodo: str, rol: str, profesion: str, nacion: st
             "rol_key": role_def.get("nombre", rol),
         }
     }
+    ch[BONUS_TOTALS_KEY] = rebuild_bonus_totals(ch)
 
     return ch
 
@@ -303,165 +248,16 @@ def _new_character(nombre: str, apodo: str, rol: str, profesion: str, nacion: st
 
 
 # ============================================================
-# Stat computation (base + flat + percent)
+# Leveling (curva de XP + mejora_atributos_por_nivel, ver core/leveling.py)
 # ============================================================
-STAT_KEYS = [
-    "vida",
-    "ataque",
-    "poder_magico",
-    "armadura",
-    "resistencia_magica",
-    "probabilidad_critica",
-    "danio_critico",
-    "evasion",
-    "suerte",
-    "aura",
-    "inmortalidad",
-    "bloqueo",
-]
-NESTED_STAT_KEYS = ["recurso.cantidad_maxima"]
-
-
-def _get_stat_value(stats: Dict[str, Any], key: str) -> float:
-    if key == "recurso.cantidad_maxima":
-        return float(stats["recurso"]["cantidad_maxima"]["base"])
-    return float(stats[key]["base"])
-
-
-def _set_stat_value(stats: Dict[str, Any], key: str, new_base: float) -> None:
-    if key == "recurso.cantidad_maxima":
-        stats["recurso"]["cantidad_maxima"]["base"] = float(new_base)
-    else:
-        stats[key]["base"] = float(new_base)
-
-
-def _add_to_acc(acc: Dict[str, float], key: str, value: float) -> None:
-    acc[key] = float(acc.get(key, 0.0)) + float(value)
-
-
-def _collect_item_bonuses(item: Dict[str, Any]) -> Tuple[Dict[str, float], Dict[str, float]]:
-    flat: Dict[str, float] = {}
-    pct: Dict[str, float] = {}
-
-    def apply_attr(attr: Dict[str, Any]) -> None:
-        stat = attr.get("estadistica")
-        tipo = attr.get("tipo")
-        val = attr.get("valor", 0)
-
-        if not stat or tipo not in {"plano", "porcentaje"}:
-            return
-
-        # ✅ Mapear mana al recurso real del personaje
-        if stat == "mana":
-            stat = "recurso.cantidad_maxima"
-
-        if tipo == "plano":
-            _add_to_acc(flat, stat, float(val))
-        else:
-            _add_to_acc(pct, stat, float(val))
-
-    if isinstance(item.get("atributo_principal"), dict):
-        apply_attr(item["atributo_principal"])
-
-    # ✅ 4 substats
-    for a in item.get("atributos_secundarios", [])[:4]:
-        if isinstance(a, dict):
-            apply_attr(a)
-
-    return flat, pct
-
-
-
+def _role_name(ch: Dict[str, Any]) -> Optional[str]:
+    return (ch.get("arboles_habilidad", {}).get("rol", {}) or {}).get("nombre")
 
-def _compute_stats(character: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
-    """
-    - base = stats.base + flat(arma_principal) + flat(artefactos)
-    - adicionales = percent(artefactos + arma_principal) aplicados sobre base
-    - total = base + adicionales
-    """
-    stats = character["estadisticas"]
-    equip = character["equipamiento"]
-
-    base_vals: Dict[str, float] = {k: _get_stat_value(stats, k) for k in STAT_KEYS}
-    base_vals["recurso.cantidad_maxima"] = _get_stat_value(stats, "recurso.cantidad_maxima")
-
-    flat_bonus: Dict[str, float] = {}
-    pct_bonus: Dict[str, float] = {}
-
-    weapon = equip.get("arma_principal")
-    if isinstance(weapon, dict):
-        f, p = _collect_item_bonuses(weapon)
-        for kk, vv in f.items():
-            _add_to_acc(flat_bonus, kk, vv)
-        for kk, vv in p.items():
-            _add_to_acc(pct_bonus, kk, vv)
-
-    for _, item in (equip.get("artefactos") or {}).items():
-        if isinstance(item, dict):
-            f, p = _collect_item_bonuses(item)
-            for kk, vv in f.items():
-                _add_to_acc(flat_bonus, kk, vv)
-            for kk, vv in p.items():
-                _add_to_acc(pct_bonus, kk, vv)
 
-    computed_base: Dict[str, float] = dict(base_vals)
-    for kk, vv in flat_bonus.items():
-        _add_to_acc(computed_base, kk, vv)
-
-    adicionales: Dict[str, float] = {}
-    for kk, pct in pct_bonus.items():
-        base_for = float(computed_base.get(kk, 0.0))
-        _add_to_acc(adicionales, kk, base_for * float(pct))
-
-    total: Dict[str, float] = dict(computed_base)
-    for kk, vv in adicionales.items():
-        _add_to_acc(total, kk, vv)
-
-    return {"base": computed_base, "adicionales": adicionales, "total": total}
-
-
-# ============================================================
-# Leveling using rol.json (mejora_atributos_por_nivel)
-# ============================================================
-def _apply_role_leveling(ch: Dict[str, Any], old_level: int, new_level: int) -> None:
-    """
-    Aplica incrementos por nivel del rol (mejora_atributos_por_nivel) en la estadística BASE del personaje.
-    Solo aplica si new_level > old_level.
-    """
-    if new_level <= old_level:
-        return
-
-    rol_name = (ch.get("arboles_habilidad", {}).get("rol", {}) or {}).get("nombre")
-    if not rol_name:
-        return
-
-    role_def = _find_role_by_name(str(rol_name))
-    if not role_def:
-        return
-
-    inc = role_def.get("mejora_atributos_por_nivel")
-    if not isinstance(inc, dict):
-        return
-
-    stats = ch.get("estadisticas", {})
-    levels_gained = new_level - old_level
-
-    for k, per_level in inc.items():
-        try:
-            per_level_val = float(per_level)
-        except Exception:
-            continue
-
-        # Permitir nested
-        if k == "recurso.cantidad_maxima":
-            base_now = _get_stat_value(stats, "recurso.cantidad_maxima")
-            _set_stat_value(stats, "recurso.cantidad_maxima", base_now + per_level_val * levels_gained)
-            continue
-
-        # Normal stats
-        if k in stats and isinstance(stats.get(k), dict) and "base" in stats[k]:
-            base_now = float(stats[k]["base"])
-            stats[k]["base"] = base_now + per_level_val * levels_gained
+def _level_text(nombre: str, change: LevelChange) -> str:
+    if change.niveles > 0:
+        return f"⬆️ **{nombre}** subió de Nv {change.nivel_antes} a Nv {change.nivel}."
+    return ""
 
 
 # ============================================================
@@ -507,13 +303,10 @@ class CreateTreeSelectView(discord.ui.View):
         self.cog = cog
         self.draft = draft
 
-        rol_opts = _load_options(ROL_DB)
-        prof_opts = _load_options(PROFESIONES_DB)
-        nac_opts = _load_options(PATHWAY_DB)
-
-        self.rol_select.options = [discord.SelectOption(label=o) for o in rol_opts[:25]]
-        self.profesion_select.options = [discord.SelectOption(label=o) for o in prof_opts[:25]]
-        self.nacion_select.options = [discord.SelectOption(label=o) for o in nac_opts[:25]]
+        gd = cog.game_data
+        self.rol_select.options = [discord.SelectOption(label=o) for o in gd.roles.options[:25]]
+        self.profesion_select.options = [discord.SelectOption(label=o) for o in gd.profesiones.options[:25]]
+        self.nacion_select.options = [discord.SelectOption(label=o) for o in gd.pathways.options[:25]]
 
     @discord.ui.select(placeholder="Elige Rol", min_values=1, max_values=1, options=[])
     async def rol_select(self, interaction: discord.Interaction, select: discord.ui.Select):
@@ -536,7 +329,7 @@ class CreateTreeSelectView(discord.ui.View):
             await interaction.response.send_message("Te faltan selecciones: Rol/Profesión/Nación.", ephemeral=True)
             return
 
-        ok, msg = self.cog.create_character_for_user(
+        ok, msg = await self.cog.create_character_for_user(
             user_id=interaction.user.id,
             nombre=self.draft.nombre,
             apodo=self.draft.apodo,
@@ -560,15 +353,10 @@ class CreateTreeButtonsView(discord.ui.View):
         self.stage = stage  # "rol" | "profesion" | "nacion"
         self.index = 0
 
-        if stage == "rol":
-            self.options = _load_options(ROL_DB)
-        elif stage == "profesion":
-            self.options = _load_options(PROFESIONES_DB)
-        else:
-            self.options = _load_options(PATHWAY_DB)
-
-        if not self.options:
-            self.options = ["(Sin opciones)"]
+        # options/entries alineados por índice: navegar no lee disco ni recorre listas
+        catalog = cog.game_data.catalog(stage)
+        self.options = list(catalog.options) or ["(Sin opciones)"]
+        self.entries = list(catalog.entries) or [None]
 
     def _current(self) -> str:
         if not self.options:
@@ -580,14 +368,7 @@ class CreateTreeButtonsView(discord.ui.View):
         title_map = {"rol": "Rol", "profesion": "Profesión", "nacion": "Nación"}
         title = title_map.get(self.stage, self.stage)
         cur = self._current()
-
-        # Elegir DB según stage
-        if self.stage == "rol":
-            entry = _db_lookup_by_display_name(ROL_DB, cur)
-        elif self.stage == "profesion":
-            entry = _db_lookup_by_display_name(PROFESIONES_DB, cur)
-        else:
-            entry = _db_lookup_by_display_name(PATHWAY_DB, cur)
+        entry = self.entries[self.index]
 
         desc = _safe_desc(entry)
         e = discord.Embed(
@@ -636,7 +417,7 @@ class CreateTreeButtonsView(discord.ui.View):
             return
 
         # ya tiene las 3
-        ok, msg = self.cog.create_character_for_user(
+        ok, msg = await self.cog.create_character_for_user(
             user_id=interaction.user.id,
             nombre=self.draft.nombre,
             apodo=self.draft.apodo,
@@ -665,7 +446,7 @@ class CreateTreeButtonsView(discord.ui.View):
             await interaction.response.edit_message(embed=view._embed(), view=view)
             return
 
-        ok, msg = self.cog.create_character_for_user(
+        ok, msg = await self.cog.create_character_for_user(
             user_id=interaction.user.id,
             nombre=self.draft.nombre,
             apodo=self.draft.apodo,
@@ -677,14 +458,102 @@ class CreateTreeButtonsView(discord.ui.View):
         self.stop()
 
 
+# ============================================================
+# Inventario de artefactos paginado (el estado viaja en el custom_id)
+# ============================================================
+INV_PREFIX = "inva"
+INV_PER_PAGE = 10
+
+
+@dataclass(frozen=True)
+class InvState:
+    user_id: int
+    pj: int                 # posición del personaje en root["personajes"]
+    query: ArtefactQuery
+    pagina: int
+
+    def custom_id(self, pagina: int) -> str:
+        q = self.query
+        parts = [INV_PREFIX, str(self.user_id), str(self.pj), q.slot or "-", str(q.rareza or 0), q.stat or "-", q.orden, str(pagina)]
+        return "|".join(parts)
+
+    @classmethod
+    def parse(cls, custom_id: str) -> Optional["InvState"]:
+        parts = custom_id.split("|")
+        if len(parts) != 8 or parts[0] != INV_PREFIX:
+            return None
+        try:
+            query = ArtefactQuery(
+                slot=None if parts[3] == "-" else parts[3],
+                rareza=int(parts[4]) or None,
+                stat=None if parts[5] == "-" else parts[5],
+                orden=parts[6] if parts[6] in ARTEFACT_SORTS else "rareza",
+            )
+            return cls(int(parts[1]), int(parts[2]), query, int(parts[7]))
+        except ValueError:
+            return None
+
+
+def _inv_query(slot: Optional[str], rareza: Optional[int], stat: Optional[str], orden: Optional[str]) -> ArtefactQuery:
+    # Acotados: todo viaja en un custom_id de 100 caracteres separado por "|"
+    def clean(value: Optional[str]) -> Optional[str]:
+        value = (value or "").lower().strip().replace("|", "")[:24]
+        return value or None
+
+    return ArtefactQuery(
+        slot=clean(slot),
+        rareza=int(rareza) if rareza else None,
+        stat=clean(stat),
+        orden=orden if orden in ARTEFACT_SORTS else "rareza",
+    )
+
+
+def _inv_pager(state: InvState, pagina: int, paginas: int) -> discord.ui.View:
+    """Botones ◀ ▶ sin callbacks: los atiende PersonajeCog.on_interaction leyendo el custom_id."""
+    view = discord.ui.View(timeout=None)
+    view.add_item(discord.ui.Button(
+        emoji="◀️", style=discord.ButtonStyle.secondary, custom_id=state.custom_id(pagina - 1), disabled=pagina <= 1
+    ))
+    view.add_item(discord.ui.Button(
+        label=f"{pagina}/{paginas}", style=discord.ButtonStyle.secondary, custom_id=f"{INV_PREFIX}|pagina", disabled=True
+    ))
+    view.add_item(discord.ui.Button(
+        emoji="▶️", style=discord.ButtonStyle.secondary, custom_id=state.custom_id(pagina + 1), disabled=pagina >= paginas
+    ))
+    # Detenida antes de enviar: discord.py no la guarda en su ViewStore (nada vivo por usuario)
+    view.stop()
+    return view
+
+
 # ============================================================
 # Cog
 # ============================================================
 class PersonajeCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # El bot es dueño del store (lo cierra en close()); si no lo trae, usamos uno propio.
+        store = getattr(bot, "user_store", None)
+        self._owns_store = store is None
+        self.store: UserStore = store or UserStore(USERS_DIR)
+        # Registro de roles/profesiones/pathways: lo carga el bot en setup_hook.
+        # Stats memoizadas por huella de equipo; los commits del store las invalidan
+        self.stat_cache = StatCache()
+        self.store.add_listener(self.stat_cache.on_commit)
+        self._own_game_data: Optional[GameData] = None
+        if getattr(bot, "game_data", None) is None:
+            self._own_game_data = GameData.load(DATA_DIR)
+
+    @property
+    def game_data(self) -> GameData:
+        return getattr(self.bot, "game_data", None) or self._own_game_data
+
+    async def cog_unload(self) -> None:
+        self.store.remove_listener(self.stat_cache.on_commit)
+        if self._owns_store:
+            await self.store.close()
+
     # ---------- CRUD ----------
-    def create_character_for_user(
+    async def create_character_for_user(
         self,
         user_id: int,
         nombre: str,
@@ -693,42 +562,47 @@ class PersonajeCog(commands.Cog):
         profesion: str,
         nacion: str,
     ) -> Tuple[bool, str]:
-        data = _load_user(user_id)
-        root = _get_user_root(data, user_id)
+        async with self.store.transaction(user_id) as tx:
+            data = tx.data
+            root = _get_user_root(data, user_id)
 
-        if nombre in root["personajes"]:
-            return False, f"Ya tienes un personaje llamado **{nombre}**."
+            if nombre in root["personajes"]:
+                return False, f"Ya tienes un personaje llamado **{nombre}**."
 
-        for _, c in root["personajes"].items():
-            if isinstance(c, dict) and c.get("apodo") == apodo:
-                return False, f"El apodo **{apodo}** ya lo usas en otro personaje."
+            for _, c in root["personajes"].items():
+                if isinstance(c, dict) and c.get("apodo") == apodo:
+                    return False, f"El apodo **{apodo}** ya lo usas en otro personaje."
 
-        root["personajes"][nombre] = _new_character(nombre, apodo, rol, profesion, nacion)
-        _save_user(user_id, data)
+            new_ch = _new_character(nombre, apodo, rol, profesion, nacion, self.game_data)
+            tx.apply(op_put_character(nombre, new_ch))
         return True, f"✅ Personaje **{nombre}** creado con apodo **{apodo}**."
 
-    def must_get_character(
+    async def must_get_character(
         self, user_id: int, nombre: Optional[str]
     ) -> Tuple[Optional[Dict[str, Any]], Optional[str], str]:
-        data = _load_user(user_id)
-        root = _get_user_root(data, user_id)
-
-        if not root["personajes"]:
-            return None, None, "No tienes personaje. Usa `/pj crear` o `=pj crear <Nombre> <Apodo>`."
-
-        if not nombre:
-            nombre = next(iter(root["personajes"].keys()))
-
-        ch = root["personajes"].get(nombre)
-        if not ch:
-            return None, None, f"No encontré el personaje **{nombre}**."
-        return ch, nombre, ""
-
-    def update_character(self, user_id: int, nombre: str, new_ch: Dict[str, Any]) -> None:
-        data = _load_user(user_id)
-        root = _get_user_root(data, user_id)
-        root["personajes"][nombre] = new_ch
-        _save_user(user_id, data)
+        """Solo lectura. Para mutar usar `store.transaction` + `_resolve_character`."""
+        data = await self.store.load(user_id)
+        return _resolve_character(_get_user_root(data, user_id), nombre)
+
+    async def update_character(self, user_id: int, nombre: str, new_ch: Dict[str, Any]) -> None:
+        """Reemplaza el personaje completo. Para cambios puntuales usar store.transaction con ops."""
+        await self.store.apply(user_id, [op_put_character(nombre, new_ch)])
+
+    # ---------- XP / nivel ----------
+    def _grant_xp(self, tx: UserTransaction, cname: str, ch: Dict[str, Any], xp: int) -> LevelChange:
+        """Toda XP otorgada pasa por acá: resuelve los niveles ganados y registra las ops en `tx`."""
+        gd = self.game_data
+        change = grant_xp(ch, xp, gd.xp_curve, gd.role_increments(_role_name(ch)))
+        tx.apply(op_add_xp(cname, change.experiencia))
+        if change.niveles:
+            tx.apply(*op_set_level(cname, change.nivel, ch["estadisticas"]))
+        return change
+
+    def _set_level(self, tx: UserTransaction, cname: str, ch: Dict[str, Any], nivel: int) -> LevelChange:
+        gd = self.game_data
+        change = set_level(ch, nivel, gd.xp_curve, gd.role_increments(_role_name(ch)))
+        tx.apply(*op_set_level(cname, change.nivel, ch["estadisticas"]), op_add_xp(cname, change.experiencia))
+        return change
 
     # ---------- Embeds ----------
     def basic_embed(self, nombre: str, ch: Dict[str, Any]) -> discord.Embed:
@@ -745,7 +619,13 @@ class PersonajeCog(commands.Cog):
         e = discord.Embed(title=f"📌 {ch.get('nombre', nombre)} ({ch.get('apodo', '-')})")
 
         e.add_field(name="Nivel", value=str(ch.get("nivel", 1)), inline=True)
-        e.add_field(name="Experiencia", value=str(ch.get("experiencia", 0)), inline=True)
+        xp = int(ch.get("experiencia", 0) or 0)
+        faltan = self.game_data.xp_curve.xp_to_next(xp, int(ch.get("nivel", 1) or 1))
+        e.add_field(
+            name="Experiencia",
+            value=f"{xp} (faltan {faltan} para subir)" if faltan is not None else f"{xp} (nivel máximo)",
+            inline=True,
+        )
 
         e.add_field(name="💰 Dinero", value=f"Efectivo: **{ef}**\nBanco: **{banco}**\nTotal: **{total}**", inline=False)
 
@@ -756,8 +636,8 @@ class PersonajeCog(commands.Cog):
         return e
 
 
-    def stats_embed(self, ch: Dict[str, Any]) -> discord.Embed:
-        calc = _compute_stats(ch)
+    def stats_embed(self, user_id: int, cname: str, ch: Dict[str, Any]) -> discord.Embed:
+        calc = self.stat_cache.get(user_id, cname, ch)
         base = calc["base"]
         add = calc["adicionales"]
         total = calc["total"]
@@ -780,20 +660,370 @@ class PersonajeCog(commands.Cog):
         e.add_field(name="Stats (3)", value="\n\n".join(lines[12:]), inline=False)
         return e
 
-    def add_artefact_to_inventory(self, ch: Dict[str, Any], artefact: Dict[str, Any]) -> None:
-        inv = ch.setdefault("inventario", {})
-        inv.setdefault("artefactos", [])
-        inv["artefactos"].append(artefact)
+    async def _search_characters_text(self, texto: str) -> str:
+        texto = texto.strip()
+        found = await self.store.find_characters(nombre=texto)
+        found += [r for r in await self.store.find_characters(apodo=texto) if r not in found]
+        if not found:
+            return f"No encontré personajes con nombre o apodo **{texto}**."
+
+        lines = [
+            f"- <@{uid}> | **{nm}** ({c.get('apodo', '-')}) | Nv {c.get('nivel', 1)}"
+            for uid, nm, c in found[:25]
+        ]
+        return "🔎 **Resultados**:\n" + "\n".join(lines)
+
+    def _cache_stats_text(self) -> str:
+        st = self.stat_cache.stats()
+        looked = st["hits"] + st["misses"]
+        ratio = (100.0 * st["hits"] / looked) if looked else 0.0
+        us = self.store.cache.stats()
+        lines = [
+            "🧮 **Caches**",
+            f"- stats: {st['entries']} entradas | hits {st['hits']} | misses {st['misses']} "
+            f"({ratio:.0f}% hit) | invalidadas {st['invalidations']}",
+            f"- usuarios: {us['entries']} en memoria ({us['dirty']} sucios) | hits {us['hits']} | misses {us['misses']}",
+        ]
+        index = self.game_data.pathway_index
+        if index is not None:
+            ps = index.stats()
+            lines.append(f"- pathways: {ps['materializados']}/{ps['pathways']} materializados | hits {ps['hits']} | misses {ps['misses']}")
+        return "\n".join(lines)
+
+    async def _verify_bonus_text(self, user_id: int, nombre: Optional[str]) -> str:
+        """Compara los bonos persistidos con el equipo y reconstruye los que derivaron."""
+        async with self.store.transaction(user_id) as tx:
+            chars = tx.root["personajes"]
+            names = [nombre] if nombre else list(chars)
+            lines = [f"🧾 **Bonos de equipo** de <@{user_id}>"]
+            for cname in names:
+                ch = chars.get(cname)
+                if not isinstance(ch, dict):
+                    lines.append(f"- **{cname}**: no existe.")
+                    continue
+                drift, rebuilt = bonus_drift(ch)
+                if drift <= BONUS_TOLERANCE:
+                    lines.append(f"- **{cname}**: ✅ al día.")
+                    continue
+                tx.apply(op_set_bonus_totals(cname, rebuilt))
+                motivo = "sin totales o equipo distinto" if drift == float("inf") else f"deriva {drift:.2e}"
+                lines.append(f"- **{cname}**: 🔧 reconstruido ({motivo}).")
+        if len(lines) == 1:
+            lines.append("No tiene personajes.")
+        return "\n".join(lines)
+
+    async def _grant_artefacts_text(self, user_ids: List[int], slot: str, rareza: int, cantidad: int) -> str:
+        """
+        Reparte `cantidad` artefactos al primer personaje de cada usuario. Un solo
+        lote generado fuera del event loop y una transacción (un op) por usuario.
+        """
+        rules = self.game_data.artefact_rules
+        slot = slot.lower().strip()
+        if slot != MIX and (rules is None or rules.slot(slot) is None):
+            return "Slot inválido. Usa: baston/arma_artefacto/caliz/moneda/mix"
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return "No hay usuarios a quienes repartir."
+        cantidad = max(1, min(int(cantidad), MAX_REPARTO_POR_PJ))
+        if cantidad * len(user_ids) > MAX_REPARTO_TOTAL:
+            return f"🚫 Demasiados artefactos en un comando (máximo {MAX_REPARTO_TOTAL})."
+        rareza = max(1, min(5, int(rareza)))
 
-    def pop_artefact_from_inventory(self, ch: Dict[str, Any], artefact_id: str) -> Optional[Dict[str, Any]]:
-        inv = ch.get("inventario", {}).get("artefactos", [])
-        for i, a in enumerate(inv):
-            if isinstance(a, dict) and a.get("id") == artefact_id:
-                return inv.pop(i)
-        return None
+        records = await asyncio.to_thread(generate_artefacts, slot, rareza, cantidad * len(user_ids), None, rules)
+        entregados, sin_pj = 0, []
+        for i, uid in enumerate(user_ids):
+            async with self.store.transaction(uid) as tx:
+                ch, cname, err = _resolve_character(tx.root, None)
+                if err:
+                    sin_pj.append(uid)
+                    continue
+                assert ch and cname
+                items = expand_artefacts(records[i * cantidad:(i + 1) * cantidad], rules)
+                tx.apply(op_add_items(cname, "artefactos", items))
+                entregados += 1
+
+        lines = [
+            f"🎁 {cantidad} artefacto(s) **{slot}** R{rareza} entregados a {entregados} personaje(s)."
+        ]
+        if sin_pj:
+            shown = ", ".join(f"<@{uid}>" for uid in sin_pj[:20])
+            extra = f" y {len(sin_pj) - 20} más" if len(sin_pj) > 20 else ""
+            lines.append(f"Sin personaje: {shown}{extra}.")
+        return "\n".join(lines)
+
+    async def _reload_data_text(self, completo: bool) -> str:
+        watcher = getattr(self.bot, "data_watcher", None)
+        if watcher is None:
+            return "La recarga en caliente no está activa en este bot."
+
+        report = await watcher.check(force=completo)
+        if not report.changed and not report.errors:
+            lines = [f"✅ Sin cambios en datos de juego (revisión {report.scan_ms:.1f} ms)."]
+            last = watcher.last_report
+            if last is not None and last.changed:
+                lines.append(
+                    f"Última recarga: <t:{int(last.at)}:R> ({len(last.parse_ms)} archivos, {last.total_ms:.1f} ms)."
+                )
+            return "\n".join(lines)
+
+        lines = [f"🔄 **Datos recargados** en {report.total_ms:.1f} ms"]
+        lines.append(f"- revisión: {report.scan_ms:.1f} ms | registro: {report.build_ms:.1f} ms")
+        for name, ms in sorted(report.parse_ms.items(), key=lambda kv: -kv[1])[:15]:
+            lines.append(f"- `{name}`: {ms:.1f} ms")
+        for name in report.removed:
+            lines.append(f"- `{name}`: eliminado")
+        for name, err in report.errors.items():
+            lines.append(f"❌ `{name}` no se aplicó: {err[:150]}")
+        return "\n".join(lines)
+
+    async def _optimize_text(self, ch: Dict[str, Any], objetivo: str) -> str:
+        objetivo = objetivo.lower().strip()
+        obj = OBJECTIVES.get(objetivo)
+        if obj is None:
+            return "Objetivo inválido. Usa: " + " / ".join(OBJECTIVES)
+
+        # Búsqueda en un hilo sobre una copia: el personaje vivo puede cambiar mientras tanto
+        res = await asyncio.to_thread(optimize_loadout, loadout_snapshot(ch), objetivo)
+
+        def label(item: Optional[Dict[str, Any]]) -> str:
+            if item is None:
+                return "(vacío)"
+            ident = f"`{item['id']}` " if item.get("id") else ""
+            return f"{ident}{item.get('nombre', '-')} R{item.get('rareza', '?')}"
+
+        lines = [f"🧠 **Mejor equipo para {obj.descripcion}**"]
+        if not res.cambios:
+            lines.append(f"Tu equipo actual ya es el mejor: **{res.valor_actual:.2f}**.")
+        else:
+            lines.append(f"**{res.valor_actual:.2f}** → **{res.valor:.2f}** (+{res.mejora:.2f})")
+            for slot in LOADOUT_SLOTS:
+                if slot in res.cambios:
+                    lines.append(f"- **{slot}**: {label(res.loadout[slot])}")
+            lines.append("Equipa con `/pj equipar_id <ID>` (artefactos) o `=pj equipar_arma` (arma).")
+        lines.append(
+            f"-# {res.candidatos} candidatos, {res.tras_poda} tras descartar dominados, "
+            f"{res.nodos} nodos explorados en {res.ms:.1f} ms"
+        )
+        return "\n".join(lines)
+
+    def _backpack_text(self, ch: Dict[str, Any], cname: str) -> str:
+        catalog = self.game_data.items
+        lines = [f"🎒 **Mochila de {cname}**"]
+        for bucket in STACK_BUCKETS:
+            counts = stack_counts(ch, bucket)
+            if not counts:
+                continue
+            lines.append(f"**{bucket.title()}**")
+            for item_id, n in sorted(counts.items())[:15]:
+                item = catalog.get(item_id) or {}
+                rule = stack_rule(catalog, item_id)
+                stacks = split_stacks(n, rule.max_stack) if rule else [n]
+                detalle = f" ({len(stacks)} pilas de {rule.max_stack})" if rule and len(stacks) > 1 else ""
+                lines.append(f"- {item.get('nombre', item_id)} `{item_id}` ×{n}{detalle}")
+            if len(counts) > 15:
+                lines.append(f"- … y {len(counts) - 15} más")
+        if len(lines) == 1:
+            lines.append("Vacía.")
+        return "\n".join(lines)
+
+    async def _loot_text(self, objetivo: str, veces: int, seed: Optional[int], user_id: Optional[int]) -> str:
+        """Staff: tira una tabla de loot (o la de un enemigo) `veces` veces; con usuario, se la entrega."""
+        loot = self.game_data.loot
+        table = loot.resolve(objetivo)
+        if table is None:
+            return f"No encontré la tabla ni el enemigo **{objetivo}**."
+        veces = max(1, min(int(veces), 100000))
+        res = loot.roll([(table, veces)], seed)
+
+        lines = [f"🎲 **{table.id}** ×{veces} (seed `{res.seed}`)"]
+        for item_id, n in sorted(res.stacks.items(), key=lambda kv: -kv[1]):
+            item = self.game_data.items.get(item_id) or {}
+            lines.append(f"- {item.get('nombre', item_id)} `{item_id}` ×{n}")
+        for item_id, n in sorted(res.sin_catalogo.items(), key=lambda kv: -kv[1]):
+            lines.append(f"- ⚠️ `{item_id}` ×{n} (no está en data/items)")
+        if not res.stacks and not res.sin_catalogo:
+            lines.append("Nada.")
+
+        if user_id is not None and res.stacks:
+            async with self.store.transaction(user_id) as tx:
+                ch, cname, err = _resolve_character(tx.root, None)
+                if err:
+                    lines.append(err)
+                    return "\n".join(lines)
+                assert ch and cname
+                change = plan_add(ch, self.game_data.items, res.stacks)
+                tx.apply(*_stack_ops(cname, change))
+            lines.append(f"📦 Entregado a **{cname}** (<@{user_id}>).")
+            for item_id, motivo in list(change.rechazados.items())[:10]:
+                lines.append(f"- `{item_id}`: {motivo}")
+        return "\n".join(lines)
+
+    async def _change_stacks_text(self, user_id: int, spec: str, quitar: bool) -> str:
+        """Staff: suma o resta varios items apilables al primer personaje en una transacción."""
+        counts, bad = _parse_item_counts(spec)
+        if bad:
+            return "Formato inválido: " + ", ".join(f"`{t}`" for t in bad[:10]) + " (usa `item_id:cantidad`)."
+        if not counts:
+            return "No indicaste items."
+
+        async with self.store.transaction(user_id) as tx:
+            ch, cname, err = _resolve_character(tx.root, None)
+            if err:
+                return err
+            assert ch and cname
+            catalog = self.game_data.items
+            change = plan_remove(ch, catalog, counts) if quitar else plan_add(ch, catalog, counts)
+            tx.apply(*_stack_ops(cname, change))
+
+        verbo = "Quitados" if quitar else "Entregados"
+        lines = [f"📦 {verbo} a **{cname}**: " + (", ".join(f"`{i}` ×{n}" for i, n in change.aplicados.items()) or "nada")]
+        for item_id, motivo in list(change.rechazados.items())[:10]:
+            lines.append(f"- `{item_id}`: {motivo}")
+        return "\n".join(lines)
+
+    def _room_text(self, rules: DungeonRules, run: Run, room: Room) -> str:
+        """Sala actual de la corrida; las salidas se generan solo para mostrar su tipo."""
+        lines = [f"🏰 **Mazmorra** · sala {room.profundidad + 1}/{rules.profundidad} — **{room.tipo.nombre}**"]
+        if room.tipo.descripcion:
+            lines.append(f"_{room.tipo.descripcion}_")
+        if room.enemigos:
+            lines.append("⚔️ Enemigos: " + ", ".join(f"{e} ×{n}" for e, n in room.enemigos))
+        if room.tipo.eventos:
+            lines.append("✨ Eventos: " + ", ".join(room.tipo.eventos))
+        if room.tipo.recompensa:
+            lines.append("🎁 Recompensas: " + ", ".join(room.tipo.recompensa))
+        if room.final:
+            lines.append("👑 Sala final: `avanzar` para enfrentarla, `huir` para salir sin botín.")
+        else:
+            salidas = [rules.room(run.seed, room.profundidad + 1, j).tipo.nombre for j in room.salidas]
+            lines.append("🚪 Salidas: " + " · ".join(f"`{k}` {name}" for k, name in enumerate(salidas, 1)))
+        return "\n".join(lines)
+
+    async def _dungeon_text(self, user_id: int, accion: str, salida: int, nombre: Optional[str]) -> str:
+        """Entra / avanza / huye / sale de la mazmorra del personaje; solo se guarda la corrida compacta."""
+        accion = accion.strip().lower()
+        if accion not in DUNGEON_ACTIONS:
+            return "Acción inválida. Usa: " + ", ".join(f"`{a}`" for a in DUNGEON_ACTIONS) + "."
+        rules = self.game_data.dungeon
+        if rules is None:
+            return "No hay mazmorras cargadas (falta dungeon.json)."
+
+        if accion == "estado":
+            ch, cname, err = await self.must_get_character(user_id, nombre)
+            if err:
+                return err
+            assert ch and cname
+            run = Run.from_dict(ch.get(RUN_KEY))
+            if run is None:
+                return f"**{cname}** no está en una mazmorra. Usa `entrar`."
+            if not run.valid(rules):
+                return "La mazmorra cambió desde que entraste; usa `salir` para cerrarla."
+            return self._room_text(rules, run, run.current(rules))
+
+        lines: List[str] = []
+        async with self.store.transaction(user_id) as tx:
+            ch, cname, err = _resolve_character(tx.root, nombre)
+            if err:
+                return err
+            assert ch and cname
+            run = Run.from_dict(ch.get(RUN_KEY))
+
+            if accion == "entrar":
+                if run is None:
+                    run = Run.start()
+                    tx.apply(op_set_dungeon(cname, run.to_dict()))
+                    lines.append(f"🗝️ **{cname}** entra a la mazmorra (seed `{run.seed}`).")
+                elif not run.valid(rules):
+                    return "La mazmorra cambió desde que entraste; usa `salir` para cerrarla."
+                return "\n".join(lines + [self._room_text(rules, run, run.current(rules))])
+
+            if run is None:
+                return f"**{cname}** no está en una mazmorra. Usa `entrar`."
+            if accion == "salir":
+                tx.apply(op_set_dungeon(cname, None))
+                return f"🚪 **{cname}** abandona la mazmorra en la sala {run.profundidad + 1}."
+            if not run.valid(rules):
+                return "La mazmorra cambió desde que entraste; usa `salir` para cerrarla."
+
+            code = "h" if accion == "huir" else "s"
+            try:
+                room, nxt = run.resolve(rules, code, salida - 1)
+            except ValueError as e:
+                return f"❌ {e}."
+
+            ops = []
+            lines.append(f"{'✅' if code == 's' else '🏃'} **{room.tipo.nombre}**: {RESULTADOS[code]}.")
+            if code == "s":
+                res, sin_tabla = room_loot(self.game_data.loot, room)
+                change = plan_add(ch, self.game_data.items, res.stacks)
+                ops.extend(_stack_ops(cname, change))
+                for item_id, n in change.aplicados.items():
+                    item = self.game_data.items.get(item_id) or {}
+                    lines.append(f"- 📦 {item.get('nombre', item_id)} `{item_id}` ×{n}")
+                for item_id, n in res.sin_catalogo.items():
+                    lines.append(f"- ⚠️ `{item_id}` ×{n} (no está en data/items)")
+                for item_id, motivo in list(change.rechazados.items())[:10]:
+                    lines.append(f"- `{item_id}`: {motivo}")
+                if sin_tabla:
+                    lines.append("🎁 " + ", ".join(sin_tabla))
+            ops.append(op_set_dungeon(cname, nxt.to_dict() if nxt else None))
+            tx.apply(*ops)
+
+        if nxt is None:
+            superadas = (run.resultados + code).count("s")
+            titulo = "🏆 ¡Mazmorra completada!" if code == "s" else "🚪 Saliste de la mazmorra sin enfrentar al jefe."
+            lines.append(f"{titulo} Salas superadas: {superadas}/{rules.profundidad}.")
+        else:
+            lines.append(self._room_text(rules, nxt, nxt.current(rules)))
+        return "\n".join(lines)
+
+    def get_artefact_from_inventory(self, ch: Dict[str, Any], artefact_id: str) -> Optional[Dict[str, Any]]:
+        # Solo busca (O(1) con el índice de core/inventory): el movimiento inventario <-> equipo se registra con ops
+        return inventory_items(ch, "artefactos").find(artefact_id)
+
+    async def _inventory_view(self, state: InvState, nombre: Optional[str] = None) -> Tuple[str, Optional[discord.ui.View]]:
+        """Texto + botones de una página. Con `nombre` ("" = primer personaje) lo resuelve; con None usa `state.pj`."""
+        data = await self.store.load(state.user_id)
+        root = _get_user_root(data, state.user_id)
+        names = list(root["personajes"])
+        if nombre is None and 0 <= state.pj < len(names):
+            nombre = names[state.pj]
+        elif nombre is None:
+            return "Ese personaje ya no existe.", None
+        ch, cname, err = _resolve_character(root, nombre)
+        if err:
+            return err, None
+        assert ch and cname
+        state = InvState(state.user_id, names.index(cname), state.query, state.pagina)
+
+        page = artefact_page(inventory_items(ch, "artefactos"), state.query, state.pagina, INV_PER_PAGE)
+        q = state.query
+        filtros = [f for f in (q.slot, f"R{q.rareza}" if q.rareza else None, q.stat) if f]
+        lines = [f"🎒 **Artefactos de {cname}** ({page.total}{' · ' + ' · '.join(filtros) if filtros else ''} · orden: {q.orden})"]
+        if not page.rows:
+            lines.append("No hay artefactos que coincidan." if filtros else "No tienes artefactos en inventario.")
+            return "\n".join(lines), None
+        for a in page.rows:
+            main = a.get("atributo_principal") if isinstance(a.get("atributo_principal"), dict) else {}
+            lines.append(
+                f"- `{a.get('id')}` | **{a.get('slot')}** | R{a.get('rareza')} | {a.get('nombre')}"
+                f" | {main.get('estadistica', '-')} {main.get('valor', '')}"
+            )
+        view = _inv_pager(state, page.pagina, page.paginas) if page.paginas > 1 else None
+        return "\n".join(lines), view
 
-    def list_artefacts_inventory(self, ch: Dict[str, Any]) -> List[Dict[str, Any]]:
-        return [a for a in ch.get("inventario", {}).get("artefactos", []) if isinstance(a, dict)]
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: discord.Interaction):
+        if interaction.type is not discord.InteractionType.component:
+            return
+        state = InvState.parse(str((interaction.data or {}).get("custom_id", "")))
+        if state is None:
+            return
+        if interaction.user.id != state.user_id:
+            await interaction.response.send_message("Ese inventario no es tuyo.", ephemeral=True)
+            return
+        text, view = await self._inventory_view(state)
+        await interaction.response.edit_message(content=text, view=view)
 
 
     # ============================================================
@@ -804,7 +1034,7 @@ class PersonajeCog(commands.Cog):
 
     @pj.command(name="crear", description="Crea tu personaje con una interfaz (modal + selects).")
     async def pj_crear(self, interaction: discord.Interaction):
-        data = _load_user(interaction.user.id)
+        data = await self.store.load(interaction.user.id)
         root = _get_user_root(data, interaction.user.id)
         if root["personajes"]:
             await interaction.response.send_message(
@@ -817,7 +1047,7 @@ class PersonajeCog(commands.Cog):
     @pj.command(name="ver", description="Ver tu personaje (basica o estadisticas).")
     @app_commands.describe(vista="basica | estadisticas", nombre="Nombre del personaje (opcional)")
     async def pj_ver(self, interaction: discord.Interaction, vista: str, nombre: Optional[str] = None):
-        ch, cname, err = self.must_get_character(interaction.user.id, nombre)
+        ch, cname, err = await self.must_get_character(interaction.user.id, nombre)
         if err:
             await interaction.response.send_message(err, ephemeral=True)
             return
@@ -827,7 +1057,7 @@ class PersonajeCog(commands.Cog):
         if vista == "basica":
             e = self.basic_embed(cname, ch)
         elif vista == "estadisticas":
-            e = self.stats_embed(ch)
+            e = self.stats_embed(interaction.user.id, cname, ch)
         else:
             await interaction.response.send_message("Vista inválida. Usa `basica` o `estadisticas`.", ephemeral=True)
             return
@@ -842,34 +1072,40 @@ class PersonajeCog(commands.Cog):
             await interaction.response.send_message("Slot inválido.", ephemeral=True)
             return
 
-        ch, cname, err = self.must_get_character(interaction.user.id, nombre)
-        if err:
-            await interaction.response.send_message(err, ephemeral=True)
-            return
-        assert ch and cname
-
-        try:
-            item = json.loads(item_json)
-            if not isinstance(item, dict):
-                raise ValueError
-        except Exception:
-            await interaction.response.send_message("El `item_json` no es un JSON válido (objeto).", ephemeral=True)
-            return
+        async with self.store.transaction(interaction.user.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, nombre)
+            if err:
+                await interaction.response.send_message(err, ephemeral=True)
+                return
+            assert ch and cname
+
+            try:
+                item = json.loads(item_json)
+                if not isinstance(item, dict):
+                    raise ValueError
+            except Exception:
+                await interaction.response.send_message("El `item_json` no es un JSON válido (objeto).", ephemeral=True)
+                return
 
-        ch["equipamiento"]["artefactos"][slot] = item
-        self.update_character(interaction.user.id, cname, ch)
+            tx.apply(
+                op_equip(cname, slot, item),
+                op_set_bonus_totals(cname, bonus_totals_after(ch, {slot: item})),
+            )
         await interaction.response.send_message(f"✅ Artefacto equipado en **{slot}**.", ephemeral=True)
 
     @pj.command(name="quitar_arma", description="Quita el arma principal.")
     async def pj_quitar_arma(self, interaction: discord.Interaction, nombre: Optional[str] = None):
-        ch, cname, err = self.must_get_character(interaction.user.id, nombre)
-        if err:
-            await interaction.response.send_message(err, ephemeral=True)
-            return
-        assert ch and cname
+        async with self.store.transaction(interaction.user.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, nombre)
+            if err:
+                await interaction.response.send_message(err, ephemeral=True)
+                return
+            assert ch and cname
 
-        ch["equipamiento"]["arma_principal"] = None
-        self.update_character(interaction.user.id, cname, ch)
+            tx.apply(
+                op_equip_weapon(cname, None),
+                op_set_bonus_totals(cname, bonus_totals_after(ch, {WEAPON_SOURCE: None})),
+            )
         await interaction.response.send_message("✅ Arma principal quitada.", ephemeral=True)
 
     @pj.command(name="habilidad_agregar", description="Agrega una habilidad aprendible.")
@@ -885,54 +1121,54 @@ class PersonajeCog(commands.Cog):
         multiplicador: float,
         nombre: Optional[str] = None,
     ):
-        ch, cname, err = self.must_get_character(interaction.user.id, nombre)
-        if err:
-            await interaction.response.send_message(err, ephemeral=True)
-            return
-        assert ch and cname
-
-        tipo = tipo.strip().capitalize()
-        if tipo not in {"Activa", "Pasiva"}:
-            await interaction.response.send_message("Tipo inválido (Activa/Pasiva).", ephemeral=True)
-            return
+        async with self.store.transaction(interaction.user.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, nombre)
+            if err:
+                await interaction.response.send_message(err, ephemeral=True)
+                return
+            assert ch and cname
 
-        new_skill = {
-            "nombre": nombre_habilidad,
-            "descripcion": descripcion,
-            "tipo": tipo,
-            "nivel_habilidad": 1,
-            "costo": {"tipo": costo_tipo, "valor": int(costo_valor)},
-            "canalizacion_segundos": 0,
-            "escalado": {"estadistica_base": estadistica_base, "multiplicador": float(multiplicador)},
-            "bonificadores": {"bono_danio": 0.0, "bono_curacion": 0.0},
-        }
+            tipo = tipo.strip().capitalize()
+            if tipo not in {"Activa", "Pasiva"}:
+                await interaction.response.send_message("Tipo inválido (Activa/Pasiva).", ephemeral=True)
+                return
 
-        skills = ch["kit_habilidades"].get("habilidades_aprendibles", [])
-        if any(isinstance(s, dict) and s.get("nombre") == nombre_habilidad for s in skills):
-            await interaction.response.send_message("Ya tienes una habilidad con ese nombre.", ephemeral=True)
-            return
+            new_skill = {
+                "nombre": nombre_habilidad,
+                "descripcion": descripcion,
+                "tipo": tipo,
+                "nivel_habilidad": 1,
+                "costo": {"tipo": costo_tipo, "valor": int(costo_valor)},
+                "canalizacion_segundos": 0,
+                "escalado": {"estadistica_base": estadistica_base, "multiplicador": float(multiplicador)},
+                "bonificadores": {"bono_danio": 0.0, "bono_curacion": 0.0},
+            }
+
+            skills = ch["kit_habilidades"].get("habilidades_aprendibles", [])
+            if any(isinstance(s, dict) and s.get("nombre") == nombre_habilidad for s in skills):
+                await interaction.response.send_message("Ya tienes una habilidad con ese nombre.", ephemeral=True)
+                return
 
-        skills.append(new_skill)
-        ch["kit_habilidades"]["habilidades_aprendibles"] = skills
-        self.update_character(interaction.user.id, cname, ch)
+            skills.append(new_skill)
+            tx.apply(op_set_skills(cname, skills))
         await interaction.response.send_message(f"✅ Habilidad **{nombre_habilidad}** agregada.", ephemeral=True)
 
     @pj.command(name="habilidad_quitar", description="Quita una habilidad aprendible por nombre.")
     async def pj_habilidad_quitar(self, interaction: discord.Interaction, nombre_habilidad: str, nombre: Optional[str] = None):
-        ch, cname, err = self.must_get_character(interaction.user.id, nombre)
-        if err:
-            await interaction.response.send_message(err, ephemeral=True)
-            return
-        assert ch and cname
+        async with self.store.transaction(interaction.user.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, nombre)
+            if err:
+                await interaction.response.send_message(err, ephemeral=True)
+                return
+            assert ch and cname
 
-        skills = ch["kit_habilidades"].get("habilidades_aprendibles", [])
-        new_list = [s for s in skills if not (isinstance(s, dict) and s.get("nombre") == nombre_habilidad)]
-        if len(new_list) == len(skills):
-            await interaction.response.send_message("No encontré esa habilidad.", ephemeral=True)
-            return
+            skills = ch["kit_habilidades"].get("habilidades_aprendibles", [])
+            new_list = [s for s in skills if not (isinstance(s, dict) and s.get("nombre") == nombre_habilidad)]
+            if len(new_list) == len(skills):
+                await interaction.response.send_message("No encontré esa habilidad.", ephemeral=True)
+                return
 
-        ch["kit_habilidades"]["habilidades_aprendibles"] = new_list
-        self.update_character(interaction.user.id, cname, ch)
+            tx.apply(op_set_skills(cname, new_list))
         await interaction.response.send_message(f"✅ Habilidad **{nombre_habilidad}** quitada.", ephemeral=True)
 
     # ---------------- STAFF (Slash) ----------------
@@ -942,15 +1178,15 @@ class PersonajeCog(commands.Cog):
             await interaction.response.send_message("No tienes permisos de staff.", ephemeral=True)
             return
 
-        data = _load_user(user.id)
-        root = _get_user_root(data, user.id)
+        async with self.store.transaction(user.id) as tx:
+            data = tx.data
+            root = _get_user_root(data, user.id)
 
-        if nombre_personaje not in root["personajes"]:
-            await interaction.response.send_message("Ese personaje no existe.", ephemeral=True)
-            return
+            if nombre_personaje not in root["personajes"]:
+                await interaction.response.send_message("Ese personaje no existe.", ephemeral=True)
+                return
 
-        del root["personajes"][nombre_personaje]
-        _save_user(user.id, data)
+            tx.apply(op_delete_character(nombre_personaje))
         await interaction.response.send_message(f"🗑️ Personaje **{nombre_personaje}** borrado para <@{user.id}>.", ephemeral=True)
 
     @staff.command(name="setnivel", description="Setea nivel del personaje (solo staff).")
@@ -959,20 +1195,17 @@ class PersonajeCog(commands.Cog):
             await interaction.response.send_message("No tienes permisos de staff.", ephemeral=True)
             return
 
-        data = _load_user(user.id)
-        ch = _get_character(data, user.id, nombre_personaje)
-        if not ch:
-            await interaction.response.send_message("Ese personaje no existe.", ephemeral=True)
-            return
-
-        old = int(ch.get("nivel", 1))
-        new = max(1, int(nivel))
-        ch["nivel"] = new
-        if new > old:
-            _apply_role_leveling(ch, old, new)
+        async with self.store.transaction(user.id) as tx:
+            data = tx.data
+            ch = _get_character(data, user.id, nombre_personaje)
+            if not ch:
+                await interaction.response.send_message("Ese personaje no existe.", ephemeral=True)
+                return
 
-        _save_user(user.id, data)
-        await interaction.response.send_message(f"✅ Nivel de **{nombre_personaje}** seteado a {ch['nivel']}.", ephemeral=True)
+            change = self._set_level(tx, nombre_personaje, ch, nivel)
+        await interaction.response.send_message(
+            f"✅ Nivel de **{nombre_personaje}** seteado a {change.nivel} (XP {change.experiencia}).", ephemeral=True
+        )
 
     @staff.command(name="addxp", description="Suma experiencia al personaje (solo staff).")
     async def staff_addxp(self, interaction: discord.Interaction, user: discord.User, nombre_personaje: str, xp: int):
@@ -980,15 +1213,16 @@ class PersonajeCog(commands.Cog):
             await interaction.response.send_message("No tienes permisos de staff.", ephemeral=True)
             return
 
-        data = _load_user(user.id)
-        ch = _get_character(data, user.id, nombre_personaje)
-        if not ch:
-            await interaction.response.send_message("Ese personaje no existe.", ephemeral=True)
-            return
+        async with self.store.transaction(user.id) as tx:
+            data = tx.data
+            ch = _get_character(data, user.id, nombre_personaje)
+            if not ch:
+                await interaction.response.send_message("Ese personaje no existe.", ephemeral=True)
+                return
 
-        ch["experiencia"] = max(0, int(ch.get("experiencia", 0)) + int(xp))
-        _save_user(user.id, data)
-        await interaction.response.send_message(f"✅ XP de **{nombre_personaje}** ahora es {ch['experiencia']}.", ephemeral=True)
+            change = self._grant_xp(tx, nombre_personaje, ch, xp)
+        msg = f"✅ XP de **{nombre_personaje}** ahora es {change.experiencia}.\n{_level_text(nombre_personaje, change)}"
+        await interaction.response.send_message(msg.strip(), ephemeral=True)
 
     @staff.command(name="crear_para", description="Crea un personaje para otro usuario (solo staff).")
     async def staff_crear_para(
@@ -1005,26 +1239,27 @@ class PersonajeCog(commands.Cog):
             await interaction.response.send_message("No tienes permisos de staff.", ephemeral=True)
             return
 
-        data = _load_user(user.id)
-        root = _get_user_root(data, user.id)
-        ok, msg = _can_create_more(root)
-        if not ok:
-            await interaction.response.send_message(msg, ephemeral=True)
-            return
-
-        # Validar duplicados
-        if nombre in root["personajes"]:
-            await interaction.response.send_message("Ya existe un personaje con ese nombre.", ephemeral=True)
-            return
+        async with self.store.transaction(user.id) as tx:
+            data = tx.data
+            root = _get_user_root(data, user.id)
+            ok, msg = _can_create_more(root)
+            if not ok:
+                await interaction.response.send_message(msg, ephemeral=True)
+                return
 
-        for c in root["personajes"].values():
-            if isinstance(c, dict) and c.get("apodo") == apodo:
-                await interaction.response.send_message("El apodo ya está en uso por ese usuario.", ephemeral=True)
+            # Validar duplicados
+            if nombre in root["personajes"]:
+                await interaction.response.send_message("Ya existe un personaje con ese nombre.", ephemeral=True)
                 return
 
-        # Crear
-        root["personajes"][nombre] = _new_character(nombre, apodo, rol, profesion, nacion)
-        _save_user(user.id, data)
+            for c in root["personajes"].values():
+                if isinstance(c, dict) and c.get("apodo") == apodo:
+                    await interaction.response.send_message("El apodo ya está en uso por ese usuario.", ephemeral=True)
+                    return
+
+            # Crear
+            root["personajes"][nombre] = _new_character(nombre, apodo, rol, profesion, nacion, self.game_data)
+            tx.apply(op_put_character(nombre, root["personajes"][nombre]))
 
         await interaction.response.send_message(
             f"✅ Personaje **{nombre}** creado para <@{user.id}>.\n"
@@ -1032,6 +1267,97 @@ class PersonajeCog(commands.Cog):
             ephemeral=True
         )
 
+    @staff.command(name="buscar", description="Busca personajes de cualquier usuario por nombre o apodo (solo staff).")
+    @app_commands.describe(texto="Nombre o apodo exacto (sin distinguir mayúsculas)")
+    async def staff_buscar(self, interaction: discord.Interaction, texto: str):
+        if not isinstance(interaction.user, discord.Member) or not _is_staff(interaction.user):
+            await interaction.response.send_message("No tienes permisos de staff.", ephemeral=True)
+            return
+
+        await interaction.response.send_message(await self._search_characters_text(texto), ephemeral=True)
+
+    @staff.command(name="cache", description="Muestra contadores de las caches (solo staff).")
+    async def staff_cache(self, interaction: discord.Interaction):
+        if not isinstance(interaction.user, discord.Member) or not _is_staff(interaction.user):
+            await interaction.response.send_message("No tienes permisos de staff.", ephemeral=True)
+            return
+
+        await interaction.response.send_message(self._cache_stats_text(), ephemeral=True)
+
+    @staff.command(name="verificar", description="Verifica y reconstruye los bonos de equipo persistidos (solo staff).")
+    @app_commands.describe(user="Usuario", nombre="Personaje (vacío = todos)")
+    async def staff_verificar(self, interaction: discord.Interaction, user: discord.User, nombre: Optional[str] = None):
+        if not isinstance(interaction.user, discord.Member) or not _is_staff(interaction.user):
+            await interaction.response.send_message("No tienes permisos de staff.", ephemeral=True)
+            return
+
+        await interaction.response.send_message(await self._verify_bonus_text(user.id, nombre), ephemeral=True)
+
+    @staff.command(name="repartir", description="Reparte artefactos a los miembros de un rol (solo staff).")
+    @app_commands.describe(
+        rol="Rol cuyos miembros reciben los artefactos",
+        slot="baston|arma_artefacto|caliz|moneda|mix",
+        rareza="1-5",
+        cantidad=f"Artefactos por personaje (1-{MAX_REPARTO_POR_PJ})",
+    )
+    async def staff_repartir(self, interaction: discord.Interaction, rol: discord.Role, slot: str, rareza: int, cantidad: int = 1):
+        if not isinstance(interaction.user, discord.Member) or not _is_staff(interaction.user):
+            await interaction.response.send_message("No tienes permisos de staff.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        user_ids = [m.id for m in rol.members if not m.bot]
+        await interaction.followup.send(await self._grant_artefacts_text(user_ids, slot, rareza, cantidad), ephemeral=True)
+
+    @staff.command(name="dar", description="Da items apilables al personaje de un usuario (solo staff).")
+    @app_commands.describe(user="Usuario", items="item_id:cantidad separados por espacio o coma")
+    async def staff_dar(self, interaction: discord.Interaction, user: discord.User, items: str):
+        if not isinstance(interaction.user, discord.Member) or not _is_staff(interaction.user):
+            await interaction.response.send_message("No tienes permisos de staff.", ephemeral=True)
+            return
+
+        await interaction.response.send_message(await self._change_stacks_text(user.id, items, False), ephemeral=True)
+
+    @staff.command(name="quitar_items", description="Quita items apilables al personaje de un usuario (solo staff).")
+    @app_commands.describe(user="Usuario", items="item_id:cantidad separados por espacio o coma")
+    async def staff_quitar_items(self, interaction: discord.Interaction, user: discord.User, items: str):
+        if not isinstance(interaction.user, discord.Member) or not _is_staff(interaction.user):
+            await interaction.response.send_message("No tienes permisos de staff.", ephemeral=True)
+            return
+
+        await interaction.response.send_message(await self._change_stacks_text(user.id, items, True), ephemeral=True)
+
+    @staff.command(name="loot", description="Tira una tabla de loot o la de un enemigo (solo staff).")
+    @app_commands.describe(
+        objetivo="loot_table_id, o id / nombre del enemigo",
+        veces="Tiradas (enemigos derrotados)",
+        seed="Seed para repetir una tirada",
+        user="Si se indica, el loot se entrega a su primer personaje",
+    )
+    async def staff_loot(
+        self,
+        interaction: discord.Interaction,
+        objetivo: str,
+        veces: int = 1,
+        seed: Optional[int] = None,
+        user: Optional[discord.User] = None,
+    ):
+        if not isinstance(interaction.user, discord.Member) or not _is_staff(interaction.user):
+            await interaction.response.send_message("No tienes permisos de staff.", ephemeral=True)
+            return
+
+        text = await self._loot_text(objetivo, veces, seed, user.id if user else None)
+        await interaction.response.send_message(text[:2000], ephemeral=True)
+
+    @staff.command(name="recargar", description="Recarga los JSON de datos cambiados y muestra tiempos (solo staff).")
+    @app_commands.describe(completo="Re-parsear todos los archivos aunque no hayan cambiado")
+    async def staff_recargar(self, interaction: discord.Interaction, completo: bool = False):
+        if not isinstance(interaction.user, discord.Member) or not _is_staff(interaction.user):
+            await interaction.response.send_message("No tienes permisos de staff.", ephemeral=True)
+            return
+
+        await interaction.response.send_message(await self._reload_data_text(completo), ephemeral=True)
+
     # ============================================================
     # PREFIX COMMANDS (=)
     # ============================================================
@@ -1045,13 +1371,17 @@ class PersonajeCog(commands.Cog):
             "`=pj equipar_arma <JSON>`\n"
             "`=pj equipar_artefacto <slot> <JSON>` (slot: caliz/moneda/arma_artefacto/baston)\n"
             "`=pj quitar_artefacto <slot>` | `=pj quitar_arma`\n"
+            "`=pj optimizar <ataque|poder_magico|vida|vida_efectiva|vida_efectiva_magica> [Nombre]`\n"
+            "`=pj inv_artefactos [Nombre] [slot=..] [rareza=..] [stat=..] [orden=rareza|slot|stat] [pagina=..]`\n"
+            "`=pj mochila [Nombre]`\n"
+            "`=pj mazmorra [estado|entrar|avanzar|huir|salir] [salida] [Nombre]`\n"
             "`=pj habilidad_agregar <nombre>|<descripcion>|<Activa/Pasiva>|<costo_tipo>|<costo_valor>|<stat>|<mult>`\n"
             "`=pj habilidad_quitar <nombre>`"
         )
 
     @pj_prefix.command(name="crear")
     async def pj_prefix_crear(self, ctx: commands.Context, nombre: str, apodo: str):
-        data = _load_user(ctx.author.id)
+        data = await self.store.load(ctx.author.id)
         root = _get_user_root(data, ctx.author.id)
         if root["personajes"]:
             await ctx.send("Ya tienes un personaje. (Si quieres multi-personaje, lo habilitamos.)")
@@ -1063,7 +1393,7 @@ class PersonajeCog(commands.Cog):
 
     @pj_prefix.command(name="ver")
     async def pj_prefix_ver(self, ctx: commands.Context, vista: str, nombre: Optional[str] = None):
-        ch, cname, err = self.must_get_character(ctx.author.id, nombre)
+        ch, cname, err = await self.must_get_character(ctx.author.id, nombre)
         if err:
             await ctx.send(err)
             return
@@ -1073,7 +1403,7 @@ class PersonajeCog(commands.Cog):
         if vista == "basica":
             e = self.basic_embed(cname, ch)
         elif vista == "estadisticas":
-            e = self.stats_embed(ch)
+            e = self.stats_embed(ctx.author.id, cname, ch)
         else:
             await ctx.send("Vista inválida. Usa `basica` o `estadisticas`.")
             return
@@ -1087,55 +1417,64 @@ class PersonajeCog(commands.Cog):
             await ctx.send("Slot inválido. Usa: caliz/moneda/arma_artefacto/baston")
             return
 
-        ch, cname, err = self.must_get_character(ctx.author.id, None)
-        if err:
-            await ctx.send(err)
-            return
-        assert ch and cname
-
-        try:
-            item = json.loads(item_json)
-            if not isinstance(item, dict):
-                raise ValueError
-        except Exception:
-            await ctx.send("El JSON del item no es válido.")
-            return
+        async with self.store.transaction(ctx.author.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, None)
+            if err:
+                await ctx.send(err)
+                return
+            assert ch and cname
+
+            try:
+                item = json.loads(item_json)
+                if not isinstance(item, dict):
+                    raise ValueError
+            except Exception:
+                await ctx.send("El JSON del item no es válido.")
+                return
 
-        ch["equipamiento"]["artefactos"][slot] = item
-        self.update_character(ctx.author.id, cname, ch)
+            tx.apply(
+                op_equip(cname, slot, item),
+                op_set_bonus_totals(cname, bonus_totals_after(ch, {slot: item})),
+            )
         await ctx.send(f"✅ Artefacto equipado en **{slot}**.")
 
 
     @pj_prefix.command(name="equipar_arma")
     async def pj_prefix_equipar_arma(self, ctx: commands.Context, *, item_json: str):
-        ch, cname, err = self.must_get_character(ctx.author.id, None)
-        if err:
-            await ctx.send(err)
-            return
-        assert ch and cname
-
-        try:
-            item = json.loads(item_json)
-            if not isinstance(item, dict):
-                raise ValueError
-        except Exception:
-            await ctx.send("El JSON del arma no es válido.")
-            return
+        async with self.store.transaction(ctx.author.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, None)
+            if err:
+                await ctx.send(err)
+                return
+            assert ch and cname
+
+            try:
+                item = json.loads(item_json)
+                if not isinstance(item, dict):
+                    raise ValueError
+            except Exception:
+                await ctx.send("El JSON del arma no es válido.")
+                return
 
-        ch["equipamiento"]["arma_principal"] = item
-        self.update_character(ctx.author.id, cname, ch)
+            tx.apply(
+                op_equip_weapon(cname, item),
+                op_set_bonus_totals(cname, bonus_totals_after(ch, {WEAPON_SOURCE: item})),
+            )
         await ctx.send("✅ Arma principal equipada.")
 
     @pj_prefix.command(name="quitar_arma")
     async def pj_prefix_quitar_arma(self, ctx: commands.Context):
-        ch, cname, err = self.must_get_character(ctx.author.id, None)
-        if err:
-            await ctx.send(err)
-            return
-        assert ch and cname
+        async with self.store.transaction(ctx.author.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, None)
+            if err:
+                await ctx.send(err)
+                return
+            assert ch and cname
 
-        ch["equipamiento"]["arma_principal"] = None
-        self.update_character(ctx.author.id, cname, ch)
+            tx.apply(
+                op_equip_weapon(cname, None),
+                op_set_bonus_totals(cname, bonus_totals_after(ch, {WEAPON_SOURCE: None})),
+            )
         await ctx.send("✅ Arma principal quitada.")
 
     @pj_prefix.command(name="habilidad_agregar")
@@ -1161,48 +1500,48 @@ class PersonajeCog(commands.Cog):
             await ctx.send("costo_valor debe ser int y mult debe ser float.")
             return
 
-        ch, cname, err = self.must_get_character(ctx.author.id, None)
-        if err:
-            await ctx.send(err)
-            return
-        assert ch and cname
+        async with self.store.transaction(ctx.author.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, None)
+            if err:
+                await ctx.send(err)
+                return
+            assert ch and cname
 
-        skills = ch["kit_habilidades"].get("habilidades_aprendibles", [])
-        if any(isinstance(s, dict) and s.get("nombre") == nombre_h for s in skills):
-            await ctx.send("Ya tienes una habilidad con ese nombre.")
-            return
+            skills = ch["kit_habilidades"].get("habilidades_aprendibles", [])
+            if any(isinstance(s, dict) and s.get("nombre") == nombre_h for s in skills):
+                await ctx.send("Ya tienes una habilidad con ese nombre.")
+                return
 
-        new_skill = {
-            "nombre": nombre_h,
-            "descripcion": desc,
-            "tipo": tipo,
-            "nivel_habilidad": 1,
-            "costo": {"tipo": costo_tipo, "valor": costo_valor_i},
-            "canalizacion_segundos": 0,
-            "escalado": {"estadistica_base": stat, "multiplicador": mult_f},
-            "bonificadores": {"bono_danio": 0.0, "bono_curacion": 0.0},
-        }
-        skills.append(new_skill)
-        ch["kit_habilidades"]["habilidades_aprendibles"] = skills
-        self.update_character(ctx.author.id, cname, ch)
+            new_skill = {
+                "nombre": nombre_h,
+                "descripcion": desc,
+                "tipo": tipo,
+                "nivel_habilidad": 1,
+                "costo": {"tipo": costo_tipo, "valor": costo_valor_i},
+                "canalizacion_segundos": 0,
+                "escalado": {"estadistica_base": stat, "multiplicador": mult_f},
+                "bonificadores": {"bono_danio": 0.0, "bono_curacion": 0.0},
+            }
+            skills.append(new_skill)
+            tx.apply(op_set_skills(cname, skills))
         await ctx.send(f"✅ Habilidad **{nombre_h}** agregada.")
 
     @pj_prefix.command(name="habilidad_quitar")
     async def pj_prefix_habilidad_quitar(self, ctx: commands.Context, *, nombre_habilidad: str):
-        ch, cname, err = self.must_get_character(ctx.author.id, None)
-        if err:
-            await ctx.send(err)
-            return
-        assert ch and cname
+        async with self.store.transaction(ctx.author.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, None)
+            if err:
+                await ctx.send(err)
+                return
+            assert ch and cname
 
-        skills = ch["kit_habilidades"].get("habilidades_aprendibles", [])
-        new_list = [s for s in skills if not (isinstance(s, dict) and s.get("nombre") == nombre_habilidad)]
-        if len(new_list) == len(skills):
-            await ctx.send("No encontré esa habilidad.")
-            return
+            skills = ch["kit_habilidades"].get("habilidades_aprendibles", [])
+            new_list = [s for s in skills if not (isinstance(s, dict) and s.get("nombre") == nombre_habilidad)]
+            if len(new_list) == len(skills):
+                await ctx.send("No encontré esa habilidad.")
+                return
 
-        ch["kit_habilidades"]["habilidades_aprendibles"] = new_list
-        self.update_character(ctx.author.id, cname, ch)
+            tx.apply(op_set_skills(cname, new_list))
         await ctx.send(f"✅ Habilidad **{nombre_habilidad}** quitada.")
 
     # ---------------- STAFF PREFIX ----------------
@@ -1212,7 +1551,14 @@ class PersonajeCog(commands.Cog):
             "🛡️ **Staff**\n"
             "`=pjstaff borrar <@user> <NombrePersonaje>`\n"
             "`=pjstaff setnivel <@user> <NombrePersonaje> <Nivel>`\n"
-            "`=pjstaff addxp <@user> <NombrePersonaje> <XP>`"
+            "`=pjstaff addxp <@user> <NombrePersonaje> <XP>`\n"
+            "`=pjstaff buscar <Nombre|Apodo>`\n"
+            "`=pjstaff verificar <@user> [NombrePersonaje]`\n"
+            "`=pjstaff repartir <slot|mix> <Rareza> <Cantidad> <@user...>`\n"
+            "`=pjstaff dar <@user> <item_id:cantidad ...>` | `=pjstaff quitar_items <@user> <item_id:cantidad ...>`\n"
+            "`=pjstaff loot <tabla|enemigo> [veces] [seed]`\n"
+            "`=pjstaff recargar [completo]`\n"
+            "`=pjstaff cache`"
         )
 
     def _ctx_is_staff(self, ctx: commands.Context) -> bool:
@@ -1224,14 +1570,14 @@ class PersonajeCog(commands.Cog):
             await ctx.send("No tienes permisos de staff.")
             return
 
-        data = _load_user(user.id)
-        root = _get_user_root(data, user.id)
-        if nombre_personaje not in root["personajes"]:
-            await ctx.send("Ese personaje no existe.")
-            return
+        async with self.store.transaction(user.id) as tx:
+            data = tx.data
+            root = _get_user_root(data, user.id)
+            if nombre_personaje not in root["personajes"]:
+                await ctx.send("Ese personaje no existe.")
+                return
 
-        del root["personajes"][nombre_personaje]
-        _save_user(user.id, data)
+            tx.apply(op_delete_character(nombre_personaje))
         await ctx.send(f"🗑️ Personaje **{nombre_personaje}** borrado para <@{user.id}>.")
 
     @pjstaff_prefix.command(name="setnivel")
@@ -1240,20 +1586,15 @@ class PersonajeCog(commands.Cog):
             await ctx.send("No tienes permisos de staff.")
             return
 
-        data = _load_user(user.id)
-        ch = _get_character(data, user.id, nombre_personaje)
-        if not ch:
-            await ctx.send("Ese personaje no existe.")
-            return
-
-        old = int(ch.get("nivel", 1))
-        new = max(1, int(nivel))
-        ch["nivel"] = new
-        if new > old:
-            _apply_role_leveling(ch, old, new)
+        async with self.store.transaction(user.id) as tx:
+            data = tx.data
+            ch = _get_character(data, user.id, nombre_personaje)
+            if not ch:
+                await ctx.send("Ese personaje no existe.")
+                return
 
-        _save_user(user.id, data)
-        await ctx.send(f"✅ Nivel de **{nombre_personaje}** seteado a {ch['nivel']}.")
+            change = self._set_level(tx, nombre_personaje, ch, nivel)
+        await ctx.send(f"✅ Nivel de **{nombre_personaje}** seteado a {change.nivel} (XP {change.experiencia}).")
 
     @pjstaff_prefix.command(name="addxp")
     async def pjstaff_addxp(self, ctx: commands.Context, user: discord.User, nombre_personaje: str, xp: int):
@@ -1261,68 +1602,75 @@ class PersonajeCog(commands.Cog):
             await ctx.send("No tienes permisos de staff.")
             return
 
-        data = _load_user(user.id)
-        ch = _get_character(data, user.id, nombre_personaje)
-        if not ch:
-            await ctx.send("Ese personaje no existe.")
-            return
+        async with self.store.transaction(user.id) as tx:
+            data = tx.data
+            ch = _get_character(data, user.id, nombre_personaje)
+            if not ch:
+                await ctx.send("Ese personaje no existe.")
+                return
 
-        ch["experiencia"] = max(0, int(ch.get("experiencia", 0)) + int(xp))
-        _save_user(user.id, data)
-        await ctx.send(f"✅ XP de **{nombre_personaje}** ahora es {ch['experiencia']}.")
+            change = self._grant_xp(tx, nombre_personaje, ch, xp)
+        msg = f"✅ XP de **{nombre_personaje}** ahora es {change.experiencia}.\n{_level_text(nombre_personaje, change)}"
+        await ctx.send(msg.strip())
 
     @pj.command(name="equipar_id", description="Equipa un artefacto por ID desde tu inventario.")
     async def pj_equipar_id(self, interaction: discord.Interaction, artefact_id: str, nombre: Optional[str] = None):
-        ch, cname, err = self.must_get_character(interaction.user.id, nombre)
-        if err:
-            await interaction.response.send_message(err, ephemeral=True)
-            return
-        assert ch and cname
-
-        artefact = self.pop_artefact_from_inventory(ch, artefact_id)
-        if not artefact:
-            await interaction.response.send_message("No existe ese ID en tu inventario.", ephemeral=True)
-            return
+        async with self.store.transaction(interaction.user.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, nombre)
+            if err:
+                await interaction.response.send_message(err, ephemeral=True)
+                return
+            assert ch and cname
 
-        slot = str(artefact.get("slot", "")).lower()
-        if slot not in {"caliz","moneda","arma_artefacto","baston"}:
-            await interaction.response.send_message("Ese artefacto tiene un slot inválido.", ephemeral=True)
-            return
+            artefact = self.get_artefact_from_inventory(ch, artefact_id)
+            if not artefact:
+                await interaction.response.send_message("No existe ese ID en tu inventario.", ephemeral=True)
+                return
 
-        # Si ya había algo equipado, vuelve al inventario
-        prev = ch.get("equipamiento", {}).get("artefactos", {}).get(slot)
-        if isinstance(prev, dict):
-            self.add_artefact_to_inventory(ch, prev)
+            slot = str(artefact.get("slot", "")).lower()
+            if slot not in {"caliz","moneda","arma_artefacto","baston"}:
+                await interaction.response.send_message("Ese artefacto tiene un slot inválido.", ephemeral=True)
+                return
 
-        ch["equipamiento"]["artefactos"][slot] = artefact
-        self.update_character(interaction.user.id, cname, ch)
+            # Si ya había algo equipado, vuelve al inventario
+            ops = [op_remove_item(cname, "artefactos", artefact_id)]
+            prev = ch.get("equipamiento", {}).get("artefactos", {}).get(slot)
+            if isinstance(prev, dict):
+                ops.append(op_add_item(cname, "artefactos", prev))
+            ops.append(op_equip(cname, slot, artefact))
+            # Solo entra `artefact` y sale `prev`: el resto de los totales no se toca
+            ops.append(op_set_bonus_totals(cname, bonus_totals_after(ch, {slot: artefact})))
+            tx.apply(*ops)
 
         await interaction.response.send_message(f"✅ Equipado `{artefact_id}` en **{slot}**.", ephemeral=True)
 
     @pj_prefix.command(name="equipar_id")
     async def pj_prefix_equipar_id(self, ctx: commands.Context, artefact_id: str, nombre: Optional[str] = None):
-        ch, cname, err = self.must_get_character(ctx.author.id, nombre)
-        if err:
-            await ctx.send(err)
-            return
-        assert ch and cname
-
-        artefact = self.pop_artefact_from_inventory(ch, artefact_id)
-        if not artefact:
-            await ctx.send("No existe ese ID en tu inventario.")
-            return
+        async with self.store.transaction(ctx.author.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, nombre)
+            if err:
+                await ctx.send(err)
+                return
+            assert ch and cname
 
-        slot = str(artefact.get("slot", "")).lower()
-        if slot not in {"caliz","moneda","arma_artefacto","baston"}:
-            await ctx.send("Ese artefacto tiene un slot inválido.")
-            return
+            artefact = self.get_artefact_from_inventory(ch, artefact_id)
+            if not artefact:
+                await ctx.send("No existe ese ID en tu inventario.")
+                return
 
-        prev = ch.get("equipamiento", {}).get("artefactos", {}).get(slot)
-        if isinstance(prev, dict):
-            self.add_artefact_to_inventory(ch, prev)
+            slot = str(artefact.get("slot", "")).lower()
+            if slot not in {"caliz","moneda","arma_artefacto","baston"}:
+                await ctx.send("Ese artefacto tiene un slot inválido.")
+                return
 
-        ch["equipamiento"]["artefactos"][slot] = artefact
-        self.update_character(ctx.author.id, cname, ch)
+            ops = [op_remove_item(cname, "artefactos", artefact_id)]
+            prev = ch.get("equipamiento", {}).get("artefactos", {}).get(slot)
+            if isinstance(prev, dict):
+                ops.append(op_add_item(cname, "artefactos", prev))
+            ops.append(op_equip(cname, slot, artefact))
+            # Solo entra `artefact` y sale `prev`: el resto de los totales no se toca
+            ops.append(op_set_bonus_totals(cname, bonus_totals_after(ch, {slot: artefact})))
+            tx.apply(*ops)
 
         await ctx.send(f"✅ Equipado `{artefact_id}` en **{slot}**.")
 
@@ -1334,22 +1682,80 @@ class PersonajeCog(commands.Cog):
             await interaction.response.send_message("Slot inválido.", ephemeral=True)
             return
 
-        ch, cname, err = self.must_get_character(interaction.user.id, nombre)
+        async with self.store.transaction(interaction.user.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, nombre)
+            if err:
+                await interaction.response.send_message(err, ephemeral=True)
+                return
+            assert ch and cname
+
+            current = ch["equipamiento"]["artefactos"].get(slot)
+            if not isinstance(current, dict):
+                await interaction.response.send_message("No tienes nada equipado en ese slot.", ephemeral=True)
+                return
+
+            tx.apply(
+                op_add_item(cname, "artefactos", current),
+                op_unequip(cname, slot),
+                op_set_bonus_totals(cname, bonus_totals_after(ch, {slot: None})),
+            )
+
+        await interaction.response.send_message(f"✅ Artefacto quitado de **{slot}** y devuelto al inventario.", ephemeral=True)
+
+    @pj.command(name="inventario", description="Tus artefactos, paginados, con filtros y orden.")
+    @app_commands.describe(
+        slot="Filtrar por slot", rareza="Filtrar por rareza (1-5)", stat="Filtrar por stat principal",
+        orden="rareza | slot | stat", pagina="Página", nombre="Personaje",
+    )
+    @app_commands.choices(
+        slot=[app_commands.Choice(name=s, value=s) for s in ARTEFACT_SLOTS],
+        orden=[app_commands.Choice(name=o, value=o) for o in ARTEFACT_SORTS],
+    )
+    async def pj_inventario(
+        self,
+        interaction: discord.Interaction,
+        slot: Optional[str] = None,
+        rareza: Optional[int] = None,
+        stat: Optional[str] = None,
+        orden: Optional[str] = None,
+        pagina: int = 1,
+        nombre: Optional[str] = None,
+    ):
+        state = InvState(interaction.user.id, 0, _inv_query(slot, rareza, stat, orden), pagina)
+        text, view = await self._inventory_view(state, nombre or "")
+        if view is None:
+            await interaction.response.send_message(text, ephemeral=True)
+        else:
+            await interaction.response.send_message(text, view=view, ephemeral=True)
+
+    @pj.command(name="mochila", description="Muestra tus materiales, consumibles, papiros y recetas.")
+    async def pj_mochila(self, interaction: discord.Interaction, nombre: Optional[str] = None):
+        ch, cname, err = await self.must_get_character(interaction.user.id, nombre)
         if err:
             await interaction.response.send_message(err, ephemeral=True)
             return
         assert ch and cname
 
-        current = ch["equipamiento"]["artefactos"].get(slot)
-        if not isinstance(current, dict):
-            await interaction.response.send_message("No tienes nada equipado en ese slot.", ephemeral=True)
-            return
+        await interaction.response.send_message(self._backpack_text(ch, cname), ephemeral=True)
 
-        self.add_artefact_to_inventory(ch, current)
-        ch["equipamiento"]["artefactos"][slot] = None
-        self.update_character(interaction.user.id, cname, ch)
+    @pj.command(name="mazmorra", description="Entra, avanza o sale de una mazmorra generada sala por sala.")
+    @app_commands.describe(accion="estado | entrar | avanzar | huir | salir", salida="Salida a tomar (1, 2, 3)", nombre="Personaje")
+    @app_commands.choices(accion=[app_commands.Choice(name=a, value=a) for a in DUNGEON_ACTIONS])
+    async def pj_mazmorra(self, interaction: discord.Interaction, accion: str = "estado", salida: int = 1, nombre: Optional[str] = None):
+        text = await self._dungeon_text(interaction.user.id, accion, salida, nombre)
+        await interaction.response.send_message(text[:2000], ephemeral=True)
 
-        await interaction.response.send_message(f"✅ Artefacto quitado de **{slot}** y devuelto al inventario.", ephemeral=True)
+    @pj.command(name="optimizar", description="Busca la mejor combinación de artefactos y arma de tu inventario.")
+    @app_commands.describe(objetivo="Stat a maximizar", nombre="Nombre del personaje (opcional)")
+    @app_commands.choices(objetivo=[app_commands.Choice(name=o.descripcion[:100], value=k) for k, o in OBJECTIVES.items()])
+    async def pj_optimizar(self, interaction: discord.Interaction, objetivo: str, nombre: Optional[str] = None):
+        ch, cname, err = await self.must_get_character(interaction.user.id, nombre)
+        if err:
+            await interaction.response.send_message(err, ephemeral=True)
+            return
+        assert ch and cname
+
+        await interaction.response.send_message(await self._optimize_text(ch, objetivo), ephemeral=True)
 
 
     @pjstaff_prefix.command(name="crear_para")
@@ -1367,38 +1773,99 @@ class PersonajeCog(commands.Cog):
             await ctx.send("No tienes permisos de staff.")
             return
 
-        data = _load_user(user.id)
-        root = _get_user_root(data, user.id)
-
-        ok, msg = _can_create_more(root)
-        if not ok:
-            await ctx.send(msg)
-            return
+        async with self.store.transaction(user.id) as tx:
+            data = tx.data
+            root = _get_user_root(data, user.id)
 
-        if nombre in root["personajes"]:
-            await ctx.send("Ya existe un personaje con ese nombre.")
-            return
+            ok, msg = _can_create_more(root)
+            if not ok:
+                await ctx.send(msg)
+                return
 
-        for c in root["personajes"].values():
-            if isinstance(c, dict) and c.get("apodo") == apodo:
-                await ctx.send("El apodo ya está en uso por ese usuario.")
+            if nombre in root["personajes"]:
+                await ctx.send("Ya existe un personaje con ese nombre.")
                 return
 
-        root["personajes"][nombre] = _new_character(nombre, apodo, rol, profesion, nacion)
-        _save_user(user.id, data)
+            for c in root["personajes"].values():
+                if isinstance(c, dict) and c.get("apodo") == apodo:
+                    await ctx.send("El apodo ya está en uso por ese usuario.")
+                    return
+
+            root["personajes"][nombre] = _new_character(nombre, apodo, rol, profesion, nacion, self.game_data)
+            tx.apply(op_put_character(nombre, root["personajes"][nombre]))
 
         await ctx.send(
             f"✅ Personaje **{nombre}** creado para <@{user.id}> "
             f"({len(root['personajes'])}/4)."
         )
 
-    def add_artefact_to_inventory(self, ch: Dict[str, Any], artefact: Dict[str, Any]) -> None:
-        inv = ch.get("inventario", {})
-        artefacts = inv.get("artefactos", [])
-        artefacts.append(artefact)
-        inv["artefactos"] = artefacts
-        ch["inventario"] = inv
-    
+    @pjstaff_prefix.command(name="buscar")
+    async def pjstaff_buscar(self, ctx: commands.Context, *, texto: str):
+        if not self._ctx_is_staff(ctx):
+            await ctx.send("No tienes permisos de staff.")
+            return
+
+        await ctx.send(await self._search_characters_text(texto))
+
+    @pjstaff_prefix.command(name="cache")
+    async def pjstaff_cache(self, ctx: commands.Context):
+        if not self._ctx_is_staff(ctx):
+            await ctx.send("No tienes permisos de staff.")
+            return
+
+        await ctx.send(self._cache_stats_text())
+
+    @pjstaff_prefix.command(name="verificar")
+    async def pjstaff_verificar(self, ctx: commands.Context, user: discord.User, nombre: Optional[str] = None):
+        if not self._ctx_is_staff(ctx):
+            await ctx.send("No tienes permisos de staff.")
+            return
+
+        await ctx.send(await self._verify_bonus_text(user.id, nombre))
+
+    @pjstaff_prefix.command(name="repartir")
+    async def pjstaff_repartir(
+        self, ctx: commands.Context, slot: str, rareza: int, cantidad: int, users: commands.Greedy[discord.User]
+    ):
+        if not self._ctx_is_staff(ctx):
+            await ctx.send("No tienes permisos de staff.")
+            return
+
+        await ctx.send(await self._grant_artefacts_text([u.id for u in users], slot, rareza, cantidad))
+
+    @pjstaff_prefix.command(name="dar")
+    async def pjstaff_dar(self, ctx: commands.Context, user: discord.User, *, items: str):
+        if not self._ctx_is_staff(ctx):
+            await ctx.send("No tienes permisos de staff.")
+            return
+
+        await ctx.send(await self._change_stacks_text(user.id, items, False))
+
+    @pjstaff_prefix.command(name="quitar_items")
+    async def pjstaff_quitar_items(self, ctx: commands.Context, user: discord.User, *, items: str):
+        if not self._ctx_is_staff(ctx):
+            await ctx.send("No tienes permisos de staff.")
+            return
+
+        await ctx.send(await self._change_stacks_text(user.id, items, True))
+
+    @pjstaff_prefix.command(name="loot")
+    async def pjstaff_loot(self, ctx: commands.Context, objetivo: str, veces: int = 1, seed: Optional[int] = None):
+        if not self._ctx_is_staff(ctx):
+            await ctx.send("No tienes permisos de staff.")
+            return
+
+        text = await self._loot_text(objetivo, veces, seed, None)
+        await ctx.send(text[:2000])
+
+    @pjstaff_prefix.command(name="recargar")
+    async def pjstaff_recargar(self, ctx: commands.Context, modo: str = ""):
+        if not self._ctx_is_staff(ctx):
+            await ctx.send("No tienes permisos de staff.")
+            return
+
+        await ctx.send(await self._reload_data_text(modo.lower() == "completo"))
+
     @pj.command(name="roll_artefacto", description="Genera un artefacto aleatorio y lo guarda en inventario.")
     @app_commands.describe(slot="baston|arma_artefacto|caliz|moneda", rareza="1-5")
     async def pj_roll_artefacto(self, interaction: discord.Interaction, slot: str, rareza: int, nombre: Optional[str] = None):
@@ -1408,15 +1875,15 @@ class PersonajeCog(commands.Cog):
             return
         rareza = max(1, min(5, int(rareza)))
 
-        ch, cname, err = self.must_get_character(interaction.user.id, nombre)
-        if err:
-            await interaction.response.send_message(err, ephemeral=True)
-            return
-        assert ch and cname
+        async with self.store.transaction(interaction.user.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, nombre)
+            if err:
+                await interaction.response.send_message(err, ephemeral=True)
+                return
+            assert ch and cname
 
-        artefact = generate_artefact(slot, rareza)
-        self.add_artefact_to_inventory(ch, artefact)
-        self.update_character(interaction.user.id, cname, ch)
+            artefact = generate_artefact(slot, rareza, rules=self.game_data.artefact_rules)
+            tx.apply(op_add_item(cname, "artefactos", artefact))
 
         await interaction.response.send_message(
             f"🎲 Artefacto generado y guardado en inventario.\n"
@@ -1432,35 +1899,67 @@ class PersonajeCog(commands.Cog):
             return
         rareza = max(1, min(5, int(rareza)))
 
-        ch, cname, err = self.must_get_character(ctx.author.id, nombre)
-        if err:
-            await ctx.send(err)
-            return
-        assert ch and cname
+        async with self.store.transaction(ctx.author.id) as tx:
+            ch, cname, err = _resolve_character(tx.root, nombre)
+            if err:
+                await ctx.send(err)
+                return
+            assert ch and cname
 
-        artefact = generate_artefact(slot, rareza)
-        self.add_artefact_to_inventory(ch, artefact)
-        self.update_character(ctx.author.id, cname, ch)
+            artefact = generate_artefact(slot, rareza, rules=self.game_data.artefact_rules)
+            tx.apply(op_add_item(cname, "artefactos", artefact))
 
         await ctx.send(f"🎲 Artefacto generado. ID `{artefact['id']}` (slot {artefact['slot']} R{artefact['rareza']})")
 
     @pj_prefix.command(name="inv_artefactos")
-    async def pj_prefix_inv_artefactos(self, ctx: commands.Context, nombre: Optional[str] = None):
-        ch, cname, err = self.must_get_character(ctx.author.id, nombre)
+    async def pj_prefix_inv_artefactos(self, ctx: commands.Context, *args: str):
+        """`=pj inv_artefactos [Nombre] [slot=caliz] [rareza=5] [stat=ataque] [orden=slot] [pagina=2]`"""
+        opts: Dict[str, str] = {}
+        nombre = ""
+        for arg in args:
+            key, sep, value = arg.partition("=")
+            if sep:
+                opts[key.lower()] = value
+            else:
+                nombre = arg
+        try:
+            rareza = int(opts["rareza"]) if opts.get("rareza") else None
+            pagina = int(opts.get("pagina", 1))
+        except ValueError:
+            await ctx.send("`rareza` y `pagina` deben ser números.")
+            return
+
+        query = _inv_query(opts.get("slot"), rareza, opts.get("stat"), opts.get("orden"))
+        text, view = await self._inventory_view(InvState(ctx.author.id, 0, query, pagina), nombre)
+        if view is None:
+            await ctx.send(text)
+        else:
+            await ctx.send(text, view=view)
+
+    @pj_prefix.command(name="mochila")
+    async def pj_prefix_mochila(self, ctx: commands.Context, nombre: Optional[str] = None):
+        ch, cname, err = await self.must_get_character(ctx.author.id, nombre)
         if err:
             await ctx.send(err)
             return
         assert ch and cname
 
-        artefacts = self.list_artefacts_inventory(ch)
-        if not artefacts:
-            await ctx.send("No tienes artefactos en inventario.")
+        await ctx.send(self._backpack_text(ch, cname))
+
+    @pj_prefix.command(name="mazmorra")
+    async def pj_prefix_mazmorra(self, ctx: commands.Context, accion: str = "estado", salida: int = 1, nombre: Optional[str] = None):
+        text = await self._dungeon_text(ctx.author.id, accion, salida, nombre)
+        await ctx.send(text[:2000])
+
+    @pj_prefix.command(name="optimizar")
+    async def pj_prefix_optimizar(self, ctx: commands.Context, objetivo: str, nombre: Optional[str] = None):
+        ch, cname, err = await self.must_get_character(ctx.author.id, nombre)
+        if err:
+            await ctx.send(err)
             return
+        assert ch and cname
 
-        lines = []
-        for a in artefacts[:20]:
-            lines.append(f"- `{a.get('id')}` | **{a.get('slot')}** | R{a.get('rareza')} | {a.get('nombre')}")
-        await ctx.send("🎒 **Artefactos en inventario**:\n" + "\n".join(lines))
+        await ctx.send(await self._optimize_text(ch, objetivo))
 
 
 
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+
+from src.bot.services.leaderboard import BOARDS, Leaderboard, RankRow
+
+PER_PAGE = 10
+
+BOARD_TITLES = {
+    "nivel": "🏆 Ranking por nivel",
+    "vida": "❤️ Ranking por vida",
+    "ataque": "⚔️ Ranking por ataque",
+    "poder_magico": "✨ Ranking por poder mágico",
+}
+
+
+def _fmt_score(board: str, row: RankRow) -> str:
+    score = row[3]
+    if board == "nivel":
+        return f"Nv **{int(score[0])}** ({int(score[1])} xp)"
+    return f"**{score[0]:.2f}**"
+
+
+class RankingCog(commands.Cog):
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        # El bot mantiene el ranking (listener de su UserStore); si no lo trae, armamos uno.
+        board = getattr(bot, "leaderboard", None)
+        self._owns_board = board is None
+        if board is None:
+            board = Leaderboard(bot.user_store)
+            bot.user_store.add_listener(board.on_commit)
+        self.leaderboard: Leaderboard = board
+
+    async def cog_load(self) -> None:
+        self.leaderboard.start()
+
+    async def cog_unload(self) -> None:
+        if self._owns_board:
+            self.leaderboard.store.remove_listener(self.leaderboard.on_commit)
+
+    async def ranking_embed(self, board: str, pagina: int, user_id: int) -> discord.Embed:
+        await self.leaderboard.ensure_ready()
+        total = self.leaderboard.size(board)
+        pages = max(1, -(-total // PER_PAGE))
+        pagina = max(1, min(int(pagina), pages))
+
+        rows = self.leaderboard.top(board, pagina, PER_PAGE)
+        lines = [f"`#{r[0]}` <@{r[1]}> **{r[2]}** — {_fmt_score(board, r)}" for r in rows]
+
+        e = discord.Embed(
+            title=BOARD_TITLES.get(board, board),
+            description="\n".join(lines) or "Todavía no hay personajes.",
+        )
+        mine = self.leaderboard.user_ranks(board, user_id)
+        if mine:
+            e.add_field(
+                name="Tu posición",
+                value="\n".join(
+                    f"`#{r[0]}` **{r[2]}** — {_fmt_score(board, r)}" for r in mine[:4]
+                ),
+                inline=False,
+            )
+        e.set_footer(text=f"Página {pagina}/{pages} · {total} personajes")
+        return e
+
+    # Slash /ranking
+    @app_commands.command(
+        name="ranking", description="Ranking del servidor por nivel o stats totales."
+    )
+    @app_commands.describe(
+        tabla="nivel | vida | ataque | poder_magico", pagina="Página (10 por página)"
+    )
+    @app_commands.choices(tabla=[app_commands.Choice(name=b, value=b) for b in BOARDS])
+    async def ranking_slash(self, interaction: discord.Interaction, tabla: str, pagina: int = 1):
+        await interaction.response.send_message(
+            embed=await self.ranking_embed(tabla, pagina, interaction.user.id), ephemeral=True
+        )
+
+    # Prefijo =
+    @commands.command(name="ranking")
+    async def ranking_prefix(
+        self, ctx: commands.Context, tabla: str = "nivel", pagina: Optional[int] = 1
+    ):
+        tabla = tabla.lower().strip()
+        if tabla not in BOARDS:
+            await ctx.send("Tabla inválida. Usa: " + " / ".join(BOARDS))
+            return
+        await ctx.send(embed=await self.ranking_embed(tabla, pagina or 1, ctx.author.id))
+
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(RankingCog(bot))
@@ -0,0 +1,152 @@
+# src/bot/core/artefact_rules.py
+"""
+Reglas de generación de artefactos compiladas desde data/items/artefactos.json.
+
+El JSON es la única fuente de verdad (slot_rules, rarity_scaling, roll_chances,
+base_values). Al cargar GameData se compila, por slot y por stat principal:
+  - el valor del principal por rareza (ya redondeado),
+  - la tabla de substats legales (stat, tipo) con su peso y su valor por rareza.
+Así cada tirada es: elegir principal + muestreo ponderado sin reemplazo sobre
+una tabla fija (trabajo acotado, sin bucles de rechazo).
+
+Pesos: la versión anterior elegía stat uniforme y tipo con secondary_tipo_weights,
+y rechazaba pares ilegales o repetidos. Eso equivale a muestrear sin reemplazo
+con peso(stat, tipo) = peso del tipo sobre los pares legales, que es lo que se compila.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+ARTEFACTOS_FILE = "items/artefactos.json"
+
+TIPOS = ("plano", "porcentaje")
+# Sufijo de base_values por tipo ("vida_plano", "vida_pct")
+_SUFFIX = {"plano": "plano", "porcentaje": "pct"}
+
+
+def _round(value: float, tipo: str) -> float:
+    return round(value, 4 if tipo == "porcentaje" else 2)
+
+
+@dataclass(frozen=True)
+class SubTable:
+    """Substats legales para un (slot, stat principal)."""
+    pairs: Tuple[Tuple[str, str], ...]          # (estadistica, tipo)
+    weights: Tuple[float, ...]
+    values: Mapping[int, Tuple[float, ...]]     # rareza -> valor por par
+
+
+@dataclass(frozen=True)
+class MainOption:
+    stat: str
+    tipo: str
+    values: Mapping[int, float]                 # rareza -> valor del principal
+    subs: SubTable
+
+
+@dataclass(frozen=True)
+class SlotRules:
+    slot: str
+    mains: Tuple[MainOption, ...]
+    secondary_count: int
+
+
+@dataclass(frozen=True)
+class ArtefactRules:
+    slots: Mapping[str, SlotRules]
+    rarezas: Tuple[int, ...]
+
+    @classmethod
+    def compile(cls, data: Any) -> "ArtefactRules":
+        """
+        Lanza ValueError si las reglas no alcanzan para generar
+        (p.ej. menos substats legales que secondary_count).
+        """
+        if not isinstance(data, dict) or not isinstance(data.get("rules"), dict):
+            raise ValueError(f"{ARTEFACTOS_FILE}: falta el bloque 'rules'")
+        try:
+            return cls._compile(data["rules"], data.get("base_values") or {})
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"{ARTEFACTOS_FILE}: reglas inválidas ({e})") from e
+
+    @classmethod
+    def _compile(cls, rules: Dict[str, Any], base_values: Dict[str, Any]) -> "ArtefactRules":
+        base_main: Dict[str, Any] = base_values.get("main") or {}
+        base_sub: Dict[str, Any] = base_values.get("sub") or {}
+        scaling = rules.get("rarity_scaling") or {}
+        mult_main = {int(r): float(v) for r, v in (scaling.get("mult_main") or {}).items()}
+        mult_sub = {int(r): float(v) for r, v in (scaling.get("mult_sub") or {}).items()}
+        rarezas = tuple(sorted(set(mult_main) & set(mult_sub)))
+        if not rarezas:
+            raise ValueError(f"{ARTEFACTOS_FILE}: rarity_scaling sin rarezas")
+
+        roll_chances = rules.get("roll_chances") or {}
+        tipo_weights = roll_chances.get("secondary_tipo_weights") or {"plano": 1, "porcentaje": 1}
+        common = list(rules.get("allowed_secondary_stats_common") or [])
+
+        slots: Dict[str, SlotRules] = {}
+        for slot, sr in (rules.get("slot_rules") or {}).items():
+            main = sr["main"]
+            stats = main["stat"] if isinstance(main["stat"], list) else [main["stat"]]
+            count = int(sr.get("secondary_count", 4))
+            pool = list(sr.get("secondary_pool") or common)
+            forbidden = set(sr.get("forbidden_secondary") or [])
+
+            mains: List[MainOption] = []
+            for stat in stats:
+                tipo = main["tipo"]
+                if tipo == "mixed":
+                    # mixed: porcentaje si existe base porcentual, si no plano (mana)
+                    tipo = "porcentaje" if f"{stat}_pct" in base_main else "plano"
+                base = base_main.get(f"{stat}_{_SUFFIX[tipo]}")
+                if base is None:
+                    raise ValueError(
+                        f"{ARTEFACTOS_FILE}: sin base_values.main para {stat}/{tipo} ({slot})"
+                    )
+
+                pairs, weights = [], []
+                for sub_stat in pool:
+                    if sr.get("forbidden_secondary_if_main_same_stat") and sub_stat == stat:
+                        continue
+                    for sub_tipo in TIPOS:
+                        if f"{sub_stat}:{sub_tipo}" in forbidden:
+                            continue
+                        if f"{sub_stat}_{_SUFFIX[sub_tipo]}" not in base_sub:
+                            continue
+                        w = float(tipo_weights.get(sub_tipo, 0.0))
+                        if w > 0:
+                            pairs.append((sub_stat, sub_tipo))
+                            weights.append(w)
+                if len(pairs) < count:
+                    raise ValueError(
+                        f"{ARTEFACTOS_FILE}: {slot} con principal {stat} tiene "
+                        f"{len(pairs)} substats legales (< {count})"
+                    )
+
+                sub_bases = [float(base_sub[f"{s}_{_SUFFIX[t]}"]) for s, t in pairs]
+                sub_values = {
+                    r: tuple(_round(b * mult_sub[r], t) for b, (_, t) in zip(sub_bases, pairs))
+                    for r in rarezas
+                }
+                main_values = {r: _round(float(base) * mult_main[r], tipo) for r in rarezas}
+                mains.append(MainOption(
+                    stat=stat,
+                    tipo=tipo,
+                    values=MappingProxyType(main_values),
+                    subs=SubTable(tuple(pairs), tuple(weights), MappingProxyType(sub_values)),
+                ))
+            slots[str(slot)] = SlotRules(slot=str(slot), mains=tuple(mains), secondary_count=count)
+
+        if not slots:
+            raise ValueError(f"{ARTEFACTOS_FILE}: slot_rules vacío")
+        return cls(slots=MappingProxyType(slots), rarezas=rarezas)
+
+    def slot(self, slot: str) -> Optional[SlotRules]:
+        return self.slots.get(slot)
+
+
+def rules_from_files(files: Mapping[str, Any]) -> Optional[ArtefactRules]:
+    data = files.get(ARTEFACTOS_FILE)
+    return ArtefactRules.compile(data) if isinstance(data, dict) else None
@@ -0,0 +1,169 @@
+# src/bot/core/data_snapshot.py
+"""
+Snapshot precompilado de src/bot/data/ para arranque en frío rápido.
+
+Uso:
+    python -m src.bot.core.data_snapshot build      # compila data/ -> data/game_data.snapshot
+    python -m src.bot.core.data_snapshot bench      # compara JSON vs snapshot
+
+El snapshot es un pickle del GameData completo (con índices ya armados) precedido
+por una cabecera con el formato y un hash del contenido de todos los JSON. Al
+arrancar (`load_game_data`) se recalcula el hash leyendo los bytes crudos (mucho
+más barato que parsear) y, si coincide, se usa el snapshot; si no (o si falla),
+se parsean los JSON como siempre.
+
+Solo se cargan snapshots generados localmente desde este repo (pickle ejecuta
+código al deserializar): no copiar archivos .snapshot de terceros.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import logging
+import os
+import pickle
+import statistics
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Optional, Tuple
+
+from src.bot.core.game_data import DEFAULT_DATA_DIR, GameData, iter_data_files, mapping_proxy
+from src.bot.core.pathways import PathwayIndex
+
+log = logging.getLogger(__name__)
+
+# Subir si cambia la forma de GameData / DataCatalog / ItemCatalog
+SNAPSHOT_FORMAT = 6
+SNAPSHOT_FILE = "game_data.snapshot"
+DEFAULT_SNAPSHOT_PATH = os.path.join(DEFAULT_DATA_DIR, SNAPSHOT_FILE)
+
+
+class _Pickler(pickle.Pickler):
+    # mappingproxy no es picklable: se guarda como dict y se re-envuelve al cargar
+    def reducer_override(self, obj: Any) -> Any:
+        if type(obj) is MappingProxyType:
+            return mapping_proxy, (dict(obj),)
+        return NotImplemented
+
+
+def content_hash(data_dir: str = DEFAULT_DATA_DIR) -> str:
+    """sha256 de (nombre, bytes) de cada JSON de datos, en orden estable."""
+    h = hashlib.sha256()
+    for name, path in sorted(iter_data_files(data_dir)):
+        with open(path, "rb") as f:
+            raw = f.read()
+        h.update(name.encode("utf-8"))
+        h.update(len(raw).to_bytes(8, "little"))
+        h.update(raw)
+    return h.hexdigest()
+
+
+def build_snapshot(data_dir: str = DEFAULT_DATA_DIR, path: Optional[str] = None) -> Tuple[str, int]:
+    """Compila y escribe el snapshot. Devuelve (hash, bytes escritos)."""
+    path = path or os.path.join(data_dir, SNAPSHOT_FILE)
+    digest = content_hash(data_dir)
+    game_data = GameData.load(data_dir)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        pickler = _Pickler(f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickler.dump({"format": SNAPSHOT_FORMAT, "hash": digest})
+        pickler.clear_memo()  # cada pickle.load usa un Unpickler nuevo
+        pickler.dump(game_data)
+    os.replace(tmp, path)
+    return digest, os.path.getsize(path)
+
+
+def read_snapshot(path: str, expected_hash: str, data_dir: str = DEFAULT_DATA_DIR) -> Optional[GameData]:
+    """GameData del snapshot si existe y corresponde a `expected_hash`; si no, None."""
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            if not isinstance(header, dict):
+                return None
+            if header.get("format") != SNAPSHOT_FORMAT or header.get("hash") != expected_hash:
+                return None
+            game_data = pickle.load(f)
+    except Exception as e:  # snapshot corrupto / de otra versión del código
+        log.warning("Snapshot de datos ilegible (%s), se usan los JSON.", e)
+        return None
+    if not isinstance(game_data, GameData):
+        return None
+    # El contenido coincide (hash) pero el path/mtime pueden ser otros (checkout, otra carpeta)
+    for name, value in game_data.files.items():
+        if isinstance(value, PathwayIndex):
+            value.rebind(os.path.join(data_dir, name))
+    return game_data
+
+
+def load_game_data(
+    data_dir: str = DEFAULT_DATA_DIR, snapshot_path: Optional[str] = None
+) -> Tuple[GameData, str, float]:
+    """
+    Arranque: snapshot si está al día, si no JSON. Bloqueante.
+    Devuelve (game_data, origen "snapshot" | "json", ms).
+    """
+    t0 = time.perf_counter()
+    path = snapshot_path or os.path.join(data_dir, SNAPSHOT_FILE)
+    game_data = read_snapshot(path, content_hash(data_dir), data_dir)
+    source = "snapshot"
+    if game_data is None:
+        game_data = GameData.load(data_dir)
+        source = "json"
+    return game_data, source, (time.perf_counter() - t0) * 1000
+
+
+# ============================================================
+# CLI: build / bench
+# ============================================================
+def _median_ms(fn, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def bench(data_dir: str, path: str, rounds: int) -> Dict[str, float]:
+    digest = content_hash(data_dir)
+    if read_snapshot(path, digest, data_dir) is None:
+        build_snapshot(data_dir, path)
+    return {
+        "json": _median_ms(lambda: GameData.load(data_dir), rounds),
+        "hash": _median_ms(lambda: content_hash(data_dir), rounds),
+        "snapshot": _median_ms(lambda: read_snapshot(path, content_hash(data_dir), data_dir), rounds),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Snapshot precompilado de src/bot/data.")
+    parser.add_argument("accion", choices=["build", "bench"])
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--out", default=None, help=f"Ruta del snapshot (default data/{SNAPSHOT_FILE})")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    path = args.out or os.path.join(args.data_dir, SNAPSHOT_FILE)
+
+    if args.accion == "build":
+        t0 = time.perf_counter()
+        digest, size = build_snapshot(args.data_dir, path)
+        logging.info(
+            "✅ Snapshot %s (%d KB, hash %s) en %.1f ms",
+            path, size // 1024, digest[:12], (time.perf_counter() - t0) * 1000,
+        )
+        return
+
+    res = bench(args.data_dir, path, max(1, args.rounds))
+    logging.info("⏱️ Arranque de datos (mediana de %d rondas):", max(1, args.rounds))
+    logging.info("   JSON (parseo + índices): %8.2f ms", res["json"])
+    logging.info("   snapshot (hash + carga): %8.2f ms  (solo hash: %.2f ms)", res["snapshot"], res["hash"])
+    if res["snapshot"] > 0:
+        logging.info("   speedup: x%.1f", res["json"] / res["snapshot"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+# src/bot/core/dungeon.py
+"""
+Motor de mazmorras: dungeon.json (tipos de sala) -> grafo de salas por seed.
+
+Una mazmorra es un grafo por capas: `profundidad` capas, cada una con 1..`ancho_max`
+salas, y cada sala con salidas a 1-3 salas vecinas de la capa siguiente. Nada se
+materializa: el ancho de cada capa, las salidas y el contenido de la sala (capa,
+índice) -- tipo, enemigos y seed de loot -- salen de un hash estable de (seed, capa,
+índice), así que la sala se genera cuando el jugador llega (o al mostrar las
+salidas) y se vuelve a generar igual.
+
+Lo único que se guarda por corrida (`Run`, en `ch["mazmorra"]`) es el seed, el
+camino elegido (un índice por capa: la posición es el último) y un código de
+resultado por sala resuelta. Son unas decenas de bytes por corrida, en memoria y
+en el JSON del usuario, sin importar cuántas haya abiertas a la vez.
+
+Capas fijas: la entrada, la del sub jefe (mitad) y la del jefe final (última)
+tienen una sola sala de ese tipo; el resto se elige con `pesos`. Todo se puede
+ajustar con un bloque opcional "generacion" en dungeon.json (ver DEFAULT_GENERACION).
+
+Si se recarga dungeon.json con otra forma, las salas futuras de una corrida
+abierta cambian; `Run.valid` detecta caminos que ya no existen.
+"""
+from __future__ import annotations
+
+import bisect
+import hashlib
+import itertools
+import random
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from src.bot.core.loot import LootCatalog, LootResult, LootTable, new_seed
+
+DUNGEON_FILE = "dungeon.json"
+RUN_KEY = "mazmorra"
+
+DEFAULT_GENERACION: Dict[str, Any] = {
+    "profundidad": 12,
+    "ancho_max": 3,
+    "entrada": "transicion",
+    "mitad": "sub_jefe",
+    "final": "jefe_final",
+    "pesos": {
+        "combate_basico": 30,
+        "combate_elite": 8,
+        "pasillo": 10,
+        "evento": 6,
+        "trampa": 6,
+        "tesoro": 5,
+        "descanso": 5,
+        "tienda": 4,
+        "enigmas": 4,
+        "transicion": 4,
+        "bendicion": 3,
+        "curandero": 3,
+        "camara_silenciosa": 3,
+        "cofre_raro": 2,
+        "libro_oculto": 2,
+        "ritual": 2,
+        "oculta": 1,
+    },
+}
+
+# Código de resultado por sala resuelta (Run.resultados es un str, un carácter por sala)
+RESULTADOS = {"s": "superada", "h": "huida"}
+
+
+def _hash(seed: int, tag: str, d: int, i: int = 0) -> int:
+    """Entero estable (entre procesos y versiones de Python) para (seed, etiqueta, capa, índice)."""
+    return int.from_bytes(hashlib.blake2b(f"{seed}:{tag}:{d}:{i}".encode(), digest_size=8).digest(), "big")
+
+
+@dataclass(frozen=True)
+class RoomType:
+    id: str
+    descripcion: str
+    enemigos: Tuple[str, ...]
+    cmin: int
+    cmax: int
+    eventos: Tuple[str, ...]
+    recompensa: Tuple[str, ...]
+
+    @property
+    def nombre(self) -> str:
+        return self.id.replace("_", " ").capitalize()
+
+    @classmethod
+    def compile(cls, entry: Mapping[str, Any]) -> "RoomType":
+        room_id = str(entry.get("id") or "")
+        if not room_id:
+            raise ValueError(f"{DUNGEON_FILE}: sala sin 'id'")
+        enemigos = entry.get("enemigos") if isinstance(entry.get("enemigos"), dict) else {}
+        pool: Tuple[str, ...] = ()
+        lo = hi = 0
+        if enemigos.get("tiene_enemigos"):
+            pool = tuple(str(e) for e in enemigos.get("posibles_enemigos") or [])
+            try:
+                lo = int(enemigos.get("cantidad_min", 1))
+                hi = int(enemigos.get("cantidad_max", lo))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"{DUNGEON_FILE}: cantidades inválidas en {room_id} ({e})") from e
+            if not pool:
+                raise ValueError(f"{DUNGEON_FILE}: {room_id} tiene enemigos pero 'posibles_enemigos' está vacío")
+            if lo < 0 or hi < lo:
+                raise ValueError(f"{DUNGEON_FILE}: {room_id} cantidades inválidas ({lo}-{hi})")
+        return cls(
+            id=room_id,
+            descripcion=str(entry.get("descripcion") or ""),
+            enemigos=pool,
+            cmin=lo,
+            cmax=hi,
+            eventos=tuple(str(e) for e in entry.get("eventos_especiales") or []),
+            recompensa=tuple(str(r) for r in entry.get("recompensa") or []),
+        )
+
+
+@dataclass(frozen=True)
+class Room:
+    profundidad: int                       # capa, 0-based
+    indice: int                            # posición dentro de la capa
+    tipo: RoomType
+    enemigos: Tuple[Tuple[str, int], ...]  # (enemigo, cantidad), ordenado
+    salidas: Tuple[int, ...]               # índices en la capa siguiente; () en la última
+    loot_seed: int
+
+    @property
+    def final(self) -> bool:
+        return not self.salidas
+
+
+@dataclass(frozen=True)
+class DungeonRules:
+    salas: Mapping[str, RoomType]
+    profundidad: int
+    ancho_max: int
+    fijas: Mapping[int, str]              # capa -> id de sala
+    nombres: Tuple[str, ...]              # salas sorteables y sus pesos acumulados
+    acumulados: Tuple[float, ...]
+
+    @classmethod
+    def compile(cls, data: Mapping[str, Any]) -> "DungeonRules":
+        """Lanza ValueError si las salas o la generación no son válidas."""
+        salas: Dict[str, RoomType] = {}
+        for entry in data.get("salas") or []:
+            if isinstance(entry, dict):
+                room = RoomType.compile(entry)
+                if room.id in salas:
+                    raise ValueError(f"{DUNGEON_FILE}: sala repetida {room.id}")
+                salas[room.id] = room
+
+        gen = dict(DEFAULT_GENERACION)
+        if isinstance(data.get("generacion"), dict):
+            gen.update(data["generacion"])
+        try:
+            profundidad = int(gen["profundidad"])
+            ancho_max = int(gen["ancho_max"])
+            pesos = {str(k): float(v) for k, v in dict(gen["pesos"]).items()}
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"{DUNGEON_FILE}: 'generacion' inválida ({e})") from e
+        if profundidad < 3 or not 1 <= ancho_max <= 5:
+            raise ValueError(f"{DUNGEON_FILE}: se espera profundidad >= 3 y ancho_max entre 1 y 5")
+
+        fijas = {0: gen.get("entrada"), profundidad // 2: gen.get("mitad"), profundidad - 1: gen.get("final")}
+        fijas = {d: str(room_id) for d, room_id in fijas.items() if room_id}
+        for room_id in list(fijas.values()) + [k for k, w in pesos.items() if w > 0]:
+            if room_id not in salas:
+                raise ValueError(f"{DUNGEON_FILE}: 'generacion' usa una sala que no existe: {room_id}")
+
+        nombres = [k for k in pesos if pesos[k] > 0]
+        if not nombres:
+            raise ValueError(f"{DUNGEON_FILE}: 'generacion.pesos' no tiene salas con peso > 0")
+        acumulados, acc = [], 0.0
+        for name in nombres:
+            acc += pesos[name]
+            acumulados.append(acc)
+        return cls(
+            salas=MappingProxyType(salas),
+            profundidad=profundidad,
+            ancho_max=ancho_max,
+            fijas=MappingProxyType(fijas),
+            nombres=tuple(nombres),
+            acumulados=tuple(acumulados),
+        )
+
+    # ---------- grafo ----------
+    def width(self, seed: int, d: int) -> int:
+        if d < 0 or d >= self.profundidad:
+            return 0
+        if d in self.fijas:
+            return 1
+        return 1 + _hash(seed, "w", d) % self.ancho_max
+
+    def exits(self, seed: int, d: int, i: int) -> Tuple[int, ...]:
+        """Salidas de (d, i): 1-3 salas vecinas de la capa d + 1, alineando los anchos."""
+        w, wn = self.width(seed, d), self.width(seed, d + 1)
+        if wn == 0:
+            return ()
+        if wn == 1:
+            return (0,)
+        center = round(i * (wn - 1) / (w - 1)) if w > 1 else (wn - 1) // 2
+        candidates = [j for j in (center - 1, center, center + 1) if 0 <= j < wn]
+        lo = min(2, len(candidates))
+        h = _hash(seed, "x", d, i)
+        options = list(itertools.combinations(candidates, lo + h % (len(candidates) - lo + 1)))
+        return options[(h >> 8) % len(options)]
+
+    def room(self, seed: int, d: int, i: int) -> Room:
+        """Genera la sala (d, i) del grafo de `seed`; siempre igual con los mismos datos."""
+        if not 0 <= i < self.width(seed, d):
+            raise ValueError(f"no existe la sala {i} en la capa {d}")
+        rng = random.Random(_hash(seed, "s", d, i))
+        room_id = self.fijas.get(d)
+        if room_id is None:
+            r = rng.random() * self.acumulados[-1]
+            room_id = self.nombres[min(bisect.bisect_right(self.acumulados, r), len(self.nombres) - 1)]
+        tipo = self.salas[room_id]
+
+        enemigos: Dict[str, int] = {}
+        if tipo.enemigos:
+            for _ in range(rng.randint(tipo.cmin, tipo.cmax)):
+                enemy = rng.choice(tipo.enemigos)
+                enemigos[enemy] = enemigos.get(enemy, 0) + 1
+        return Room(
+            profundidad=d,
+            indice=i,
+            tipo=tipo,
+            enemigos=tuple(sorted(enemigos.items())),
+            salidas=self.exits(seed, d, i),
+            loot_seed=rng.getrandbits(63),
+        )
+
+
+def dungeon_from_files(files: Mapping[str, Any]) -> Optional[DungeonRules]:
+    data = files.get(DUNGEON_FILE)
+    return DungeonRules.compile(data) if isinstance(data, dict) else None
+
+
+def validate_dungeon(data: Any) -> None:
+    """Validación de dungeon.json al parsear (sala o generación inválida -> ValueError)."""
+    DungeonRules.compile(data)
+
+
+# ============================================================
+# Corridas
+# ============================================================
+@dataclass(frozen=True)
+class Run:
+    seed: int
+    camino: Tuple[int, ...]   # índice elegido en cada capa; el último es la sala actual
+    resultados: str = ""      # un código de RESULTADOS por sala ya resuelta
+
+    @classmethod
+    def start(cls, seed: Optional[int] = None) -> "Run":
+        return cls(new_seed() if seed is None else int(seed), (0,))
+
+    @classmethod
+    def from_dict(cls, raw: Any) -> Optional["Run"]:
+        if not isinstance(raw, dict):
+            return None
+        try:
+            camino = tuple(int(i) for i in raw.get("camino") or ())
+            run = cls(int(raw["seed"]), camino, str(raw.get("resultados", "")))
+        except (KeyError, TypeError, ValueError):
+            return None
+        return run if run.camino else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"seed": self.seed, "camino": list(self.camino), "resultados": self.resultados}
+
+    @property
+    def profundidad(self) -> int:
+        return len(self.camino) - 1
+
+    def valid(self, rules: DungeonRules) -> bool:
+        """El camino sigue existiendo en el grafo (puede dejar de existir si cambia dungeon.json)."""
+        if len(self.camino) > rules.profundidad or self.camino[0] != 0:
+            return False
+        for d in range(1, len(self.camino)):
+            if self.camino[d] not in rules.exits(self.seed, d - 1, self.camino[d - 1]):
+                return False
+        return True
+
+    def current(self, rules: DungeonRules) -> Room:
+        return rules.room(self.seed, self.profundidad, self.camino[-1])
+
+    def resolve(self, rules: DungeonRules, resultado: str, salida: Optional[int] = None) -> Tuple[Room, Optional["Run"]]:
+        """
+        Resuelve la sala actual y avanza por `salida` (índice en `Room.salidas`).
+        Devuelve (sala resuelta, corrida siguiente); None si era la sala final.
+        """
+        if resultado not in RESULTADOS:
+            raise ValueError(f"resultado inválido: {resultado}")
+        room = self.current(rules)
+        if room.final:
+            return room, None
+        salida = 0 if salida is None else int(salida)
+        if not 0 <= salida < len(room.salidas):
+            raise ValueError(f"salida inválida: elige entre 1 y {len(room.salidas)}")
+        return room, Run(self.seed, self.camino + (room.salidas[salida],), self.resultados + resultado)
+
+
+def room_loot(loot: LootCatalog, room: Room) -> Tuple[LootResult, List[str]]:
+    """
+    Loot de una sala superada: las tablas de sus enemigos y las recompensas que son
+    un loot_table_id. Devuelve además las recompensas sin tabla (se muestran como texto).
+    """
+    rolls: List[Tuple[LootTable, int]] = []
+    for enemy, n in room.enemigos:
+        table = loot.table_for_enemy(enemy)
+        if table is not None:
+            rolls.append((table, n))
+    sin_tabla: List[str] = []
+    for reward in room.tipo.recompensa:
+        table = loot.table(reward)
+        if table is not None:
+            rolls.append((table, 1))
+        else:
+            sin_tabla.append(reward)
+    return loot.roll(rolls, room.loot_seed), sin_tabla
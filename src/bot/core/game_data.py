@@ -0,0 +1,279 @@
+# src/bot/core/game_data.py
+"""
+Registro inmutable de datos de juego (src/bot/data/**.json).
+
+Se construye una sola vez (setup_hook) leyendo los JSON de datos y deja
+precalculado todo lo que antes se re-parseaba en cada llamada:
+  - `options`: nombres human-friendly en el orden del JSON (selects / carrusel),
+  - `entries`: el dict completo alineado con `options` (carrusel por índice),
+  - `by_name`: nombre normalizado (minúsculas) -> entry, lookup O(1).
+
+Nunca se muta: la recarga en caliente (services/data_watcher.py) arma un
+GameData nuevo con `with_files` y lo cambia de una vez en `bot.game_data`.
+Un comando que toma `gd = cog.game_data` al empezar ve un snapshot consistente.
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from src.bot.core.artefact_rules import ARTEFACTOS_FILE, ArtefactRules, rules_from_files
+from src.bot.core.dungeon import DUNGEON_FILE, DungeonRules, dungeon_from_files, validate_dungeon
+from src.bot.core.item_catalog import ItemCatalog, is_item_file
+from src.bot.core.leveling import NIVELES_FILE, RoleIncrements, XpCurve, build_level_ups
+from src.bot.core.loot import ENEMIGOS_FILE, LOOT_FILE, LootCatalog, validate_loot
+from src.bot.core.pathways import PathwayIndex
+from src.bot.core.text import name_key, normalize_label
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # .../src/bot
+DEFAULT_DATA_DIR = os.path.join(BOT_DIR, "data")
+
+ROL_FILE = "rol.json"
+PROFESIONES_FILE = "profesiones.json"
+PATHWAY_FILE = "pathways.json"
+
+# Subcarpetas de data/ que NO son datos de juego (persistencia de jugadores)
+IGNORED_DIRS = {"users"}
+
+# Forma mínima esperada de cada archivo conocido: (clave de bloque o None, tipo)
+DATA_SCHEMAS: Dict[str, Tuple[Optional[str], type]] = {
+    ROL_FILE: ("roles", dict),
+    PROFESIONES_FILE: ("profesiones", dict),
+    DUNGEON_FILE: ("salas", list),
+    ENEMIGOS_FILE: (None, list),
+    LOOT_FILE: (None, list),
+    "recoleccion.json": (None, list),
+    "tiendas.json": (None, list),
+    NIVELES_FILE: ("curva", dict),
+}
+
+# Catálogo del registro -> (archivo, clave de bloque)
+CATALOG_FILES: Dict[str, Tuple[str, str]] = {
+    "roles": (ROL_FILE, "roles"),
+    "profesiones": (PROFESIONES_FILE, "profesiones"),
+    "pathways": (PATHWAY_FILE, "pathways"),
+}
+
+
+def mapping_proxy(d: Dict[Any, Any]) -> Mapping[Any, Any]:
+    """Vista de solo lectura (también la usa el snapshot para reconstruir al cargar)."""
+    return MappingProxyType(d)
+
+
+def read_data_file(path: str) -> Any:
+    # utf-8-sig: los JSON de data/items vienen con BOM
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return json.load(f)
+
+
+def iter_data_files(data_dir: str) -> Iterable[Tuple[str, str]]:
+    """(nombre relativo con "/", path absoluto) de cada .json de datos, sin data/users."""
+    if not os.path.isdir(data_dir):
+        return
+    for dirpath, dirnames, filenames in os.walk(data_dir):
+        if dirpath == data_dir:
+            dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS]
+        for fn in filenames:
+            if fn.endswith(".json"):
+                path = os.path.join(dirpath, fn)
+                yield os.path.relpath(path, data_dir).replace(os.sep, "/"), path
+
+
+def validate_data_file(name: str, data: Any) -> None:
+    """Lanza ValueError si un archivo conocido no tiene la forma esperada."""
+    schema = DATA_SCHEMAS.get(name)
+    if schema is None:
+        if is_item_file(name):
+            if not isinstance(data, dict):
+                raise ValueError(f"{name}: se esperaba un objeto JSON")
+            if "items" in data and not isinstance(data["items"], (dict, list)):
+                raise ValueError(f"{name}: 'items' debe ser un objeto {{id: item}}")
+            if name == ARTEFACTOS_FILE:
+                ArtefactRules.compile(data)  # reglas que no alcanzan para generar -> ValueError
+        return
+    block_key, kind = schema
+    raw = data
+    if block_key is not None:
+        if not isinstance(data, dict):
+            raise ValueError(f"{name}: se esperaba un objeto con '{block_key}'")
+        data = data.get(block_key)
+    if not isinstance(data, kind):
+        where = f"'{block_key}'" if block_key else "la raíz"
+        raise ValueError(f"{name}: {where} debe ser {'un objeto' if kind is dict else 'una lista'}")
+    if name == NIVELES_FILE:
+        XpCurve.from_config(data)  # curva inválida -> ValueError al parsear, no al armar GameData
+    elif name == LOOT_FILE:
+        validate_loot(data)
+    elif name == DUNGEON_FILE:
+        validate_dungeon(raw)
+
+
+def parse_data_file(name: str, path: str) -> Any:
+    """
+    Contenido de un archivo de datos ya validado. pathways.json no se guarda
+    entero: queda como PathwayIndex (resúmenes + offsets, secuencias bajo demanda).
+    """
+    if name == PATHWAY_FILE:
+        return PathwayIndex.from_file(path)
+    data = read_data_file(path)
+    validate_data_file(name, data)
+    return data
+
+
+def load_data_files(data_dir: str) -> Dict[str, Any]:
+    """Lee y valida todos los JSON de datos. Bloqueante."""
+    return {name: parse_data_file(name, path) for name, path in iter_data_files(data_dir)}
+
+
+def _catalog_source(files: Mapping[str, Any], fname: str, block: str) -> Any:
+    data = files.get(fname)
+    if isinstance(data, PathwayIndex):
+        return {block: data.summaries}
+    return data
+
+
+# ============================================================
+# Catálogo de un archivo (rol.json / profesiones.json / pathways.json)
+# ============================================================
+@dataclass(frozen=True)
+class DataCatalog:
+    options: Tuple[str, ...]
+    entries: Tuple[Dict[str, Any], ...]
+    by_name: Mapping[str, Dict[str, Any]]
+
+    @classmethod
+    def build(cls, data: Any, block_key: str) -> "DataCatalog":
+        """
+        Formatos aceptados:
+        - {"roles": {"guerrero": {"nombre": "Guerrero", ...}, ...}}
+        - {"profesiones": {...}} / {"pathways": {...}}
+        - fallback: dict plano {clave: entry}
+        """
+        if not isinstance(data, dict):
+            data = {}
+        block = data.get(block_key) if block_key in data else data
+        if not isinstance(block, dict):
+            block = {}
+
+        options, entries, by_name = [], [], {}
+        for k, entry in block.items():
+            if not isinstance(entry, dict):
+                continue
+            label = normalize_label(entry.get("nombre", k))
+            key = label.lower()
+            if key in by_name:
+                continue  # mismo nombre visible dos veces: gana el primero (como el scan anterior)
+            options.append(label)
+            entries.append(entry)
+            by_name[key] = entry
+        return cls(options=tuple(options), entries=tuple(entries), by_name=MappingProxyType(by_name))
+
+    def __len__(self) -> int:
+        return len(self.options)
+
+    def get(self, display_name: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not display_name:
+            return None
+        return self.by_name.get(name_key(display_name))
+
+
+# ============================================================
+# Registro
+# ============================================================
+@dataclass(frozen=True)
+class GameData:
+    roles: DataCatalog
+    profesiones: DataCatalog
+    pathways: DataCatalog
+    items: ItemCatalog
+    # Curva de XP (niveles.json) y mejoras por nivel de cada rol, ya compiladas
+    xp_curve: XpCurve
+    level_ups: Mapping[str, RoleIncrements]
+    # Reglas de generación de artefactos (items/artefactos.json); None si no está el archivo
+    artefact_rules: Optional[ArtefactRules]
+    # Tablas de loot compiladas (loot.json + enemigos.json, item_id resueltos contra `items`)
+    loot: LootCatalog
+    # Tipos de sala y reglas de generación de mazmorras (dungeon.json); None si no está el archivo
+    dungeon: Optional[DungeonRules]
+    # Contenido parseado de cada archivo ("rol.json", "items/armas.json", ...)
+    files: Mapping[str, Any]
+
+    @classmethod
+    def from_files(cls, files: Mapping[str, Any]) -> "GameData":
+        catalogs = {
+            field: DataCatalog.build(_catalog_source(files, fname, block), block)
+            for field, (fname, block) in CATALOG_FILES.items()
+        }
+        items = ItemCatalog.build(files)
+        return cls(
+            files=MappingProxyType(dict(files)),
+            items=items,
+            xp_curve=XpCurve.from_files(files),
+            level_ups=build_level_ups(catalogs["roles"].by_name),
+            artefact_rules=rules_from_files(files),
+            loot=LootCatalog.build(files, items),
+            dungeon=dungeon_from_files(files),
+            **catalogs,
+        )
+
+    @classmethod
+    def load(cls, data_dir: str = DEFAULT_DATA_DIR) -> "GameData":
+        """Bloqueante (lee disco): llamarlo una vez al arrancar, fuera del event loop."""
+        return cls.from_files(load_data_files(data_dir))
+
+    def with_files(self, changed: Mapping[str, Any], removed: Iterable[str] = ()) -> "GameData":
+        """Copia con esos archivos reemplazados; solo se reconstruyen los catálogos afectados."""
+        files = dict(self.files)
+        files.update(changed)
+        removed = set(removed)
+        for name in removed:
+            files.pop(name, None)
+        touched = set(changed) | removed
+        catalogs = {
+            field: DataCatalog.build(_catalog_source(files, fname, block), block)
+            for field, (fname, block) in CATALOG_FILES.items()
+            if fname in touched
+        }
+        if any(is_item_file(name) for name in touched):
+            catalogs["items"] = ItemCatalog.build(files)
+        if "roles" in catalogs:
+            catalogs["level_ups"] = build_level_ups(catalogs["roles"].by_name)
+        if NIVELES_FILE in touched:
+            catalogs["xp_curve"] = XpCurve.from_files(files)
+        if ARTEFACTOS_FILE in touched:
+            catalogs["artefact_rules"] = rules_from_files(files)
+        if "items" in catalogs or touched & {LOOT_FILE, ENEMIGOS_FILE}:
+            catalogs["loot"] = LootCatalog.build(files, catalogs.get("items", self.items))
+        if DUNGEON_FILE in touched:
+            catalogs["dungeon"] = dungeon_from_files(files)
+        return replace(self, files=MappingProxyType(files), **catalogs)
+
+    def catalog(self, stage: str) -> DataCatalog:
+        """Etapa del creador de personajes: "rol" | "profesion" | "nacion"."""
+        if stage == "rol":
+            return self.roles
+        if stage == "profesion":
+            return self.profesiones
+        return self.pathways
+
+    def role(self, role_name: Optional[str]) -> Optional[Dict[str, Any]]:
+        return self.roles.get(role_name)
+
+    def role_increments(self, role_name: Optional[str]) -> RoleIncrements:
+        """mejora_atributos_por_nivel del rol, compilada al cargar (sin re-leer rol.json)."""
+        if not role_name:
+            return ()
+        return self.level_ups.get(name_key(role_name), ())
+
+    @property
+    def pathway_index(self) -> Optional[PathwayIndex]:
+        index = self.files.get(PATHWAY_FILE)
+        return index if isinstance(index, PathwayIndex) else None
+
+    def pathway_secuencias(self, pathway_name: str) -> List[Dict[str, Any]]:
+        """Secuencias 9 -> 0 de un pathway; se leen de disco la primera vez (cache acotada)."""
+        index = self.pathway_index
+        return index.secuencias(pathway_name) if index is not None else []
@@ -0,0 +1,299 @@
+# src/bot/core/inventory.py
+"""
+Listas del inventario con índice id -> posición.
+
+`inventario.<bucket>` se sigue guardando como una lista JSON de dicts con "id".
+Al primer acceso tras cargar, la lista se reemplaza en el personaje por una
+`IndexedItems` (subclase de list, se serializa igual) que mantiene un dict
+id -> posición. Buscar, agregar sin duplicar y quitar por id son O(1):
+quitar mueve el último item al hueco (el orden del inventario no se conserva).
+
+Cualquier mutación de lista que no sea append/extend invalida el índice y se
+reconstruye en la próxima búsqueda, así que nunca queda desincronizado.
+
+Vistas paginadas (`artefact_page`): por cada filtro/orden se guarda en la lista
+las posiciones ya filtradas y ordenadas, válidas hasta la próxima mutación
+(`_version`). Pasar de página solo arma las 10 filas de esa página.
+
+También vive acá `IdAllocator`: ids monótonos y únicos por proceso para items nuevos.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+MAX_VIEWS = 8
+
+
+def _item_id(item: Any) -> Optional[Any]:
+    return item.get("id") if isinstance(item, dict) else None
+
+
+class IndexedItems(list):
+    __slots__ = ("_pos", "_dups", "_version", "_views")
+
+    def __init__(self, items: Iterable[Any] = ()):
+        super().__init__(items)
+        self._pos: Optional[Dict[Any, int]] = None
+        self._dups = False
+        self._version = 0
+        # clave de vista -> (versión, posiciones filtradas y ordenadas)
+        self._views: "OrderedDict[Any, Tuple[int, List[int]]]" = OrderedDict()
+
+    def __reduce__(self):
+        # copy/pickle: se copia como lista y el índice se rehace al usarlo
+        return (IndexedItems, (list(self),))
+
+    # ---------- índice ----------
+    def _index(self) -> Dict[Any, int]:
+        pos = self._pos
+        if pos is None:
+            pos, dups = {}, False
+            for i, x in enumerate(self):
+                item_id = _item_id(x)
+                if item_id is not None:
+                    if item_id in pos:
+                        dups = True  # datos viejos con ids repetidos: gana el primero, como el scan lineal
+                        continue
+                    pos[item_id] = i
+            self._pos, self._dups = pos, dups
+        return pos
+
+    def position(self, item_id: Any) -> Optional[int]:
+        i = self._index().get(item_id)
+        if i is not None and (i >= len(self) or _item_id(self[i]) != item_id):
+            self._pos = None
+            i = self._index().get(item_id)
+        return i
+
+    def find(self, item_id: Any) -> Optional[Dict[str, Any]]:
+        i = self.position(item_id)
+        return None if i is None else self[i]
+
+    def add(self, item: Any) -> bool:
+        """Agrega si no hay otro item con el mismo id. False si ya estaba."""
+        item_id = _item_id(item)
+        if item_id is not None and self.position(item_id) is not None:
+            return False
+        self.append(item)
+        return True
+
+    def add_many(self, items: Iterable[Any]) -> int:
+        n = 0
+        for item in items:
+            n += self.add(item)
+        return n
+
+    def view(self, key: Any, build: Callable[["IndexedItems"], List[int]]) -> List[int]:
+        """Posiciones de una vista (filtro + orden), recalculadas solo si la lista cambió."""
+        cached = self._views.get(key)
+        if cached is not None and cached[0] == self._version:
+            self._views.move_to_end(key)
+            return cached[1]
+        positions = build(self)
+        self._views[key] = (self._version, positions)
+        self._views.move_to_end(key)
+        while len(self._views) > MAX_VIEWS:
+            self._views.popitem(last=False)
+        return positions
+
+    def pop_id(self, item_id: Any) -> Optional[Dict[str, Any]]:
+        """Quita por id en O(1): el último item pasa a ocupar el hueco."""
+        i = self.position(item_id)
+        if i is None:
+            return None
+        item = self[i]
+        pos = self._pos
+        assert pos is not None
+        del pos[item_id]
+        last = list.pop(self)
+        if i < len(self):
+            list.__setitem__(self, i, last)
+            last_id = _item_id(last)
+            if last_id is not None and pos.get(last_id) == len(self):
+                pos[last_id] = i
+        if self._dups:
+            self._pos = None  # otro item con el mismo id puede quedar sin indexar
+        self._version += 1
+        return item
+
+    # ---------- mutaciones de list ----------
+    def append(self, item: Any) -> None:
+        super().append(item)
+        self._version += 1
+        item_id = _item_id(item)
+        if self._pos is not None and item_id is not None:
+            if item_id in self._pos:
+                self._dups = True
+            else:
+                self._pos[item_id] = len(self) - 1
+
+    def extend(self, items: Iterable[Any]) -> None:
+        for item in items:
+            self.append(item)
+
+    def _invalidate(name: str):
+        base = getattr(list, name)
+
+        def method(self, *args, **kwargs):
+            self._pos = None
+            self._version += 1
+            return base(self, *args, **kwargs)
+
+        method.__name__ = name
+        return method
+
+    insert = _invalidate("insert")
+    remove = _invalidate("remove")
+    pop = _invalidate("pop")
+    clear = _invalidate("clear")
+    sort = _invalidate("sort")
+    reverse = _invalidate("reverse")
+    __setitem__ = _invalidate("__setitem__")
+    __delitem__ = _invalidate("__delitem__")
+    __iadd__ = _invalidate("__iadd__")
+    __imul__ = _invalidate("__imul__")
+    del _invalidate
+
+
+def indexed(parent: Dict[str, Any], key: str) -> IndexedItems:
+    """parent[key] como IndexedItems (la crea o reemplaza la lista plana una vez)."""
+    items = parent.get(key)
+    if isinstance(items, IndexedItems):
+        return items
+    items = IndexedItems(items if isinstance(items, list) else ())
+    parent[key] = items
+    return items
+
+
+def inventory_items(ch: Dict[str, Any], bucket: str) -> IndexedItems:
+    inv = ch.get("inventario")
+    if not isinstance(inv, dict):
+        inv = ch["inventario"] = {}
+    return indexed(inv, bucket)
+
+
+# ============================================================
+# Vista paginada de artefactos
+# ============================================================
+ARTEFACT_SORTS = ("rareza", "slot", "stat")
+
+
+def _main_stat(item: Dict[str, Any]) -> str:
+    main = item.get("atributo_principal")
+    return str(main.get("estadistica", "")) if isinstance(main, dict) else ""
+
+
+def _rareza(item: Dict[str, Any]) -> int:
+    try:
+        return int(item.get("rareza", 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+_SORT_KEYS: Dict[str, Callable[[Dict[str, Any]], Tuple[Any, ...]]] = {
+    "rareza": lambda a: (-_rareza(a), str(a.get("slot", "")), _main_stat(a), str(a.get("id", ""))),
+    "slot": lambda a: (str(a.get("slot", "")), -_rareza(a), _main_stat(a), str(a.get("id", ""))),
+    "stat": lambda a: (_main_stat(a), -_rareza(a), str(a.get("slot", "")), str(a.get("id", ""))),
+}
+
+
+@dataclass(frozen=True)
+class ArtefactQuery:
+    slot: Optional[str] = None
+    rareza: Optional[int] = None
+    stat: Optional[str] = None       # estadística del atributo principal
+    orden: str = "rareza"
+
+    def matches(self, item: Any) -> bool:
+        if not isinstance(item, dict):
+            return False
+        if self.slot is not None and str(item.get("slot", "")).lower() != self.slot:
+            return False
+        if self.rareza is not None and _rareza(item) != self.rareza:
+            return False
+        if self.stat is not None and _main_stat(item) != self.stat:
+            return False
+        return True
+
+    def positions(self, items: List[Any]) -> List[int]:
+        key = _SORT_KEYS.get(self.orden, _SORT_KEYS["rareza"])
+        matched = [i for i, x in enumerate(items) if self.matches(x)]
+        matched.sort(key=lambda i: key(items[i]))
+        return matched
+
+
+@dataclass(frozen=True)
+class ArtefactPage:
+    rows: List[Dict[str, Any]]
+    pagina: int       # 1-based, ya acotada
+    paginas: int
+    total: int        # artefactos que cumplen el filtro
+
+
+def artefact_page(items: IndexedItems, query: ArtefactQuery, pagina: int, por_pagina: int = 10) -> ArtefactPage:
+    positions = items.view(("artefactos", query), query.positions)
+    total = len(positions)
+    paginas = max(1, -(-total // por_pagina))
+    pagina = max(1, min(int(pagina), paginas))
+    start = (pagina - 1) * por_pagina
+    rows = [items[i] for i in positions[start:start + por_pagina]]
+    return ArtefactPage(rows, pagina, paginas, total)
+
+
+# ============================================================
+# Ids de items
+# ============================================================
+class IdAllocator:
+    """
+    `<prefijo><proceso><contador>` en hex. Dentro de un proceso los ids son únicos
+    (contador monótono). Entre procesos o reinicios lo que los separa es la parte
+    de proceso: 64 bits de os.urandom, renovados tras fork. Dos procesos chocan
+    solo si sacan el mismo valor (~n² / 2^65 para n procesos: improbable, no
+    imposible). Los ids viejos de 8 hex (uuid4) nunca chocan: los nuevos tienen al
+    menos 17.
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._process = os.urandom(8).hex()
+        self._next = 0
+
+    def next(self) -> str:
+        return self.block(1)[0]
+
+    def block(self, n: int) -> List[str]:
+        """`n` ids consecutivos reservando el rango de una vez (lotes de generate_artefacts)."""
+        n = max(0, int(n))
+        with self._lock:
+            start = self._next
+            self._next += n
+        head = f"{self.prefix}{self._process}"
+        return [f"{head}{i:x}" for i in range(start, start + n)]
+
+
+_ALLOCATORS: List[IdAllocator] = []
+
+
+def id_allocator(prefix: str) -> IdAllocator:
+    alloc = IdAllocator(prefix)
+    _ALLOCATORS.append(alloc)
+    return alloc
+
+
+def _after_fork() -> None:
+    for alloc in _ALLOCATORS:
+        alloc._lock = threading.Lock()
+        alloc._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,156 @@
+# src/bot/core/item_catalog.py
+"""
+Catálogo unificado de items (src/bot/data/items/*.json y data/items.json).
+
+Todos los archivos comparten la forma {"schema_version", "meta", "items": {id: item}}.
+Se indexa una sola vez por id y por campos de búsqueda (tipo, region, rareza,
+profesiones, tags) para que loot, tiendas y crafteo resuelvan `item_id` en O(1)
+sin recorrer los archivos. Lo construye GameData; es inmutable.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from src.bot.core.text import name_key
+
+ITEMS_DIR_PREFIX = "items/"
+LEGACY_ITEMS_FILE = "items.json"
+
+Index = Mapping[Any, Tuple[str, ...]]
+
+
+def is_item_file(name: str) -> bool:
+    return name == LEGACY_ITEMS_FILE or name.startswith(ITEMS_DIR_PREFIX)
+
+
+def _iter_items(data: Any) -> Iterable[Dict[str, Any]]:
+    block = data.get("items") if isinstance(data, dict) else None
+    if isinstance(block, dict):
+        for item_id, item in block.items():
+            if isinstance(item, dict):
+                if "id" not in item:
+                    item = {**item, "id": item_id}
+                yield item
+    elif isinstance(block, list):
+        for item in block:
+            if isinstance(item, dict) and item.get("id"):
+                yield item
+
+
+def _keys(value: Any) -> List[Any]:
+    """Claves de índice de un campo: str -> [clave], lista -> una por elemento."""
+    if value is None:
+        return []
+    values = value if isinstance(value, (list, tuple)) else [value]
+    return [name_key(v) for v in values if isinstance(v, str) and v.strip()]
+
+
+def _rareza(item: Dict[str, Any]) -> Optional[int]:
+    try:
+        return int(item.get("rareza"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _freeze(index: Dict[Any, List[str]]) -> Index:
+    return MappingProxyType({k: tuple(v) for k, v in index.items()})
+
+
+@dataclass(frozen=True)
+class ItemCatalog:
+    by_id: Mapping[str, Dict[str, Any]]
+    source: Mapping[str, str]          # item_id -> archivo de origen ("items/armas.json")
+    by_tipo: Index
+    by_region: Index
+    by_rareza: Index                   # rareza (int) -> ids
+    by_profesion: Index
+    by_tag: Index
+    duplicates: Tuple[str, ...] = ()   # ids repetidos entre archivos (gana el primero)
+
+    @classmethod
+    def build(cls, files: Mapping[str, Any]) -> "ItemCatalog":
+        by_id: Dict[str, Dict[str, Any]] = {}
+        source: Dict[str, str] = {}
+        duplicates: List[str] = []
+        idx: Dict[str, Dict[Any, List[str]]] = {k: {} for k in ("tipo", "region", "rareza", "profesion", "tag")}
+
+        for name in sorted(n for n in files if is_item_file(n)):
+            for item in _iter_items(files[name]):
+                item_id = str(item["id"])
+                if item_id in by_id:
+                    duplicates.append(item_id)
+                    continue
+                by_id[item_id] = item
+                source[item_id] = name
+
+                for key in _keys(item.get("tipo")):
+                    idx["tipo"].setdefault(key, []).append(item_id)
+                for key in _keys(item.get("region")):
+                    idx["region"].setdefault(key, []).append(item_id)
+                rareza = _rareza(item)
+                if rareza is not None:
+                    idx["rareza"].setdefault(rareza, []).append(item_id)
+                for key in _keys(item.get("profesiones")):
+                    idx["profesion"].setdefault(key, []).append(item_id)
+                for key in _keys(item.get("tags")):
+                    idx["tag"].setdefault(key, []).append(item_id)
+
+        return cls(
+            by_id=MappingProxyType(by_id),
+            source=MappingProxyType(source),
+            by_tipo=_freeze(idx["tipo"]),
+            by_region=_freeze(idx["region"]),
+            by_rareza=_freeze(idx["rareza"]),
+            by_profesion=_freeze(idx["profesion"]),
+            by_tag=_freeze(idx["tag"]),
+            duplicates=tuple(duplicates),
+        )
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self.by_id
+
+    def get(self, item_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        return self.by_id.get(item_id) if item_id else None
+
+    def require(self, item_id: str) -> Dict[str, Any]:
+        item = self.by_id.get(item_id)
+        if item is None:
+            raise KeyError(f"item_id desconocido: {item_id}")
+        return item
+
+    def find(
+        self,
+        tipo: Optional[str] = None,
+        region: Optional[str] = None,
+        rareza: Optional[int] = None,
+        profesion: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Items que cumplen TODOS los filtros dados (intersección de índices, orden de carga)."""
+        lists: List[Tuple[str, ...]] = []
+        if tipo is not None:
+            lists.append(self.by_tipo.get(name_key(tipo), ()))
+        if region is not None:
+            lists.append(self.by_region.get(name_key(region), ()))
+        if rareza is not None:
+            lists.append(self.by_rareza.get(int(rareza), ()))
+        if profesion is not None:
+            lists.append(self.by_profesion.get(name_key(profesion), ()))
+        if tag is not None:
+            lists.append(self.by_tag.get(name_key(tag), ()))
+        if not lists:
+            return list(self.by_id.values())
+
+        lists.sort(key=len)
+        ids = lists[0]
+        for other in lists[1:]:
+            keep = set(other)
+            ids = tuple(i for i in ids if i in keep)
+            if not ids:
+                break
+        return [self.by_id[i] for i in ids]
@@ -0,0 +1,162 @@
+# src/bot/core/leveling.py
+"""
+Curva de experiencia y subidas de nivel.
+
+`experiencia` del personaje es la XP total acumulada. La curva (data/niveles.json)
+se compila una vez en una tabla acumulada: cumulative[n - 1] = XP total para
+estar en nivel n. Resolver el nivel de una XP es un bisect, así que sumar un
+millón de XP cuesta lo mismo que sumar uno, aunque suba 40 niveles de golpe.
+
+Las mejoras por nivel del rol (rol.json: mejora_atributos_por_nivel) también se
+compilan al cargar GameData en tuplas (stat, valor); subir k niveles suma
+valor * k a cada stat base en un solo paso.
+"""
+from __future__ import annotations
+
+import bisect
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from src.bot.core.stats import get_stat_value, set_stat_value
+
+NIVELES_FILE = "niveles.json"
+
+# Curva por defecto si no hay niveles.json: XP para pasar de n a n+1 = base * n^exponente
+DEFAULT_CURVE: Dict[str, Any] = {"nivel_max": 100, "base": 100, "exponente": 1.5}
+
+RoleIncrements = Tuple[Tuple[str, float], ...]
+
+
+@dataclass(frozen=True)
+class XpCurve:
+    cumulative: Tuple[int, ...]  # cumulative[0] == 0 (nivel 1)
+
+    @classmethod
+    def from_config(cls, cfg: Optional[Mapping[str, Any]]) -> "XpCurve":
+        """
+        Formatos de "curva" en niveles.json:
+          - {"nivel_max": 100, "base": 100, "exponente": 1.5}
+          - {"tabla": [100, 280, ...]}  XP para pasar de nivel n a n+1 (n = 1, 2, ...)
+        Lanza ValueError si la curva no es válida.
+        """
+        try:
+            return cls._compile(dict(cfg or DEFAULT_CURVE))
+        except TypeError as e:
+            raise ValueError(f"niveles.json: curva inválida ({e})") from e
+
+    @classmethod
+    def _compile(cls, cfg: Dict[str, Any]) -> "XpCurve":
+        if "tabla" in cfg:
+            steps = cfg["tabla"]
+            if not isinstance(steps, list) or not steps:
+                raise ValueError("niveles.json: 'tabla' debe ser una lista no vacía")
+        else:
+            nivel_max = int(cfg.get("nivel_max", DEFAULT_CURVE["nivel_max"]))
+            base = float(cfg.get("base", DEFAULT_CURVE["base"]))
+            exponente = float(cfg.get("exponente", DEFAULT_CURVE["exponente"]))
+            if nivel_max < 1:
+                raise ValueError("niveles.json: 'nivel_max' debe ser >= 1")
+            steps = [round(base * n ** exponente) for n in range(1, nivel_max)]
+
+        cumulative = [0]
+        for step in steps:
+            step = int(step)
+            if step <= 0:
+                raise ValueError("niveles.json: la XP por nivel debe ser > 0")
+            cumulative.append(cumulative[-1] + step)
+        return cls(cumulative=tuple(cumulative))
+
+    @classmethod
+    def from_files(cls, files: Mapping[str, Any]) -> "XpCurve":
+        data = files.get(NIVELES_FILE)
+        return cls.from_config(data.get("curva") if isinstance(data, dict) else None)
+
+    @property
+    def nivel_max(self) -> int:
+        return len(self.cumulative)
+
+    def level_for(self, xp: int) -> int:
+        return max(1, bisect.bisect_right(self.cumulative, int(xp)))
+
+    def xp_for_level(self, nivel: int) -> int:
+        """XP total mínima para estar en `nivel` (acotado a [1, nivel_max])."""
+        return self.cumulative[max(1, min(int(nivel), self.nivel_max)) - 1]
+
+    def xp_to_next(self, xp: int, nivel: int = 1) -> Optional[int]:
+        """XP que falta para pasar del nivel actual (el mayor entre `nivel` y el de la XP); None en el máximo."""
+        nivel = max(int(nivel), self.level_for(xp))
+        if nivel >= self.nivel_max:
+            return None
+        return self.cumulative[nivel] - int(xp)
+
+
+def parse_increments(role_def: Optional[Mapping[str, Any]]) -> RoleIncrements:
+    inc = role_def.get("mejora_atributos_por_nivel") if role_def else None
+    if not isinstance(inc, dict):
+        return ()
+    out: List[Tuple[str, float]] = []
+    for k, per_level in inc.items():
+        try:
+            out.append((str(k), float(per_level)))
+        except (TypeError, ValueError):
+            continue
+    return tuple(out)
+
+
+def build_level_ups(roles_by_name: Mapping[str, Mapping[str, Any]]) -> Mapping[str, RoleIncrements]:
+    """nombre de rol normalizado -> mejoras por nivel compiladas (ver DataCatalog.by_name)."""
+    return MappingProxyType({key: parse_increments(role) for key, role in roles_by_name.items()})
+
+
+def apply_level_gain(stats: Dict[str, Any], increments: RoleIncrements, levels: int) -> None:
+    """Suma `levels` niveles de mejoras a las stats BASE de una vez (levels <= 0 no hace nada)."""
+    if levels <= 0:
+        return
+    for k, per_level in increments:
+        if k == "recurso.cantidad_maxima":
+            set_stat_value(stats, k, get_stat_value(stats, k) + per_level * levels)
+        elif isinstance(stats.get(k), dict) and "base" in stats[k]:
+            stats[k]["base"] = float(stats[k]["base"]) + per_level * levels
+
+
+@dataclass(frozen=True)
+class LevelChange:
+    nivel_antes: int
+    nivel: int
+    experiencia: int
+
+    @property
+    def niveles(self) -> int:
+        return self.nivel - self.nivel_antes
+
+
+def grant_xp(ch: Dict[str, Any], xp: int, curve: XpCurve, increments: RoleIncrements) -> LevelChange:
+    """
+    Suma XP al personaje (muta `ch`) y sube todos los niveles alcanzados.
+    Nunca baja de nivel: XP negativa solo descuenta experiencia.
+    """
+    old_level = int(ch.get("nivel", 1) or 1)
+    total = max(0, int(ch.get("experiencia", 0) or 0) + int(xp))
+    new_level = max(old_level, curve.level_for(total))
+    ch["experiencia"] = total
+    if new_level > old_level:
+        ch["nivel"] = new_level
+        apply_level_gain(ch.get("estadisticas", {}), increments, new_level - old_level)
+    return LevelChange(old_level, new_level, total)
+
+
+def set_level(ch: Dict[str, Any], nivel: int, curve: XpCurve, increments: RoleIncrements) -> LevelChange:
+    """
+    Fija el nivel (staff). Subir aplica las mejoras del rol; bajar no las quita.
+    La XP se acomoda al rango del nivel nuevo para que la próxima XP no lo revierta.
+    """
+    old_level = int(ch.get("nivel", 1) or 1)
+    new_level = max(1, min(int(nivel), curve.nivel_max))
+    xp = int(ch.get("experiencia", 0) or 0)
+    if curve.level_for(xp) != new_level:
+        xp = curve.xp_for_level(new_level)
+    ch["nivel"] = new_level
+    ch["experiencia"] = xp
+    apply_level_gain(ch.get("estadisticas", {}), increments, new_level - old_level)
+    return LevelChange(old_level, new_level, xp)
@@ -0,0 +1,247 @@
+# src/bot/core/loadout.py
+"""
+Optimizador de equipo: la mejor combinación de un artefacto por slot
+(caliz, moneda, arma_artefacto, baston) más arma_principal para un objetivo.
+
+Con la fórmula de compute_stats cada stat total es (base + Σplano) · (1 + Σ%),
+creciente en cada bono mientras base + Σplano ≥ 0 y 1 + Σ% ≥ 0 (siempre con los
+artefactos del generador). Eso permite:
+  1. Reducir cada item a un vector con solo los bonos que importan al objetivo
+     (ataque plano / ataque %, ...).
+  2. Eliminar dominados por slot: si otro item del mismo slot es ≥ en todas las
+     componentes, el dominado nunca puede estar en un óptimo (frontera de Pareto).
+  3. Branch and bound: recorrer los slots en profundidad y cortar una rama si,
+     sumando a lo elegido el máximo de cada componente en los slots que faltan,
+     la cota optimista no supera la mejor combinación encontrada.
+El valor final se recalcula con compute_stats sobre el equipo propuesto.
+
+Es CPU puro y bloqueante: el cog lo corre con asyncio.to_thread sobre
+`loadout_snapshot(ch)` (copias de lo que lee), nunca sobre el personaje vivo.
+"""
+from __future__ import annotations
+
+import copy
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from src.bot.core.stats import ARTEFACT_SLOTS, WEAPON_SOURCE, collect_item_bonuses, compute_stats, get_stat_value
+
+LOADOUT_SLOTS: Tuple[str, ...] = (WEAPON_SOURCE,) + ARTEFACT_SLOTS
+
+Vector = Tuple[float, ...]
+
+
+@dataclass(frozen=True)
+class Objective:
+    nombre: str
+    descripcion: str
+    stats: Tuple[str, ...]
+    # totales de `stats` -> puntaje; debe crecer con cada stat
+    score: Callable[[Dict[str, float]], float]
+
+
+OBJECTIVES: Dict[str, Objective] = {
+    o.nombre: o
+    for o in (
+        Objective("ataque", "Ataque total", ("ataque",), lambda t: t["ataque"]),
+        Objective("poder_magico", "Poder mágico total", ("poder_magico",), lambda t: t["poder_magico"]),
+        Objective("vida", "Vida total", ("vida",), lambda t: t["vida"]),
+        Objective(
+            "vida_efectiva",
+            "Vida efectiva física: vida × (1 + armadura / 100)",
+            ("vida", "armadura"),
+            lambda t: t["vida"] * (1.0 + t["armadura"] / 100.0),
+        ),
+        Objective(
+            "vida_efectiva_magica",
+            "Vida efectiva mágica: vida × (1 + resistencia_magica / 100)",
+            ("vida", "resistencia_magica"),
+            lambda t: t["vida"] * (1.0 + t["resistencia_magica"] / 100.0),
+        ),
+    )
+}
+
+
+@dataclass
+class Candidate:
+    vector: Vector
+    item: Optional[Dict[str, Any]]
+    origen: str  # "equipado" | "inventario" | "vacio"
+
+
+@dataclass
+class LoadoutResult:
+    objetivo: str
+    valor: float
+    valor_actual: float
+    loadout: Dict[str, Optional[Dict[str, Any]]]
+    cambios: Dict[str, Optional[Dict[str, Any]]]  # solo los slots que difieren del equipo actual
+    candidatos: int
+    tras_poda: int
+    nodos: int
+    ms: float
+    totales: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def mejora(self) -> float:
+        return self.valor - self.valor_actual
+
+
+def loadout_snapshot(character: Dict[str, Any]) -> Dict[str, Any]:
+    """Copia de lo que lee el optimizador, para usarla fuera del event loop."""
+    equip = character.get("equipamiento") or {}
+    inv = character.get("inventario") or {}
+    return {
+        "estadisticas": copy.deepcopy(character.get("estadisticas") or {}),
+        "equipamiento": {
+            "arma_principal": equip.get("arma_principal"),
+            "artefactos": dict(equip.get("artefactos") or {}),
+        },
+        "inventario": {
+            "artefactos": list(inv.get("artefactos") or []),
+            "armas": list(inv.get("armas") or []),
+        },
+    }
+
+
+def _vector(item: Optional[Dict[str, Any]], stats: Sequence[str]) -> Vector:
+    if item is None:
+        return (0.0,) * (2 * len(stats))
+    flat, pct = collect_item_bonuses(item)
+    out: List[float] = []
+    for s in stats:
+        out.append(float(flat.get(s, 0.0)))
+        out.append(float(pct.get(s, 0.0)))
+    return tuple(out)
+
+
+def _totals(base: Sequence[float], vec: Sequence[float], stats: Sequence[str]) -> Dict[str, float]:
+    # Mismos pasos que compute_stats: base + plano, adicionales = base_calc * %, total = base_calc + adicionales
+    out: Dict[str, float] = {}
+    for i, s in enumerate(stats):
+        computed_base = base[i] + vec[2 * i]
+        out[s] = computed_base + computed_base * vec[2 * i + 1]
+    return out
+
+
+def _add(a: Vector, b: Vector) -> Vector:
+    return tuple(x + y for x, y in zip(a, b))
+
+
+def _candidates(character: Dict[str, Any], stats: Sequence[str]) -> Dict[str, List[Candidate]]:
+    equip = character.get("equipamiento") or {}
+    arts = equip.get("artefactos") or {}
+    inv = character.get("inventario") or {}
+
+    out: Dict[str, List[Candidate]] = {slot: [] for slot in LOADOUT_SLOTS}
+    current = {WEAPON_SOURCE: equip.get("arma_principal"), **{s: arts.get(s) for s in ARTEFACT_SLOTS}}
+    # El equipado va primero: ante vectores iguales se conserva (menos cambios)
+    for slot, item in current.items():
+        if isinstance(item, dict):
+            out[slot].append(Candidate(_vector(item, stats), item, "equipado"))
+    for item in inv.get("artefactos") or []:
+        if isinstance(item, dict):
+            slot = str(item.get("slot", "")).lower()
+            if slot in ARTEFACT_SLOTS:
+                out[slot].append(Candidate(_vector(item, stats), item, "inventario"))
+    for item in inv.get("armas") or []:
+        if isinstance(item, dict):
+            out[WEAPON_SOURCE].append(Candidate(_vector(item, stats), item, "inventario"))
+    for slot in LOADOUT_SLOTS:
+        out[slot].append(Candidate(_vector(None, stats), None, "vacio"))
+    return out
+
+
+def _pareto(cands: List[Candidate]) -> List[Candidate]:
+    """Quita los dominados (≤ en todo que otro). Ante empates gana el primero de la lista."""
+    kept: List[Candidate] = []
+    for c in cands:
+        if any(all(k >= v for k, v in zip(other.vector, c.vector)) for other in kept):
+            continue
+        kept = [o for o in kept if not all(v >= k for k, v in zip(o.vector, c.vector))]
+        kept.append(c)
+    return kept
+
+
+def optimize_loadout(character: Dict[str, Any], objetivo: str) -> LoadoutResult:
+    """Mejor equipo para `objetivo` (clave de OBJECTIVES). Bloqueante: usar desde un hilo."""
+    t0 = time.perf_counter()
+    obj = OBJECTIVES[objetivo]
+    stats = obj.stats
+    st = character["estadisticas"]
+    base = [get_stat_value(st, s) for s in stats]
+
+    def score(vec: Vector) -> float:
+        return obj.score(_totals(base, vec, stats))
+
+    cands = _candidates(character, stats)
+    n_total = sum(len(c) for c in cands.values())
+    per_slot: List[List[Candidate]] = []
+    for slot in LOADOUT_SLOTS:
+        pruned = _pareto(cands[slot])
+        # Mejores primero: la primera hoja ya es buena y corta más ramas
+        pruned.sort(key=lambda c: score(c.vector), reverse=True)
+        per_slot.append(pruned)
+
+    # Cota optimista de los slots que faltan: máximo por componente, acumulado desde el final
+    width = 2 * len(stats)
+    suffix: List[Vector] = [(0.0,) * width] * (len(per_slot) + 1)
+    for i in range(len(per_slot) - 1, -1, -1):
+        best_here = tuple(max(c.vector[j] for c in per_slot[i]) for j in range(width))
+        suffix[i] = _add(suffix[i + 1], best_here)
+
+    current = [next((c for c in cands[slot] if c.origen == "equipado"), cands[slot][-1]) for slot in LOADOUT_SLOTS]
+    current_vec: Vector = (0.0,) * width
+    for c in current:
+        current_vec = _add(current_vec, c.vector)
+    valor_actual = score(current_vec)
+
+    best_val = valor_actual
+    best_pick: List[Candidate] = list(current)
+    picks: List[Candidate] = []
+    nodes = 0
+
+    def dfs(i: int, acc: Vector) -> None:
+        nonlocal best_val, best_pick, nodes
+        nodes += 1
+        if i == len(per_slot):
+            val = score(acc)
+            if val > best_val:
+                best_val, best_pick = val, list(picks)
+            return
+        if score(_add(acc, suffix[i])) <= best_val:
+            return
+        for c in per_slot[i]:
+            picks.append(c)
+            dfs(i + 1, _add(acc, c.vector))
+            picks.pop()
+
+    dfs(0, (0.0,) * width)
+
+    loadout = {slot: c.item for slot, c in zip(LOADOUT_SLOTS, best_pick)}
+    cambios = {
+        slot: c.item for slot, c, cur in zip(LOADOUT_SLOTS, best_pick, current) if c.item is not cur.item
+    }
+    # Verificación con la fórmula real
+    preview = {
+        "estadisticas": st,
+        "equipamiento": {
+            "arma_principal": loadout[WEAPON_SOURCE],
+            "artefactos": {s: loadout[s] for s in ARTEFACT_SLOTS},
+        },
+    }
+    total = compute_stats(preview)["total"]
+    totals = {s: total.get(s, 0.0) for s in stats}
+    return LoadoutResult(
+        objetivo=objetivo,
+        valor=obj.score(totals),
+        valor_actual=valor_actual,
+        loadout=loadout,
+        cambios=cambios,
+        candidatos=n_total,
+        tras_poda=sum(len(p) for p in per_slot),
+        nodos=nodes,
+        ms=(time.perf_counter() - t0) * 1000,
+        totales=totals,
+    )
@@ -0,0 +1,198 @@
+# src/bot/core/loot.py
+"""
+Motor de loot: loot.json (tablas de drops) + enemigos.json (loot_table_id).
+
+Cada tabla se compila una vez al cargar GameData en arreglos paralelos
+(item_id, probabilidad, cantidad_min, cantidad_max, log(1 - p)). Los drops son
+independientes: en cada tirada cada drop sale con su probabilidad.
+
+Tirar una tabla N veces (p.ej. limpiar 40 enemigos) no recorre N tiradas: para
+cada drop se salta directo a la próxima tirada exitosa con una geométrica
+(log(u) / log(1 - p)), así el costo es proporcional a los drops que salen y no a N.
+Las cantidades se suman por item y el resultado son pilas agregadas
+{item_id: cantidad}, listas para core/stacks.plan_add.
+
+Todo sale de un random.Random(seed): con el mismo seed y los mismos datos el
+resultado es idéntico (se puede re-tirar para auditar). Es Python puro a propósito:
+con numpy opcional el mismo seed daría otro resultado según el entorno.
+"""
+from __future__ import annotations
+
+import math
+import random
+import secrets
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from src.bot.core.item_catalog import ItemCatalog
+from src.bot.core.text import name_key
+
+LOOT_FILE = "loot.json"
+ENEMIGOS_FILE = "enemigos.json"
+
+
+@dataclass(frozen=True)
+class LootTable:
+    id: str
+    item_ids: Tuple[str, ...]
+    probs: Tuple[float, ...]
+    cmin: Tuple[int, ...]
+    cmax: Tuple[int, ...]
+    log_q: Tuple[float, ...]   # log(1 - p); solo se usa con 0 < p < 1
+
+    @classmethod
+    def compile(cls, entry: Mapping[str, Any]) -> "LootTable":
+        """Lanza ValueError si la tabla no es válida."""
+        table_id = str(entry.get("id") or "")
+        if not table_id:
+            raise ValueError(f"{LOOT_FILE}: tabla sin 'id'")
+        drops = entry.get("drops")
+        if not isinstance(drops, list):
+            raise ValueError(f"{LOOT_FILE}: {table_id} sin lista 'drops'")
+        ids: List[str] = []
+        probs: List[float] = []
+        cmin: List[int] = []
+        cmax: List[int] = []
+        for d in drops:
+            try:
+                item_id = str(d["item_id"])
+                p = float(d.get("probabilidad", 1.0))
+                lo = int(d.get("cantidad_min", 1))
+                hi = int(d.get("cantidad_max", lo))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"{LOOT_FILE}: drop inválido en {table_id} ({e})") from e
+            if not 0.0 <= p <= 1.0:
+                raise ValueError(f"{LOOT_FILE}: {table_id}/{item_id} probabilidad fuera de [0, 1]")
+            if lo < 0 or hi < lo:
+                raise ValueError(f"{LOOT_FILE}: {table_id}/{item_id} cantidades inválidas ({lo}-{hi})")
+            ids.append(item_id)
+            probs.append(p)
+            cmin.append(lo)
+            cmax.append(hi)
+        log_q = tuple(math.log1p(-p) if 0.0 < p < 1.0 else 0.0 for p in probs)
+        return cls(table_id, tuple(ids), tuple(probs), tuple(cmin), tuple(cmax), log_q)
+
+    def expected(self) -> Dict[str, float]:
+        """Cantidad esperada por tirada de cada item."""
+        out: Dict[str, float] = {}
+        for item_id, p, lo, hi in zip(self.item_ids, self.probs, self.cmin, self.cmax):
+            out[item_id] = out.get(item_id, 0.0) + p * (lo + hi) / 2
+        return out
+
+    def roll_into(self, rng: random.Random, n: int, out: Dict[str, int]) -> None:
+        """Suma a `out` el resultado de tirar la tabla `n` veces."""
+        rand = rng.random
+        for item_id, p, lo, hi, log_q in zip(self.item_ids, self.probs, self.cmin, self.cmax, self.log_q):
+            if p <= 0.0 or n <= 0:
+                continue
+            if p >= 1.0:
+                hits = n
+            else:
+                # Tiradas hasta el próximo éxito ~ geométrica: saltamos los fracasos de una
+                hits, pos = 0, -1
+                while True:
+                    pos += 1 + int(math.log(1.0 - rand()) / log_q)
+                    if pos >= n:
+                        break
+                    hits += 1
+            if not hits:
+                continue
+            total = hits * lo
+            span = hi - lo + 1
+            if span > 1:
+                for _ in range(hits):
+                    total += int(rand() * span)
+            if total:
+                out[item_id] = out.get(item_id, 0) + total
+
+
+@dataclass
+class LootResult:
+    seed: int
+    tiradas: int
+    stacks: Dict[str, int] = field(default_factory=dict)        # items del catálogo
+    sin_catalogo: Dict[str, int] = field(default_factory=dict)  # item_id que no está en data/items
+
+
+def new_seed() -> int:
+    return secrets.randbits(63)
+
+
+@dataclass(frozen=True)
+class LootCatalog:
+    tables: Mapping[str, LootTable]
+    enemy_tables: Mapping[str, str]       # id o nombre normalizado del enemigo -> loot_table_id
+    unresolved: Tuple[str, ...]           # item_id de las tablas que no están en el catálogo
+
+    @classmethod
+    def build(cls, files: Mapping[str, Any], items: ItemCatalog) -> "LootCatalog":
+        tables: Dict[str, LootTable] = {}
+        raw = files.get(LOOT_FILE)
+        for entry in raw if isinstance(raw, list) else []:
+            if isinstance(entry, dict):
+                table = LootTable.compile(entry)
+                tables.setdefault(table.id, table)
+
+        enemy_tables: Dict[str, str] = {}
+        raw = files.get(ENEMIGOS_FILE)
+        for enemy in raw if isinstance(raw, list) else []:
+            if not isinstance(enemy, dict) or not enemy.get("loot_table_id"):
+                continue
+            table_id = str(enemy["loot_table_id"])
+            for key in (enemy.get("id"), enemy.get("nombre")):
+                if isinstance(key, str) and key.strip():
+                    enemy_tables.setdefault(name_key(key), table_id)
+
+        unresolved = sorted({i for t in tables.values() for i in t.item_ids if i not in items})
+        return cls(MappingProxyType(tables), MappingProxyType(enemy_tables), tuple(unresolved))
+
+    def table(self, table_id: str) -> Optional[LootTable]:
+        return self.tables.get(table_id)
+
+    def table_for_enemy(self, enemy: str) -> Optional[LootTable]:
+        table_id = self.enemy_tables.get(name_key(enemy))
+        return self.tables.get(table_id) if table_id else None
+
+    def resolve(self, name: str) -> Optional[LootTable]:
+        """Id de tabla, o id / nombre de enemigo."""
+        return self.table(name) or self.table_for_enemy(name)
+
+    def roll(self, rolls: Iterable[Tuple[LootTable, int]], seed: Optional[int] = None) -> LootResult:
+        """
+        Tira cada (tabla, veces) con un solo RNG y agrega todo en pilas.
+        El orden de `rolls` forma parte del resultado: mismo orden + mismo seed = mismo loot.
+        """
+        seed = new_seed() if seed is None else int(seed)
+        rng = random.Random(seed)
+        raw: Dict[str, int] = {}
+        total = 0
+        for table, n in rolls:
+            n = max(0, int(n))
+            table.roll_into(rng, n, raw)
+            total += n
+        result = LootResult(seed=seed, tiradas=total)
+        for item_id, cantidad in raw.items():
+            target = result.sin_catalogo if item_id in self.unresolved else result.stacks
+            target[item_id] = cantidad
+        return result
+
+    def roll_table(self, table_id: str, n: int = 1, seed: Optional[int] = None) -> LootResult:
+        table = self.tables[table_id]
+        return self.roll([(table, n)], seed)
+
+    def roll_enemies(self, kills: Mapping[str, int], seed: Optional[int] = None) -> LootResult:
+        """Loot de un combate/limpieza: {enemigo: cantidad}. Enemigos sin tabla no dan nada."""
+        rolls = []
+        for enemy in sorted(kills):
+            table = self.table_for_enemy(enemy)
+            if table is not None:
+                rolls.append((table, kills[enemy]))
+        return self.roll(rolls, seed)
+
+
+def validate_loot(data: Any) -> None:
+    """Validación de loot.json al parsear (tabla inválida -> ValueError)."""
+    for entry in data:
+        if isinstance(entry, dict):
+            LootTable.compile(entry)
@@ -0,0 +1,195 @@
+# src/bot/core/pathways.py
+"""
+Carga perezosa de pathways.json.
+
+Crear personajes solo necesita nombre/descripcion/imagen, pero cada pathway trae
+sus `secuencias` completas (niveles 9 -> 0 con habilidades largas). Al indexar se
+recorre el archivo una vez con `raw_decode` guardando, por pathway:
+  - un resumen con los campos escalares (nombre, descripcion, imagen, ...),
+  - el rango de bytes [inicio, fin) de su objeto JSON en disco.
+Las secciones grandes (`secuencias` y cualquier lista/objeto) se leen de disco
+solo cuando alguien las pide, y pasan por una cache LRU acotada. Así la memoria
+residente depende del tamaño de los resúmenes, no del lore.
+"""
+from __future__ import annotations
+
+import codecs
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from src.bot.core.text import name_key
+
+DEFAULT_SECTION_CACHE = 4  # pathways materializados a la vez
+
+_WS = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+# (st_mtime_ns, st_size) del archivo indexado
+Signature = Tuple[int, int]
+
+
+def _skip_ws(text: str, i: int) -> int:
+    return _WS.match(text, i).end()
+
+
+def _expect(text: str, i: int, ch: str) -> int:
+    if i >= len(text) or text[i] != ch:
+        raise ValueError(f"pathways.json: se esperaba '{ch}' en la posición {i}")
+    return i + 1
+
+
+def _walk_object(text: str, i: int, visit: Callable[[str, int], int]) -> int:
+    """Recorre el objeto JSON que empieza en `i`; visit(clave, inicio_valor) devuelve el fin del valor."""
+    i = _skip_ws(text, _expect(text, i, "{"))
+    if text[i:i + 1] == "}":
+        return i + 1
+    while True:
+        key, i = _DECODER.raw_decode(text, i)
+        if not isinstance(key, str):
+            raise ValueError(f"pathways.json: clave inválida en la posición {i}")
+        i = _skip_ws(text, _expect(text, _skip_ws(text, i), ":"))
+        i = _skip_ws(text, visit(key, i))
+        if text[i:i + 1] == ",":
+            i = _skip_ws(text, i + 1)
+            continue
+        return _expect(text, i, "}")
+
+
+class PathwayIndex:
+    """Resúmenes en memoria + offsets en disco de cada pathway."""
+
+    def __init__(
+        self,
+        path: str,
+        signature: Signature,
+        summaries: "OrderedDict[str, Dict[str, Any]]",
+        spans: Dict[str, Tuple[int, int]],
+        cache_size: int = DEFAULT_SECTION_CACHE,
+    ):
+        self.path = path
+        self.signature = signature
+        self.summaries: Mapping[str, Dict[str, Any]] = summaries
+        self._spans = spans
+        self._keys_by_name = {name_key(s.get("nombre", k)): k for k, s in summaries.items()}
+        for k in summaries:
+            self._keys_by_name.setdefault(name_key(k), k)
+        self.cache_size = max(1, int(cache_size))
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # La cache no viaja en el snapshot (core/data_snapshot.py)
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_cache"] = OrderedDict()
+        state["hits"] = state["misses"] = 0
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.summaries)
+
+    @classmethod
+    def from_file(cls, path: str, cache_size: int = DEFAULT_SECTION_CACHE) -> "PathwayIndex":
+        """Indexa el archivo (bloqueante). Lanza ValueError si no tiene {"pathways": {...}}."""
+        st = os.stat(path)
+        with open(path, "rb") as f:
+            raw = f.read()
+        bom = len(codecs.BOM_UTF8) if raw.startswith(codecs.BOM_UTF8) else 0
+        text = raw[bom:].decode("utf-8")
+
+        summaries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        spans: Dict[str, Tuple[int, int]] = {}
+        found = False
+        # offsets de caracteres -> bytes, avanzando incrementalmente
+        char_pos, byte_pos = 0, bom
+
+        def to_bytes(ci: int) -> int:
+            nonlocal char_pos, byte_pos
+            byte_pos += len(text[char_pos:ci].encode("utf-8"))
+            char_pos = ci
+            return byte_pos
+
+        def visit_pathway(pw_key: str, j: int) -> int:
+            entry, end = _DECODER.raw_decode(text, j)
+            if isinstance(entry, dict):
+                summaries[pw_key] = {k: v for k, v in entry.items() if not isinstance(v, (dict, list))}
+                spans[pw_key] = (to_bytes(j), to_bytes(end))
+            return end
+
+        def visit_top(key: str, j: int) -> int:
+            nonlocal found
+            if key == "pathways" and text[j:j + 1] == "{":
+                found = True
+                return _walk_object(text, j, visit_pathway)
+            return _DECODER.raw_decode(text, j)[1]
+
+        _walk_object(text, _skip_ws(text, 0), visit_top)
+
+        if not found:
+            raise ValueError("pathways.json: se esperaba un objeto con 'pathways'")
+        return cls(path, (st.st_mtime_ns, st.st_size), summaries, spans, cache_size)
+
+    def rebind(self, path: str) -> None:
+        """Apunta a `path` con su firma actual. Solo si el contenido es idéntico (mismo hash)."""
+        st = os.stat(path)
+        self.path = path
+        self.signature = (st.st_mtime_ns, st.st_size)
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Clave del pathway a partir del nombre visible o la clave."""
+        if name in self._spans:
+            return name
+        return self._keys_by_name.get(name_key(name))
+
+    def _read_entry(self, key: str) -> Dict[str, Any]:
+        st = os.stat(self.path)
+        if (st.st_mtime_ns, st.st_size) != self.signature:
+            # El archivo cambió y el watcher aún no re-indexó: leerlo entero es lento pero correcto
+            with open(self.path, "r", encoding="utf-8-sig") as f:
+                entry = (json.load(f).get("pathways") or {}).get(key)
+            return entry if isinstance(entry, dict) else {}
+        start, end = self._spans[key]
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return json.loads(f.read(end - start).decode("utf-8"))
+
+    def entry(self, name: str) -> Optional[Dict[str, Any]]:
+        """Pathway completo (con secuencias), materializado bajo demanda y cacheado."""
+        key = self.resolve(name)
+        if key is None:
+            return None
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return cached
+        entry = self._read_entry(key)
+        with self._lock:
+            self.misses += 1
+            self._cache[key] = entry
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return entry
+
+    def section(self, name: str, section: str) -> Any:
+        entry = self.entry(name)
+        return entry.get(section) if entry else None
+
+    def secuencias(self, name: str) -> List[Dict[str, Any]]:
+        seq = self.section(name, "secuencias")
+        return seq if isinstance(seq, list) else []
+
+    def stats(self) -> Dict[str, int]:
+        return {"pathways": len(self.summaries), "materializados": len(self._cache), "hits": self.hits, "misses": self.misses}
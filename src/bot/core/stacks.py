@@ -0,0 +1,201 @@
+# src/bot/core/stacks.py
+"""
+Inventario apilable: materiales, consumibles, papiros y recetas.
+
+Los items con `stack.apilable` se guardan como {item_id: cantidad} en
+`inventario.<bucket>`: 5000 menas de hierro son una entrada, no 5000 dicts.
+`max_stack` es el tamaño de cada pila; una cantidad mayor ocupa varias pilas
+(`pilas(cantidad, max_stack)`) y `max_pilas` permite acotar cuántas entran.
+
+Los personajes viejos tienen listas de dicts en esos buckets: se leen como
+conteos (`stack_counts`) y se convierten en el lugar con la primera op que los toca.
+
+Como el resto de las mutaciones, altas y bajas se calculan sin tocar el personaje
+(`plan_add` / `plan_remove`) y se registran con `op_set_stacks` (cantidades
+finales, no deltas: el replay del journal es idempotente).
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from src.bot.core.item_catalog import ItemCatalog
+
+STACK_BUCKETS = ("materiales", "consumibles", "papiros", "recetas")
+
+# Si el archivo de origen no dice el bucket (items.json legado), se usa el tipo
+_BUCKET_BY_TIPO = {"material": "materiales", "consumible": "consumibles", "papiro": "papiros", "receta": "recetas"}
+
+Counts = Dict[str, int]
+
+
+@dataclass(frozen=True)
+class StackRule:
+    bucket: str
+    max_stack: int
+
+
+def stack_rule(catalog: ItemCatalog, item_id: str) -> Optional[StackRule]:
+    """Regla de apilado del item; None si no existe o no es apilable."""
+    item = catalog.get(item_id)
+    if item is None:
+        return None
+    stack = item.get("stack") if isinstance(item.get("stack"), dict) else {}
+    if not stack.get("apilable"):
+        return None
+    source = catalog.source.get(item_id, "")
+    bucket = os.path.splitext(os.path.basename(source))[0]
+    if bucket not in STACK_BUCKETS:
+        bucket = _BUCKET_BY_TIPO.get(str(item.get("tipo", "")).strip().lower(), "")
+    if not bucket:
+        return None
+    try:
+        max_stack = max(1, int(stack.get("max_stack", 1)))
+    except (TypeError, ValueError):
+        max_stack = 1
+    return StackRule(bucket, max_stack)
+
+
+def pilas(cantidad: int, max_stack: int) -> int:
+    return -(-max(0, int(cantidad)) // max(1, int(max_stack)))
+
+
+def split_stacks(cantidad: int, max_stack: int) -> List[int]:
+    """Pilas para mostrar: [999, 999, ..., resto]."""
+    full, rest = divmod(max(0, int(cantidad)), max(1, int(max_stack)))
+    return [max_stack] * full + ([rest] if rest else [])
+
+
+def counts_from_legacy(items: Iterable[Any]) -> Counts:
+    """Lista vieja (un dict o id por unidad, con "cantidad" opcional) -> conteos."""
+    out: Counts = {}
+    for x in items:
+        if isinstance(x, str):
+            item_id, n = x, 1
+        elif isinstance(x, dict):
+            item_id = x.get("item_id") or x.get("id")
+            try:
+                n = int(x.get("cantidad", 1))
+            except (TypeError, ValueError):
+                n = 1
+        else:
+            continue
+        if item_id and n > 0:
+            out[str(item_id)] = out.get(str(item_id), 0) + n
+    return out
+
+
+def normalize_counts(parent: Dict[str, Any], bucket: str) -> Counts:
+    """parent[bucket] como {item_id: cantidad}, convirtiendo en el lugar una lista vieja."""
+    value = parent.get(bucket)
+    if isinstance(value, dict):
+        return value
+    counts = counts_from_legacy(value) if isinstance(value, list) else {}
+    parent[bucket] = counts
+    return counts
+
+
+def stack_counts(ch: Dict[str, Any], bucket: str) -> Mapping[str, int]:
+    """Solo lectura: los conteos del bucket (una lista vieja se convierte sin tocar `ch`)."""
+    inv = ch.get("inventario")
+    value = inv.get(bucket) if isinstance(inv, dict) else None
+    if isinstance(value, dict):
+        return value
+    return counts_from_legacy(value) if isinstance(value, list) else {}
+
+
+# ============================================================
+# Altas / bajas en lote
+# ============================================================
+@dataclass
+class StackChange:
+    # bucket -> {item_id: cantidad final} (0 = se borra la entrada)
+    finales: Dict[str, Counts] = field(default_factory=dict)
+    aplicados: Counts = field(default_factory=dict)
+    # item_id -> motivo ("desconocido", "no apilable", "sin espacio", "faltan N")
+    rechazados: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.rechazados
+
+
+def _used_stacks(counts: Mapping[str, int], catalog: ItemCatalog) -> int:
+    total = 0
+    for item_id, n in counts.items():
+        rule = stack_rule(catalog, item_id)
+        total += pilas(n, rule.max_stack if rule else 1)
+    return total
+
+
+def _bucket(ch: Dict[str, Any], bucket: str, cache: Dict[str, Mapping[str, int]]) -> Mapping[str, int]:
+    if bucket not in cache:
+        cache[bucket] = stack_counts(ch, bucket)
+    return cache[bucket]
+
+
+def _merge(adds: Iterable[Tuple[str, int]]) -> Counts:
+    out: Counts = {}
+    for item_id, n in adds:
+        n = int(n)
+        if n > 0:
+            out[str(item_id)] = out.get(str(item_id), 0) + n
+    return out
+
+
+def plan_add(
+    ch: Dict[str, Any],
+    catalog: ItemCatalog,
+    adds: Mapping[str, int],
+    max_pilas: Optional[int] = None,
+) -> StackChange:
+    """
+    Suma muchas cantidades a la vez (no muta `ch`). Con `max_pilas` (por bucket)
+    entra lo que quepa y el resto queda en `rechazados` como "sin espacio".
+    """
+    change = StackChange()
+    cache: Dict[str, Mapping[str, int]] = {}
+    used: Dict[str, int] = {}
+    for item_id, n in _merge(adds.items()).items():
+        rule = stack_rule(catalog, item_id)
+        if rule is None:
+            change.rechazados[item_id] = "desconocido" if catalog.get(item_id) is None else "no apilable"
+            continue
+        counts = _bucket(ch, rule.bucket, cache)
+        finales = change.finales.setdefault(rule.bucket, {})
+        current = finales.get(item_id, counts.get(item_id, 0))
+        total = current + n
+        if max_pilas is not None:
+            if rule.bucket not in used:
+                used[rule.bucket] = _used_stacks(counts, catalog)
+            # pilas libres del bucket + las que ya ocupa este item
+            libres = max_pilas - used[rule.bucket] + pilas(current, rule.max_stack)
+            total = min(total, max(current, libres * rule.max_stack))
+            used[rule.bucket] += pilas(total, rule.max_stack) - pilas(current, rule.max_stack)
+            if total < current + n:
+                change.rechazados[item_id] = "sin espacio"
+        if total > current:
+            finales[item_id] = total
+            change.aplicados[item_id] = change.aplicados.get(item_id, 0) + total - current
+    return change
+
+
+def plan_remove(ch: Dict[str, Any], catalog: ItemCatalog, removes: Mapping[str, int]) -> StackChange:
+    """Resta muchas cantidades a la vez; todo o nada (si falta algo no se quita nada)."""
+    change = StackChange()
+    cache: Dict[str, Mapping[str, int]] = {}
+    for item_id, n in _merge(removes.items()).items():
+        rule = stack_rule(catalog, item_id)
+        if rule is None:
+            change.rechazados[item_id] = "desconocido" if catalog.get(item_id) is None else "no apilable"
+            continue
+        have = _bucket(ch, rule.bucket, cache).get(item_id, 0)
+        if have < n:
+            change.rechazados[item_id] = f"faltan {n - have}"
+            continue
+        change.finales.setdefault(rule.bucket, {})[item_id] = have - n
+        change.aplicados[item_id] = n
+    if change.rechazados:
+        change.finales, change.aplicados = {}, {}
+    return change
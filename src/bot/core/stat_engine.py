@@ -0,0 +1,243 @@
+# src/bot/core/stat_engine.py
+"""
+Motor de stats por lotes: las 13 stats de N personajes en arrays NumPy.
+
+Las 13 stats (STAT_KEYS + recurso.cantidad_maxima) tienen índice fijo y cada
+personaje ocupa una fila de tres arrays (capacidad, 13):
+  - base:  stats.base
+  - flat:  totales planos del equipo
+  - pct:   totales porcentuales del equipo
+Las filas se mantienen al día de a una (`StatMatrix.set`, O(13)) desde los
+totales persistidos en ch["bonos_equipo"] (core/stats.py), así que no hay que
+volver a recorrer dicts ni equipo de nadie: `compute()` calcula base / adicionales /
+total de todos en una pasada vectorizada. El resultado es idéntico bit a bit al de
+`compute_character_stats` para esas 13 stats (mismas operaciones float64 en el
+mismo orden); bonos a stats fuera de las 13 se ignoran.
+
+Benchmark contra la versión dict (y chequeo de igualdad exacta):
+    python -m src.bot.core.stat_engine --n 10000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.bot.core.stats import (
+    ARTEFACT_SLOTS,
+    BONUS_TOTALS_KEY,
+    NESTED_STAT_KEYS,
+    STAT_KEYS,
+    compute_character_stats,
+    get_stat_value,
+    rebuild_bonus_totals,
+    stored_bonus_totals,
+)
+
+ENGINE_KEYS: Tuple[str, ...] = tuple(STAT_KEYS) + tuple(NESTED_STAT_KEYS)
+STAT_INDEX: Dict[str, int] = {k: i for i, k in enumerate(ENGINE_KEYS)}
+N_STATS = len(ENGINE_KEYS)
+
+Rows = Tuple[List[float], List[float], List[float]]   # (base, flat, pct)
+
+
+def character_rows(character: Dict[str, Any]) -> Rows:
+    """
+    Filas (base, flat, pct) del personaje. Usa los totales persistidos si están al
+    día; si no (personaje viejo o totales de otro equipo) los reconstruye del equipo.
+    """
+    stats = character["estadisticas"]
+    base = [get_stat_value(stats, k) for k in ENGINE_KEYS]
+    totals = stored_bonus_totals(character) or rebuild_bonus_totals(character)
+    flat = [0.0] * N_STATS
+    pct = [0.0] * N_STATS
+    for row, part in ((flat, "plano"), (pct, "porcentaje")):
+        for kk, vv in totals[part].items():
+            i = STAT_INDEX.get(kk)
+            if i is not None:
+                row[i] = float(vv)
+    return base, flat, pct
+
+
+class BatchStats:
+    """Resultado de `StatMatrix.compute`: arrays (N, 13) y el personaje de cada fila."""
+
+    def __init__(self, members: Sequence[Hashable], base: Any, adicionales: Any, total: Any):
+        self.members = list(members)
+        self.base = base
+        self.adicionales = adicionales
+        self.total = total
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def column(self, stat: str, part: str = "total") -> Any:
+        return getattr(self, part)[:, STAT_INDEX[stat]]
+
+    def row(self, n: int) -> Dict[str, Dict[str, float]]:
+        """Fila `n` en el formato de compute_stats (solo las 13 stats)."""
+        return {
+            part: {k: float(getattr(self, part)[n, i]) for i, k in enumerate(ENGINE_KEYS)}
+            for part in ("base", "adicionales", "total")
+        }
+
+
+def compute_arrays(base: Any, flat: Any, pct: Any) -> Tuple[Any, Any, Any]:
+    """La fórmula de compute_stats sobre arrays: (base + flat, (base + flat) * pct, suma)."""
+    computed_base = base + flat
+    adicionales = computed_base * pct
+    return computed_base, adicionales, computed_base + adicionales
+
+
+class StatMatrix:
+    """
+    Filas de stats por personaje, mantenidas de a una.
+
+    `set` / `discard` cuestan O(13) (quitar mueve la última fila al hueco, así que el
+    orden de las filas no es estable); `compute` hace la pasada vectorizada sobre
+    todas. La capacidad se duplica al llenarse.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        capacity = max(1, int(capacity))
+        self._base = np.zeros((capacity, N_STATS))
+        self._flat = np.zeros((capacity, N_STATS))
+        self._pct = np.zeros((capacity, N_STATS))
+        self._rows: Dict[Hashable, int] = {}
+        self._members: List[Hashable] = []
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    def __contains__(self, member: object) -> bool:
+        return member in self._rows
+
+    def _grow(self) -> None:
+        capacity = self._base.shape[0] * 2
+        for name in ("_base", "_flat", "_pct"):
+            old = getattr(self, name)
+            new = np.zeros((capacity, N_STATS))
+            new[: old.shape[0]] = old
+            setattr(self, name, new)
+
+    def set_rows(self, member: Hashable, rows: Rows) -> int:
+        """Escribe las filas (base, flat, pct) del personaje; devuelve su índice."""
+        i = self._rows.get(member)
+        if i is None:
+            i = len(self._members)
+            if i == self._base.shape[0]:
+                self._grow()
+            self._rows[member] = i
+            self._members.append(member)
+        self._base[i], self._flat[i], self._pct[i] = rows
+        return i
+
+    def set(self, member: Hashable, character: Dict[str, Any]) -> int:
+        return self.set_rows(member, character_rows(character))
+
+    def discard(self, member: Hashable) -> None:
+        i = self._rows.pop(member, None)
+        if i is None:
+            return
+        last = len(self._members) - 1
+        moved = self._members.pop()
+        if i != last:
+            for arr in (self._base, self._flat, self._pct):
+                arr[i] = arr[last]
+            self._members[i] = moved
+            self._rows[moved] = i
+
+    def compute(self) -> BatchStats:
+        n = len(self._members)
+        parts = compute_arrays(self._base[:n], self._flat[:n], self._pct[:n])
+        return BatchStats(self._members, *parts)
+
+    def total(self, member: Hashable) -> Optional[Any]:
+        """Totales (13,) de un personaje, o None si no está."""
+        i = self._rows.get(member)
+        if i is None:
+            return None
+        return compute_arrays(self._base[i], self._flat[i], self._pct[i])[2]
+
+
+# ============================================================
+# Benchmark: python -m src.bot.core.stat_engine --n 10000
+# ============================================================
+def _synthetic_characters(n: int, seed: int) -> List[Dict[str, Any]]:
+    from src.bot.utils.artefact_gen import generate_artefact
+
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        stats = {k: {"base": round(rng.uniform(0, 200), 2)} for k in STAT_KEYS}
+        mana = float(rng.randint(20, 120))
+        stats["recurso"] = {"tipo": "Mana", "cantidad_maxima": {"base": mana}}
+        arts = {
+            s: generate_artefact(s, rng.randint(1, 5), seed=rng.getrandbits(32))
+            if rng.random() < 0.8 else None
+            for s in ARTEFACT_SLOTS
+        }
+        ch = {"estadisticas": stats, "equipamiento": {"artefactos": arts, "arma_principal": None}}
+        ch[BONUS_TOTALS_KEY] = rebuild_bonus_totals(ch)
+        out.append(ch)
+    return out
+
+
+def _mismatches(chars: Sequence[Dict[str, Any]], batch: BatchStats) -> int:
+    """Valores distintos entre compute_character_stats y el lote (debe ser 0)."""
+    diffs = 0
+    for n, ch in enumerate(chars):
+        ref = compute_character_stats(ch)
+        for part in ("base", "adicionales", "total"):
+            row = getattr(batch, part)[n]
+            for i, k in enumerate(ENGINE_KEYS):
+                if float(row[i]) != ref[part].get(k, 0.0):
+                    diffs += 1
+    return diffs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark del motor de stats por lotes vs la versión dict."
+    )
+    parser.add_argument("--n", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    chars = _synthetic_characters(max(1, args.n), args.seed)
+
+    t0 = time.perf_counter()
+    for ch in chars:
+        compute_character_stats(ch)
+    t_dict = time.perf_counter() - t0
+
+    matrix = StatMatrix()
+    t0 = time.perf_counter()
+    for n, ch in enumerate(chars):
+        matrix.set(n, ch)
+    t_fill = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    batch = matrix.compute()
+    t_vec = time.perf_counter() - t0
+
+    rng = random.Random(args.seed)
+    sample = [rng.randrange(len(chars)) for _ in range(1000)]
+    t0 = time.perf_counter()
+    for n in sample:
+        matrix.set(n, chars[n])
+    t_update = (time.perf_counter() - t0) / len(sample)
+
+    print(f"Personajes: {len(chars)}")
+    print(f"  compute_character_stats (dict, uno a uno): {t_dict * 1000:9.1f} ms")
+    print(f"  StatMatrix.compute (pasada vectorizada):   {t_vec * 1000:9.1f} ms")
+    print(f"  StatMatrix.set (por personaje):            {t_update * 1e6:9.1f} µs")
+    print(f"  llenado inicial (una vez):                 {t_fill * 1000:9.1f} ms")
+    print(f"  valores distintos vs dict:                 {_mismatches(chars, batch):9d}")
+
+
+if __name__ == "__main__":
+    main()
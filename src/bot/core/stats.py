@@ -0,0 +1,364 @@
+# src/bot/core/stats.py
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+# ============================================================
+# Stat computation (base + flat + percent)
+# ============================================================
+STAT_KEYS = [
+    "vida",
+    "ataque",
+    "poder_magico",
+    "armadura",
+    "resistencia_magica",
+    "probabilidad_critica",
+    "danio_critico",
+    "evasion",
+    "suerte",
+    "aura",
+    "inmortalidad",
+    "bloqueo",
+]
+NESTED_STAT_KEYS = ["recurso.cantidad_maxima"]
+
+ARTEFACT_SLOTS = ("caliz", "moneda", "arma_artefacto", "baston")
+
+StatResult = Dict[str, Dict[str, float]]
+
+
+def get_stat_value(stats: Dict[str, Any], key: str) -> float:
+    if key == "recurso.cantidad_maxima":
+        return float(stats["recurso"]["cantidad_maxima"]["base"])
+    return float(stats[key]["base"])
+
+
+def set_stat_value(stats: Dict[str, Any], key: str, new_base: float) -> None:
+    if key == "recurso.cantidad_maxima":
+        stats["recurso"]["cantidad_maxima"]["base"] = float(new_base)
+    else:
+        stats[key]["base"] = float(new_base)
+
+
+def _add_to_acc(acc: Dict[str, float], key: str, value: float) -> None:
+    acc[key] = float(acc.get(key, 0.0)) + float(value)
+
+
+def collect_item_bonuses(item: Dict[str, Any]) -> Tuple[Dict[str, float], Dict[str, float]]:
+    flat: Dict[str, float] = {}
+    pct: Dict[str, float] = {}
+
+    def apply_attr(attr: Dict[str, Any]) -> None:
+        stat = attr.get("estadistica")
+        tipo = attr.get("tipo")
+        val = attr.get("valor", 0)
+
+        if not stat or tipo not in {"plano", "porcentaje"}:
+            return
+
+        # ✅ Mapear mana al recurso real del personaje
+        if stat == "mana":
+            stat = "recurso.cantidad_maxima"
+
+        if tipo == "plano":
+            _add_to_acc(flat, stat, float(val))
+        else:
+            _add_to_acc(pct, stat, float(val))
+
+    if isinstance(item.get("atributo_principal"), dict):
+        apply_attr(item["atributo_principal"])
+
+    # ✅ 4 substats
+    for a in item.get("atributos_secundarios", [])[:4]:
+        if isinstance(a, dict):
+            apply_attr(a)
+
+    return flat, pct
+
+
+def compute_stats(character: Dict[str, Any]) -> StatResult:
+    """
+    - base = stats.base + flat(arma_principal) + flat(artefactos)
+    - adicionales = percent(artefactos + arma_principal) aplicados sobre base
+    - total = base + adicionales
+    """
+    stats = character["estadisticas"]
+    equip = character["equipamiento"]
+
+    base_vals: Dict[str, float] = {k: get_stat_value(stats, k) for k in STAT_KEYS}
+    base_vals["recurso.cantidad_maxima"] = get_stat_value(stats, "recurso.cantidad_maxima")
+
+    flat_bonus: Dict[str, float] = {}
+    pct_bonus: Dict[str, float] = {}
+
+    weapon = equip.get("arma_principal")
+    if isinstance(weapon, dict):
+        f, p = collect_item_bonuses(weapon)
+        for kk, vv in f.items():
+            _add_to_acc(flat_bonus, kk, vv)
+        for kk, vv in p.items():
+            _add_to_acc(pct_bonus, kk, vv)
+
+    for _, item in (equip.get("artefactos") or {}).items():
+        if isinstance(item, dict):
+            f, p = collect_item_bonuses(item)
+            for kk, vv in f.items():
+                _add_to_acc(flat_bonus, kk, vv)
+            for kk, vv in p.items():
+                _add_to_acc(pct_bonus, kk, vv)
+
+    computed_base: Dict[str, float] = dict(base_vals)
+    for kk, vv in flat_bonus.items():
+        _add_to_acc(computed_base, kk, vv)
+
+    adicionales: Dict[str, float] = {}
+    for kk, pct in pct_bonus.items():
+        base_for = float(computed_base.get(kk, 0.0))
+        _add_to_acc(adicionales, kk, base_for * float(pct))
+
+    total: Dict[str, float] = dict(computed_base)
+    for kk, vv in adicionales.items():
+        _add_to_acc(total, kk, vv)
+
+    return {"base": computed_base, "adicionales": adicionales, "total": total}
+
+
+# ============================================================
+# Totales de bonos persistidos (equipar / quitar por delta)
+# ============================================================
+# ch["bonos_equipo"] = {"plano": {stat: v}, "porcentaje": {stat: v}, "fuentes": {slot: id}}
+# Equipar/quitar suma o resta solo la contribución del item que entra o sale;
+# "fuentes" registra qué había equipado al calcularlos para detectar totales viejos.
+BONUS_TOTALS_KEY = "bonos_equipo"
+WEAPON_SOURCE = "arma_principal"
+BONUS_EPSILON = 1e-9      # restos de float tras restar un item
+BONUS_TOLERANCE = 1e-6    # deriva aceptada al verificar
+
+
+def _source_id(item: Any) -> Optional[str]:
+    # Los items sin id (armas pegadas como JSON) se marcan "" para distinguirlos de un slot vacío
+    if not isinstance(item, dict):
+        return None
+    return str(item.get("id") or "")
+
+
+def equipment_sources(character: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    equip = character.get("equipamiento") or {}
+    arts = equip.get("artefactos") or {}
+    out = {WEAPON_SOURCE: _source_id(equip.get("arma_principal"))}
+    for slot in ARTEFACT_SLOTS:
+        out[slot] = _source_id(arts.get(slot))
+    return out
+
+
+def _equipped_items(character: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    """Items equipados en el orden de compute_stats (arma y luego artefactos)."""
+    equip = character.get("equipamiento") or {}
+    weapon = equip.get("arma_principal")
+    if isinstance(weapon, dict):
+        yield weapon
+    for _, item in (equip.get("artefactos") or {}).items():
+        if isinstance(item, dict):
+            yield item
+
+
+def rebuild_bonus_totals(character: Dict[str, Any]) -> Dict[str, Any]:
+    """Totales desde cero recorriendo el equipo (la verdad contra la que se verifica)."""
+    flat: Dict[str, float] = {}
+    pct: Dict[str, float] = {}
+    for item in _equipped_items(character):
+        f, p = collect_item_bonuses(item)
+        for kk, vv in f.items():
+            _add_to_acc(flat, kk, vv)
+        for kk, vv in p.items():
+            _add_to_acc(pct, kk, vv)
+    return {"plano": flat, "porcentaje": pct, "fuentes": equipment_sources(character)}
+
+
+def stored_bonus_totals(character: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Totales persistidos si existen y corresponden al equipo actual; si no, None."""
+    totals = character.get(BONUS_TOTALS_KEY)
+    if not isinstance(totals, dict):
+        return None
+    if not isinstance(totals.get("plano"), dict) or not isinstance(totals.get("porcentaje"), dict):
+        return None
+    if totals.get("fuentes") != equipment_sources(character):
+        return None
+    return totals
+
+
+def _apply_item(acc: Dict[str, Dict[str, float]], item: Dict[str, Any], sign: float) -> None:
+    f, p = collect_item_bonuses(item)
+    for part, bonus in (("plano", f), ("porcentaje", p)):
+        bucket = acc[part]
+        for kk, vv in bonus.items():
+            value = float(bucket.get(kk, 0.0)) + sign * float(vv)
+            if abs(value) < BONUS_EPSILON:
+                bucket.pop(kk, None)
+            else:
+                bucket[kk] = value
+
+
+def bonus_totals_after(
+    character: Dict[str, Any],
+    changes: Dict[str, Optional[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """
+    Totales nuevos tras equipar `changes` ({slot | "arma_principal": item o None}).
+    Parte de los totales guardados y resta/suma solo los items de los slots que
+    cambian; si no hay totales válidos (personaje viejo) los reconstruye primero.
+    Devuelve un dict nuevo, listo para op_set_bonus_totals.
+    """
+    current = stored_bonus_totals(character) or rebuild_bonus_totals(character)
+    acc = {"plano": dict(current["plano"]), "porcentaje": dict(current["porcentaje"])}
+    sources = dict(current["fuentes"])
+
+    equip = character.get("equipamiento") or {}
+    arts = equip.get("artefactos") or {}
+    for slot, new_item in changes.items():
+        old_item = equip.get("arma_principal") if slot == WEAPON_SOURCE else arts.get(slot)
+        if isinstance(old_item, dict):
+            _apply_item(acc, old_item, -1.0)
+        if isinstance(new_item, dict):
+            _apply_item(acc, new_item, 1.0)
+        sources[slot] = _source_id(new_item)
+    return {"plano": acc["plano"], "porcentaje": acc["porcentaje"], "fuentes": sources}
+
+
+def compute_stats_from_totals(character: Dict[str, Any], totals: Dict[str, Any]) -> StatResult:
+    """compute_stats sin recorrer el equipo: base + totales planos, % sobre esa base."""
+    stats = character["estadisticas"]
+    computed_base: Dict[str, float] = {k: get_stat_value(stats, k) for k in STAT_KEYS}
+    computed_base["recurso.cantidad_maxima"] = get_stat_value(stats, "recurso.cantidad_maxima")
+    for kk, vv in totals["plano"].items():
+        _add_to_acc(computed_base, kk, vv)
+
+    adicionales: Dict[str, float] = {}
+    for kk, pct in totals["porcentaje"].items():
+        _add_to_acc(adicionales, kk, float(computed_base.get(kk, 0.0)) * float(pct))
+
+    total: Dict[str, float] = dict(computed_base)
+    for kk, vv in adicionales.items():
+        _add_to_acc(total, kk, vv)
+    return {"base": computed_base, "adicionales": adicionales, "total": total}
+
+
+def compute_character_stats(character: Dict[str, Any]) -> StatResult:
+    """Stats del personaje: desde los totales persistidos si están al día, si no recorriendo el equipo."""
+    totals = stored_bonus_totals(character)
+    if totals is not None:
+        return compute_stats_from_totals(character, totals)
+    return compute_stats(character)
+
+
+def bonus_drift(character: Dict[str, Any]) -> Tuple[float, Dict[str, Any]]:
+    """
+    (máxima diferencia, totales reconstruidos) entre lo persistido y el equipo.
+    Totales ausentes o de otro equipo cuentan como deriva infinita.
+    """
+    rebuilt = rebuild_bonus_totals(character)
+    stored = stored_bonus_totals(character)
+    if stored is None:
+        return float("inf"), rebuilt
+    drift = 0.0
+    for part in ("plano", "porcentaje"):
+        a, b = stored[part], rebuilt[part]
+        for kk in set(a) | set(b):
+            drift = max(drift, abs(float(a.get(kk, 0.0)) - float(b.get(kk, 0.0))))
+    return drift, rebuilt
+
+
+# ============================================================
+# Cache de stats por huella de equipamiento
+# ============================================================
+def _item_key(item: Any) -> Hashable:
+    if not isinstance(item, dict):
+        return None
+    # Items sin id (armas viejas): la identidad del dict vivo cambia al reemplazarlo por op
+    return item.get("id") or id(item)
+
+
+def equipment_fingerprint(character: Dict[str, Any]) -> Tuple[Hashable, ...]:
+    """Huella barata: nivel + ids equipados. Las stats base se cubren invalidando por op."""
+    equip = character.get("equipamiento") or {}
+    arts = equip.get("artefactos") or {}
+    return (
+        character.get("nivel"),
+        _item_key(equip.get("arma_principal")),
+        *(_item_key(arts.get(slot)) for slot in ARTEFACT_SLOTS),
+    )
+
+
+# Ops de journal que cambian stats: estos primeros segmentos de path (o put/del del personaje)
+STAT_PATH_ROOTS = {"equipamiento", "estadisticas", "nivel", BONUS_TOTALS_KEY}
+
+
+def op_affects_stats(op: Dict[str, Any]) -> bool:
+    if op.get("op") in {"put_pj", "del_pj"}:
+        return True
+    path = op.get("path") or []
+    return bool(path) and path[0] in STAT_PATH_ROOTS
+
+
+class StatCache:
+    """
+    Memoiza compute_stats por (user_id, personaje).
+
+    Si el personaje tiene totales de bonos persistidos al día se usan (coste fijo
+    por stat); si no, se recorre el equipo con compute_stats.
+
+    Cada entrada guarda la huella con la que se calculó; una vista repetida
+    cuesta un lookup + comparar la huella. Las mutaciones (equipar, quitar,
+    nivel, stats base) invalidan la entrada vía `on_commit`, que el UserStore
+    llama con las ops de cada transacción. Los resultados son compartidos: no mutarlos.
+    """
+
+    def __init__(self, capacity: int = 2048):
+        self.capacity = max(1, int(capacity))
+        self._entries: "OrderedDict[Tuple[int, str], Tuple[Tuple[Hashable, ...], StatResult]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: int, nombre: str, character: Dict[str, Any]) -> StatResult:
+        key = (user_id, nombre)
+        fp = equipment_fingerprint(character)
+        cached = self._entries.get(key)
+        if cached is not None and cached[0] == fp:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        result = compute_character_stats(character)
+        self._entries[key] = (fp, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return result
+
+    def invalidate(self, user_id: int, nombre: Optional[str] = None) -> None:
+        """Sin nombre invalida todos los personajes del usuario."""
+        if nombre is not None:
+            keys: Iterable[Tuple[int, str]] = [(user_id, nombre)]
+        else:
+            keys = [k for k in self._entries if k[0] == user_id]
+        for key in keys:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def on_commit(self, user_id: int, ops: Optional[Iterable[Dict[str, Any]]]) -> None:
+        """Listener del UserStore. ops=None: el documento entero pudo cambiar (save)."""
+        if ops is None:
+            self.invalidate(user_id)
+            return
+        for op in ops:
+            if op_affects_stats(op):
+                self.invalidate(user_id, op.get("pj"))
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses, "invalidations": self.invalidations}
@@ -0,0 +1,11 @@
+# src/bot/core/text.py
+from __future__ import annotations
+
+
+def normalize_label(s: str) -> str:
+    return " ".join(str(s).strip().split())
+
+
+def name_key(s: str) -> str:
+    """Clave de búsqueda: espacios colapsados y sin mayúsculas."""
+    return normalize_label(s).lower()
@@ -1,14 +1,23 @@
+import asyncio
 import os
 import sys
 import signal
 import logging
 import traceback
+from typing import Optional
 
 import discord
 from discord.ext import commands
 from discord import app_commands
 from dotenv import load_dotenv
 
+from src.bot.core.data_snapshot import load_game_data
+from src.bot.core.game_data import GameData
+from src.bot.services.data_watcher import DEFAULT_POLL_INTERVAL, GameDataWatcher
+from src.bot.services.leaderboard import Leaderboard
+from src.bot.services.user_backends import SqliteUserBackend
+from src.bot.services.user_store import DEFAULT_USERS_DB, UserStore
+
 load_dotenv()
 
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -17,9 +26,23 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 # Opcional: para que slash aparezca al instante en tu servidor de pruebas
 GUILD_ID = os.getenv("GUILD_ID")  # ponlo en .env si quieres
 
+# Cache write-back de data/users (ver src/bot/services/user_store.py)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "512"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "900"))
+USER_FLUSH_INTERVAL = float(os.getenv("USER_FLUSH_INTERVAL", "5"))
+USER_COMPACT_OPS = int(os.getenv("USER_COMPACT_OPS", "200"))
+
+# Persistencia de usuarios: "json" (data/users/*.json) o "sqlite"
+USER_BACKEND = os.getenv("USER_BACKEND", "json").strip().lower()
+USER_DB_PATH = os.getenv("USER_DB_PATH", DEFAULT_USERS_DB)
+
+# Recarga en caliente de src/bot/data (segundos entre revisiones; 0 = desactivada)
+GAME_DATA_POLL = float(os.getenv("GAME_DATA_POLL", str(DEFAULT_POLL_INTERVAL)))
+
 EXTENSIONS = [
     "src.bot.cogs.ping",
     "src.bot.cogs.personaje",
+    "src.bot.cogs.ranking",
 ]
 
 
@@ -73,10 +96,40 @@ class MyBot(commands.Bot):
         intents = discord.Intents.default()
         intents.message_content = True  # Necesario para comandos con prefijo (=)
         super().__init__(command_prefix="=", intents=intents)
+        # Store async compartido por los cogs (I/O de data/users fuera del event loop)
+        backend = SqliteUserBackend(USER_DB_PATH) if USER_BACKEND == "sqlite" else None
+        self.user_store = UserStore(
+            backend=backend,
+            cache_size=USER_CACHE_SIZE,
+            cache_ttl=USER_CACHE_TTL,
+            flush_interval=USER_FLUSH_INTERVAL,
+            compact_ops=USER_COMPACT_OPS,
+        )
+        # Rankings (/ranking): índices ordenados que se actualizan con cada commit del store
+        self.leaderboard = Leaderboard(self.user_store)
+        self.user_store.add_listener(self.leaderboard.on_commit)
+        # Roles/profesiones/pathways: se cargan una vez en setup_hook
+        self.game_data: Optional[GameData] = None
+        self.data_watcher = GameDataWatcher(self, interval=GAME_DATA_POLL or DEFAULT_POLL_INTERVAL)
 
     async def setup_hook(self):
         logging.info("🚀 Iniciando setup_hook: cargando extensiones...")
 
+        # 0) Datos de juego (una sola lectura de src/bot/data: roles, pathways, items, ...)
+        # Usa data/game_data.snapshot si coincide con los JSON (ver core/data_snapshot.py)
+        self.game_data, source, ms = await asyncio.to_thread(load_game_data)
+        await asyncio.to_thread(self.data_watcher.prime)
+        if GAME_DATA_POLL > 0:
+            self.data_watcher.start()
+        logging.info(
+            "📚 Datos de juego (%s, %.1f ms): %d roles, %d profesiones, %d pathways, %d items.",
+            source, ms,
+            len(self.game_data.roles), len(self.game_data.profesiones), len(self.game_data.pathways),
+            len(self.game_data.items),
+        )
+        if self.game_data.items.duplicates:
+            logging.warning("⚠️ item_id repetidos entre archivos: %s", ", ".join(self.game_data.items.duplicates))
+
         # 1) Cargar extensiones
         for ext in EXTENSIONS:
             try:
@@ -105,6 +158,15 @@ class MyBot(commands.Bot):
             logging.error(explain_exception(e))
             logging.debug("TRACEBACK:\n%s", traceback.format_exc())
 
+    async def close(self):
+        await self.data_watcher.stop()
+        try:
+            await self.user_store.close()
+            logging.info("💾 User store cerrado (cache sucia escrita a disco).")
+        except Exception as e:
+            logging.error(explain_exception(e))
+        await super().close()
+
     async def on_ready(self):
         logging.info("🟢 BOT ACTIVO: %s (ID: %s)", self.user, self.user.id)
         logging.info("📌 Prefix: usa =ping")
@@ -157,6 +219,7 @@ def main():
     logging.info("==============================")
     logging.info("🧪 Iniciando bot...")
     logging.info("LOG_LEVEL=%s", LOG_LEVEL)
+    logging.info("USER_BACKEND=%s", USER_BACKEND)
     if GUILD_ID:
         logging.info("GUILD_ID=%s (sync rápido activado)", GUILD_ID)
     logging.info("==============================")
@@ -188,6 +251,10 @@ def main():
         logging.error(explain_exception(e))
         logging.debug("TRACEBACK:\n%s", traceback.format_exc())
     finally:
+        # Si el loop murió antes de close() (p.ej. sys.exit desde la señal), no perder lo sucio
+        pending = bot.user_store.drain_sync()
+        if pending:
+            logging.warning("💾 %d usuarios pendientes escritos al apagar.", pending)
         logging.info("✅ Proceso finalizado.")
 
 
@@ -0,0 +1,168 @@
+# src/bot/services/data_watcher.py
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.bot.core.game_data import (
+    DEFAULT_DATA_DIR,
+    GameData,
+    iter_data_files,
+    parse_data_file,
+)
+
+log = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 5.0
+
+# (st_mtime_ns, st_size): barato de obtener y cambia con cualquier guardado
+Signature = Tuple[int, int]
+
+
+@dataclass
+class ReloadReport:
+    """Resultado de una pasada del watcher con cambios o errores (lo muestra `pjstaff recargar`)."""
+    at: float = field(default_factory=time.time)
+    scan_ms: float = 0.0
+    build_ms: float = 0.0
+    parse_ms: Dict[str, float] = field(default_factory=dict)  # archivo -> ms (solo los aplicados)
+    removed: List[str] = field(default_factory=list)
+    errors: Dict[str, str] = field(default_factory=dict)      # archivo -> motivo (no aplicados)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.parse_ms or self.removed)
+
+    @property
+    def total_ms(self) -> float:
+        return self.scan_ms + sum(self.parse_ms.values()) + self.build_ms
+
+
+def _scan(data_dir: str) -> Dict[str, Tuple[str, Signature]]:
+    out: Dict[str, Tuple[str, Signature]] = {}
+    for name, path in iter_data_files(data_dir):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue  # borrado entre el walk y el stat
+        out[name] = (path, (st.st_mtime_ns, st.st_size))
+    return out
+
+
+def _parse(path: str, name: str) -> Tuple[Optional[Any], float, Optional[str]]:
+    t0 = time.perf_counter()
+    try:
+        data = parse_data_file(name, path)
+    except (OSError, ValueError) as e:  # json.JSONDecodeError es ValueError
+        return None, 0.0, str(e)
+    return data, (time.perf_counter() - t0) * 1000, None
+
+
+class GameDataWatcher:
+    """
+    Recarga en caliente de src/bot/data/ por polling de mtime.
+
+    Cada `interval` segundos compara (mtime, tamaño) de cada JSON; solo re-parsea
+    los que cambiaron (en un hilo), los valida y arma un GameData nuevo que
+    reemplaza a `bot.game_data` en una sola asignación. Un archivo inválido no se
+    aplica (sigue vigente la versión anterior) y no se reintenta hasta que vuelva
+    a cambiar en disco.
+    """
+
+    def __init__(self, bot: Any, data_dir: str = DEFAULT_DATA_DIR, interval: float = DEFAULT_POLL_INTERVAL):
+        self.bot = bot
+        self.data_dir = data_dir
+        self.interval = max(0.5, float(interval))
+        self.last_report: Optional[ReloadReport] = None
+        self._seen: Dict[str, Signature] = {}
+        self._failed: Dict[str, Signature] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def prime(self) -> None:
+        """Toma las firmas actuales como punto de partida (tras GameData.load). Bloqueante."""
+        self._seen = {name: sig for name, (_, sig) in _scan(self.data_dir).items()}
+        self._failed.clear()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(), name="game-data-watcher")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.check()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Error revisando cambios en datos de juego")
+
+    async def check(self, force: bool = False) -> ReloadReport:
+        """Una pasada: detecta, parsea y aplica. `force` re-parsea todos los archivos."""
+        async with self._lock:
+            report, new = await asyncio.to_thread(self._check_sync, force)
+            if new is not None:
+                # Asignación única en el event loop: los comandos en curso conservan su snapshot
+                self.bot.game_data = new
+            return report
+
+    def _check_sync(self, force: bool) -> Tuple[ReloadReport, Optional[GameData]]:
+        report = ReloadReport()
+        t0 = time.perf_counter()
+        current = _scan(self.data_dir)
+        report.scan_ms = (time.perf_counter() - t0) * 1000
+
+        changed: Dict[str, Any] = {}
+        applied: Dict[str, Signature] = {}
+        for name, (path, sig) in current.items():
+            if not force and (self._seen.get(name) == sig or self._failed.get(name) == sig):
+                continue
+            data, ms, err = _parse(path, name)
+            if err is not None:
+                report.errors[name] = err
+                self._failed[name] = sig
+                continue
+            changed[name] = data
+            applied[name] = sig
+            report.parse_ms[name] = ms
+
+        report.removed = sorted(n for n in self._seen if n not in current)
+
+        new: Optional[GameData] = None
+        if changed or report.removed:
+            t1 = time.perf_counter()
+            old: Optional[GameData] = getattr(self.bot, "game_data", None)
+            new = old.with_files(changed, report.removed) if old is not None else GameData.from_files(changed)
+            report.build_ms = (time.perf_counter() - t1) * 1000
+
+        for name in report.removed:
+            self._seen.pop(name, None)
+            self._failed.pop(name, None)
+        for name, sig in applied.items():
+            self._seen[name] = sig
+            self._failed.pop(name, None)
+
+        if report.changed:
+            log.info(
+                "🔄 Datos de juego recargados: %s (%.1f ms)",
+                ", ".join(list(report.parse_ms) + [f"-{n}" for n in report.removed]), report.total_ms,
+            )
+        for name, err in report.errors.items():
+            log.error("❌ %s no se recargó (sigue la versión anterior): %s", name, err)
+        if report.changed or report.errors:
+            self.last_report = report
+        return report, new
@@ -0,0 +1,246 @@
+# src/bot/services/leaderboard.py
+"""
+Rankings de todo el servidor (nivel, vida, ataque, poder_magico).
+
+Cada tabla es un índice ordenado de (puntaje, personaje) que se mantiene al día
+con los commits del UserStore (listener `on_commit`): crear/reemplazar un
+personaje (update_character), setnivel, addxp o equipar solo re-indexa ese
+personaje. Así `/ranking` no abre data/users/ ni recalcula stats de nadie:
+  - top-N paginado: slice del índice,
+  - "mi posición": bisect por la clave del personaje, O(log n).
+
+El índice se construye una vez recorriendo el backend en el pool (`rebuild`).
+Las stats de todos los personajes viven en una `StatMatrix` (core/stat_engine.py)
+alimentada con los totales de bonos persistidos: `rebuild` calcula los puntajes de
+stats de todos en una pasada vectorizada y cada commit solo reescribe la fila del
+personaje que cambió.
+Cada tabla es una `sortedcontainers.SortedList` (dependencia del bot): insertar,
+quitar y buscar la posición son O(log n).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.bot.core.stat_engine import STAT_INDEX, Rows, StatMatrix, character_rows
+from src.bot.core.stats import STAT_PATH_ROOTS
+from src.bot.services.user_journal import Op
+from src.bot.services.user_store import UserStore
+
+from sortedcontainers import SortedList
+
+log = logging.getLogger(__name__)
+
+STAT_BOARDS = ("vida", "ataque", "poder_magico")
+BOARDS = ("nivel",) + STAT_BOARDS
+
+# Ops que pueden mover a un personaje en alguna tabla (además de put_pj / del_pj)
+RANKING_PATH_ROOTS = STAT_PATH_ROOTS | {"experiencia"}
+
+Member = Tuple[int, str]                 # (user_id, nombre del personaje)
+Score = Tuple[float, ...]                # mayor es mejor; desempata el siguiente campo
+RankRow = Tuple[int, int, str, Score]    # (posición 1-based, user_id, nombre, puntaje)
+
+
+def character_entry(
+    user_id: int, nombre: str, ch: Dict[str, Any]
+) -> Optional[Tuple[Member, Score, Rows]]:
+    """
+    (personaje, puntaje de nivel, filas de stats para la StatMatrix); None si el
+    personaje está incompleto (no entra al ranking).
+    """
+    try:
+        nivel = (int(ch.get("nivel", 1) or 1), int(ch.get("experiencia", 0) or 0))
+        rows = character_rows(ch)
+    except (KeyError, TypeError, ValueError):
+        return None
+    return (int(user_id), str(nombre)), nivel, rows
+
+
+def _key(member: Member, score: Score) -> Tuple[Any, ...]:
+    # Orden ascendente de la clave = ranking descendente; empates por user_id y nombre
+    return (*(-v for v in score), member[0], member[1])
+
+
+class SortedIndex:
+    """Una tabla: claves ordenadas + la clave actual de cada personaje."""
+
+    def __init__(self, entries: Iterable[Tuple[Member, Score]] = ()):
+        self._keys: Dict[Member, Tuple[Any, ...]] = {m: _key(m, s) for m, s in entries}
+        self._items = SortedList(self._keys.values())
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def update(self, member: Member, score: Score) -> None:
+        key = _key(member, score)
+        old = self._keys.get(member)
+        if old == key:
+            return
+        if old is not None:
+            self._remove(old)
+        self._keys[member] = key
+        self._items.add(key)
+
+    def discard(self, member: Member) -> None:
+        old = self._keys.pop(member, None)
+        if old is not None:
+            self._remove(old)
+
+    def _remove(self, key: Tuple[Any, ...]) -> None:
+        self._items.remove(key)
+
+    def rank(self, member: Member) -> Optional[int]:
+        """Posición 0-based del personaje o None si no está."""
+        key = self._keys.get(member)
+        if key is None:
+            return None
+        return self._items.bisect_left(key)
+
+    def page(self, offset: int, limit: int) -> List[RankRow]:
+        offset = max(0, int(offset))
+        rows: List[RankRow] = []
+        for i, key in enumerate(self._items[offset:offset + max(0, int(limit))], start=offset + 1):
+            rows.append((i, key[-2], key[-1], tuple(-v for v in key[:-2])))
+        return rows
+
+    def score(self, member: Member) -> Optional[Score]:
+        key = self._keys.get(member)
+        return tuple(-v for v in key[:-2]) if key is not None else None
+
+
+class Leaderboard:
+    """
+    Tablas de ranking sobre un UserStore. Registrar `on_commit` como listener
+    del store y llamar `ensure_ready()` (o `start()`) una vez.
+    """
+
+    def __init__(self, store: UserStore):
+        self.store = store
+        self.indexes: Dict[str, SortedIndex] = {b: SortedIndex() for b in BOARDS}
+        self.stats = StatMatrix()
+        self._members: Dict[int, Set[str]] = {}
+        self.ready = False
+        self._building = False
+        self._pending: Set[int] = set()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    # ---------- construcción ----------
+    def start(self) -> None:
+        """Construye el índice en segundo plano (las consultas esperan a que termine)."""
+        if self._task is None and not self.ready:
+            self._task = asyncio.create_task(self.ensure_ready())
+
+    async def ensure_ready(self) -> None:
+        if self.ready:
+            return
+        async with self._lock:
+            if not self.ready:
+                await self.rebuild()
+
+    async def rebuild(self) -> int:
+        """Recorre todos los personajes (en el pool) y reemplaza las tablas; devuelve cuántos."""
+        self._building = True
+        self._pending = set()
+        try:
+            rows = await self.store.scan_characters(character_entry)
+        except Exception:
+            self._building = False
+            raise
+
+        members: Dict[int, Set[str]] = {}
+        stats = StatMatrix(len(rows))
+        for member, _, stat_rows in rows:
+            members.setdefault(member[0], set()).add(member[1])
+            stats.set_rows(member, stat_rows)
+        batch = stats.compute()
+        indexes = {"nivel": SortedIndex((member, nivel) for member, nivel, _ in rows)}
+        for board in STAT_BOARDS:
+            column = batch.column(board).tolist()
+            indexes[board] = SortedIndex(((m, (v,)) for m, v in zip(batch.members, column)))
+        self.indexes = indexes
+        self.stats = stats
+        self._members = members
+        self._building = False
+        self.ready = True
+
+        # Commits que llegaron mientras se recorría el disco: releerlos del store
+        pending, self._pending = self._pending, set()
+        for uid in pending:
+            self._index_user(uid, await self.store.load(uid))
+        log.info("🏆 Rankings construidos: %d personajes.", len(rows))
+        return len(rows)
+
+    # ---------- mantenimiento incremental ----------
+    def on_commit(self, user_id: int, ops: Optional[List[Op]]) -> None:
+        """Listener del UserStore: re-indexa solo los personajes que tocan las ops."""
+        if self._building:
+            self._pending.add(user_id)
+            return
+        if not self.ready:
+            return  # rebuild leerá el estado ya confirmado
+        doc = self.store.cache.peek(user_id)
+        if ops is None or doc is None:
+            self._index_user(user_id, doc)
+            return
+
+        names: Set[str] = set()
+        for op in ops:
+            path = op.get("path") or []
+            if op.get("op") in {"put_pj", "del_pj"} or (path and path[0] in RANKING_PATH_ROOTS):
+                names.add(op.get("pj"))
+        chars = (doc.get(str(user_id)) or {}).get("personajes") or {}
+        for nombre in names:
+            self._index_character(user_id, nombre, chars.get(nombre))
+
+    def _index_character(self, user_id: int, nombre: str, ch: Any) -> None:
+        member = (int(user_id), str(nombre))
+        res = character_entry(user_id, nombre, ch) if isinstance(ch, dict) else None
+        if res is None:
+            for index in self.indexes.values():
+                index.discard(member)
+            self.stats.discard(member)
+            names = self._members.get(member[0])
+            if names is not None:
+                names.discard(member[1])
+                if not names:
+                    del self._members[member[0]]
+            return
+        self.indexes["nivel"].update(member, res[1])
+        self.stats.set_rows(member, res[2])
+        total = self.stats.total(member)
+        for board in STAT_BOARDS:
+            self.indexes[board].update(member, (float(total[STAT_INDEX[board]]),))
+        self._members.setdefault(member[0], set()).add(member[1])
+
+    def _index_user(self, user_id: int, doc: Optional[Dict[str, Any]]) -> None:
+        chars = ((doc or {}).get(str(user_id)) or {}).get("personajes") or {}
+        for nombre in list(self._members.get(int(user_id), ())):
+            if nombre not in chars:
+                self._index_character(user_id, nombre, None)
+        for nombre, ch in chars.items():
+            self._index_character(user_id, nombre, ch)
+
+    # ---------- consultas ----------
+    def size(self, board: str) -> int:
+        return len(self.indexes[board])
+
+    def top(self, board: str, page: int = 1, per_page: int = 10) -> List[RankRow]:
+        """Página `page` (1-based) de la tabla."""
+        per_page = max(1, int(per_page))
+        return self.indexes[board].page((max(1, int(page)) - 1) * per_page, per_page)
+
+    def rank(self, board: str, user_id: int, nombre: str) -> Optional[RankRow]:
+        member = (int(user_id), str(nombre))
+        index = self.indexes[board]
+        pos = index.rank(member)
+        if pos is None:
+            return None
+        return pos + 1, member[0], member[1], index.score(member)
+
+    def user_ranks(self, board: str, user_id: int) -> List[RankRow]:
+        """Posición de cada personaje del usuario, mejor primero."""
+        rows = [self.rank(board, user_id, nombre) for nombre in self._members.get(int(user_id), ())]
+        return sorted(r for r in rows if r is not None)
@@ -0,0 +1,73 @@
+# src/bot/services/migrate_users.py
+"""
+Migra data/users/*.json a la base SQLite (una fila por personaje).
+
+Uso:
+    python -m src.bot.services.migrate_users
+    python -m src.bot.services.migrate_users --users-dir src/bot/data/users --db src/bot/data/users.sqlite3 --batch-size 500
+
+Lee el directorio en streaming (os.scandir) y escribe por lotes: cada lote de
+usuarios va en una sola transacción, así la memoria no crece con el número de
+archivos. Es idempotente: volver a correrlo reemplaza los personajes de cada
+usuario importado.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+from typing import List, Tuple
+
+from src.bot.services.user_backends import CharacterRow, SqliteUserBackend, character_rows, iter_user_files
+from src.bot.services.user_store import DEFAULT_USERS_DB, DEFAULT_USERS_DIR
+
+log = logging.getLogger(__name__)
+
+
+def migrate(users_dir: str, db_path: str, batch_size: int = 500) -> Tuple[int, int]:
+    """Devuelve (usuarios, personajes) importados."""
+    backend = SqliteUserBackend(db_path)
+    users = chars = 0
+    batch_rows: List[CharacterRow] = []
+    batch_users: List[int] = []
+
+    def commit() -> None:
+        backend.write_many(batch_rows, batch_users)
+        log.info("Lote importado: %d usuarios (total %d)", len(batch_users), users)
+        batch_rows.clear()
+        batch_users.clear()
+
+    try:
+        for user_id, data in iter_user_files(users_dir):
+            rows = character_rows(user_id, data)
+            batch_users.append(user_id)
+            batch_rows.extend(rows)
+            users += 1
+            chars += len(rows)
+            if len(batch_users) >= batch_size:
+                commit()
+        if batch_users:
+            commit()
+    finally:
+        backend.close()
+    return users, chars
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migra data/users/*.json a SQLite.")
+    parser.add_argument("--users-dir", default=DEFAULT_USERS_DIR)
+    parser.add_argument("--db", default=DEFAULT_USERS_DB)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    t0 = time.perf_counter()
+    users, chars = migrate(args.users_dir, args.db, max(1, args.batch_size))
+    logging.info(
+        "✅ Migración completa: %d usuarios, %d personajes en %.2fs -> %s",
+        users, chars, time.perf_counter() - t0, args.db,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+# src/bot/services/user_backends.py
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.bot.services.user_journal import JOURNAL_SEQ_KEY, apply_op
+
+# ============================================================
+# Backends de persistencia de usuarios
+# ============================================================
+# Todos los métodos *_sync / read / write son bloqueantes y solo se llaman
+# desde el pool de hilos del UserStore. `serialize` en cambio corre en el
+# event loop: saca un snapshot inmutable del documento (str / filas) para que
+# el hilo de I/O nunca lea un dict que otro comando está mutando.
+
+
+def empty_user_doc(user_id: int) -> Dict[str, Any]:
+    return {str(user_id): {"personajes": {}}}
+
+
+def replay_journal(
+    data: Optional[Dict[str, Any]], user_id: int, entries: List[Dict[str, Any]]
+) -> Optional[Dict[str, Any]]:
+    """Aplica sobre el snapshot las entradas del journal que no incluye (seq mayor al guardado)."""
+    if not entries:
+        return data
+    data = data or empty_user_doc(user_id)
+    base_seq = int(data.get(JOURNAL_SEQ_KEY, 0))
+    for entry in entries:
+        seq = int(entry["seq"])
+        if seq <= base_seq:
+            continue  # ya estaba en el snapshot (crash entre snapshot y truncado)
+        apply_op(data, user_id, entry["op"])
+        data[JOURNAL_SEQ_KEY] = seq
+    return data
+
+
+def read_journal_file(path: str) -> List[Dict[str, Any]]:
+    """Entradas {"seq", "op"} de un journal JSON Lines; [] si no existe."""
+    if not os.path.exists(path):
+        return []
+    entries: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break  # cola cortada por un crash a mitad de escritura
+            if isinstance(entry, dict) and "seq" in entry and "op" in entry:
+                entries.append(entry)
+    return entries
+
+
+class UserBackend:
+    """Interfaz común. Un documento de usuario es {str(user_id): {"personajes": {...}}}."""
+
+    name = "base"
+    # Si True, el UserStore registra las mutaciones en un journal append-only y
+    # solo reescribe el documento completo al compactar.
+    supports_journal = False
+
+    def read(self, user_id: int) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def serialize(self, user_id: int, data: Dict[str, Any]) -> Any:
+        raise NotImplementedError
+
+    def write(self, user_id: int, payload: Any) -> None:
+        raise NotImplementedError
+
+    def find_characters(
+        self, nombre: Optional[str] = None, apodo: Optional[str] = None, limit: int = 25
+    ) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Busca personajes de cualquier usuario. Devuelve (user_id, nombre, personaje)."""
+        raise NotImplementedError
+
+    def iter_characters(self) -> Iterable[Tuple[int, str, Dict[str, Any]]]:
+        """Todos los personajes persistidos (user_id, nombre, personaje), de forma perezosa."""
+        raise NotImplementedError
+
+    def append_journal(self, user_id: int, lines: List[str]) -> None:
+        raise NotImplementedError
+
+    def read_journal(self, user_id: int) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def truncate_journal(self, user_id: int) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+def _match(ch_name: str, ch: Dict[str, Any], nombre: Optional[str], apodo: Optional[str]) -> bool:
+    if nombre is not None and ch_name.lower() != nombre.lower():
+        return False
+    if apodo is not None and str(ch.get("apodo", "")).lower() != apodo.lower():
+        return False
+    return True
+
+
+# ============================================================
+# JSON: un archivo por usuario (data/users/<discord_id>.json)
+# ============================================================
+class JsonUserBackend(UserBackend):
+    name = "json"
+    supports_journal = True
+
+    def __init__(self, users_dir: str):
+        self.users_dir = users_dir
+
+    def _user_file(self, user_id: int) -> str:
+        return os.path.join(self.users_dir, f"{user_id}.json")
+
+    def read(self, user_id: int) -> Optional[Dict[str, Any]]:
+        path = self._user_file(user_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else None
+
+    def serialize(self, user_id: int, data: Dict[str, Any]) -> str:
+        return json.dumps(data, ensure_ascii=False, indent=2)
+
+    def write(self, user_id: int, payload: str) -> None:
+        os.makedirs(self.users_dir, exist_ok=True)
+        path = self._user_file(user_id)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(tmp, path)
+
+    # ---------- journal (data/users/<discord_id>.journal, JSON Lines) ----------
+    def _journal_file(self, user_id: int) -> str:
+        return os.path.join(self.users_dir, f"{user_id}.journal")
+
+    def append_journal(self, user_id: int, lines: List[str]) -> None:
+        # Un write + un fsync por lote: todas las ops acumuladas desde el último flush.
+        os.makedirs(self.users_dir, exist_ok=True)
+        with open(self._journal_file(user_id), "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read_journal(self, user_id: int) -> List[Dict[str, Any]]:
+        return read_journal_file(self._journal_file(user_id))
+
+    def truncate_journal(self, user_id: int) -> None:
+        try:
+            os.remove(self._journal_file(user_id))
+        except FileNotFoundError:
+            pass
+
+    def find_characters(
+        self, nombre: Optional[str] = None, apodo: Optional[str] = None, limit: int = 25
+    ) -> List[Tuple[int, str, Dict[str, Any]]]:
+        # Sin índice: recorre el directorio. Para muchos usuarios usar SqliteUserBackend.
+        out: List[Tuple[int, str, Dict[str, Any]]] = []
+        for user_id, data in iter_user_files(self.users_dir):
+            root = data.get(str(user_id), {})
+            for ch_name, ch in (root.get("personajes") or {}).items():
+                if isinstance(ch, dict) and _match(ch_name, ch, nombre, apodo):
+                    out.append((user_id, ch_name, ch))
+                    if len(out) >= limit:
+                        return out
+        return out
+
+    def iter_characters(self) -> Iterable[Tuple[int, str, Dict[str, Any]]]:
+        for user_id, data in iter_user_files(self.users_dir):
+            root = data.get(str(user_id), {})
+            for ch_name, ch in (root.get("personajes") or {}).items():
+                if isinstance(ch, dict):
+                    yield user_id, ch_name, ch
+
+
+def iter_user_files(users_dir: str) -> Iterable[Tuple[int, Dict[str, Any]]]:
+    """
+    Recorre data/users de forma perezosa (no carga el directorio entero). Cada
+    <uid>.json sale con su <uid>.journal reproducido encima, como al cargarlo en el
+    UserStore; un usuario expulsado de la cache antes de compactar puede existir
+    solo como <uid>.journal, y también se incluye.
+    """
+    if not os.path.isdir(users_dir):
+        return
+    with os.scandir(users_dir) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            stem, ext = os.path.splitext(entry.name)
+            if not stem.isdigit() or ext not in (".json", ".journal"):
+                continue
+            if ext == ".journal" and os.path.exists(os.path.join(users_dir, stem + ".json")):
+                continue  # se reproduce junto con su .json
+            data: Optional[Dict[str, Any]] = None
+            try:
+                if ext == ".json":
+                    with open(entry.path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    if not isinstance(data, dict):
+                        continue
+                entries = read_journal_file(os.path.join(users_dir, stem + ".journal"))
+            except (OSError, ValueError):
+                continue
+            data = replay_journal(data, int(stem), entries)
+            if data is not None:
+                yield int(stem), data
+
+
+# ============================================================
+# SQLite: una fila por personaje (WAL)
+# ============================================================
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS personajes (
+    user_id     INTEGER NOT NULL,
+    nombre      TEXT    NOT NULL,
+    apodo       TEXT,
+    nivel       INTEGER NOT NULL DEFAULT 1,
+    experiencia INTEGER NOT NULL DEFAULT 0,
+    data        TEXT    NOT NULL,
+    PRIMARY KEY (user_id, nombre)
+);
+CREATE INDEX IF NOT EXISTS idx_personajes_nombre ON personajes (nombre COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_personajes_apodo ON personajes (apodo COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_personajes_nivel ON personajes (nivel DESC);
+"""
+
+CharacterRow = Tuple[int, str, Optional[str], int, int, str]
+
+
+def character_rows(user_id: int, data: Dict[str, Any]) -> List[CharacterRow]:
+    root = data.get(str(user_id), {}) if isinstance(data, dict) else {}
+    rows: List[CharacterRow] = []
+    for ch_name, ch in (root.get("personajes") or {}).items():
+        if not isinstance(ch, dict):
+            continue
+        rows.append((
+            int(user_id),
+            str(ch_name),
+            ch.get("apodo"),
+            int(ch.get("nivel", 1) or 1),
+            int(ch.get("experiencia", 0) or 0),
+            json.dumps(ch, ensure_ascii=False, separators=(",", ":")),
+        ))
+    return rows
+
+
+class SqliteUserBackend(UserBackend):
+    name = "sqlite"
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._conns: List[sqlite3.Connection] = []
+        self._conns_lock = threading.Lock()
+        with self._conn() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        # Una conexión por hilo del pool; WAL deja leer mientras otro hilo escribe.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            parent = os.path.dirname(self.db_path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    def read(self, user_id: int) -> Optional[Dict[str, Any]]:
+        cur = self._conn().execute(
+            "SELECT nombre, data FROM personajes WHERE user_id = ?", (int(user_id),)
+        )
+        rows = cur.fetchall()
+        if not rows:
+            return None
+        return {str(user_id): {"personajes": {nombre: json.loads(raw) for nombre, raw in rows}}}
+
+    def serialize(self, user_id: int, data: Dict[str, Any]) -> List[CharacterRow]:
+        return character_rows(user_id, data)
+
+    def write(self, user_id: int, payload: List[CharacterRow]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM personajes WHERE user_id = ?", (int(user_id),))
+            if payload:
+                conn.executemany("INSERT INTO personajes VALUES (?, ?, ?, ?, ?, ?)", payload)
+
+    def write_many(self, rows: Iterable[CharacterRow], user_ids: Iterable[int]) -> None:
+        """Reemplaza de una vez los personajes de varios usuarios (un solo commit)."""
+        conn = self._conn()
+        with conn:
+            conn.executemany("DELETE FROM personajes WHERE user_id = ?", [(int(u),) for u in user_ids])
+            conn.executemany("INSERT INTO personajes VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def find_characters(
+        self, nombre: Optional[str] = None, apodo: Optional[str] = None, limit: int = 25
+    ) -> List[Tuple[int, str, Dict[str, Any]]]:
+        where, params = [], []
+        if nombre is not None:
+            where.append("nombre = ? COLLATE NOCASE")
+            params.append(nombre)
+        if apodo is not None:
+            where.append("apodo = ? COLLATE NOCASE")
+            params.append(apodo)
+        sql = "SELECT user_id, nombre, data FROM personajes"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " LIMIT ?"
+        params.append(int(limit))
+        return [(uid, nm, json.loads(raw)) for uid, nm, raw in self._conn().execute(sql, params)]
+
+    def iter_characters(self) -> Iterable[Tuple[int, str, Dict[str, Any]]]:
+        for uid, nm, raw in self._conn().execute("SELECT user_id, nombre, data FROM personajes"):
+            yield uid, nm, json.loads(raw)
+
+    def close(self) -> None:
+        with self._conns_lock:
+            for conn in self._conns:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._conns.clear()
+        self._local = threading.local()
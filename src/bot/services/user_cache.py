@@ -0,0 +1,148 @@
+# src/bot/services/user_cache.py
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class CacheEntry:
+    data: Dict[str, Any]
+    dirty: bool = False
+    last_access: float = field(default_factory=time.monotonic)
+
+
+class LRUUserCache:
+    """
+    Cache LRU en memoria de documentos de usuario.
+
+    Solo es estructura de datos: no toca disco. El UserStore decide cuándo
+    escribir las entradas sucias (flush periódico, al expulsar o al apagar).
+    """
+
+    def __init__(self, capacity: int = 512, ttl: Optional[float] = 900.0):
+        self.capacity = max(1, int(capacity))
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self._entries: "OrderedDict[int, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._entries
+
+    def _expired(self, entry: CacheEntry, now: float) -> bool:
+        return self.ttl is not None and (now - entry.last_access) > self.ttl
+
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        # No descarta entradas vencidas: una entrada "limpia" puede tener líneas de journal
+        # sin escribir. El UserStore las saca con pop_if_expired / pop_expired y las escribe.
+        entry.last_access = time.monotonic()
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry.data
+
+    def peek(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Como get, pero sin tocar orden LRU ni contadores."""
+        entry = self._entries.get(user_id)
+        return entry.data if entry is not None else None
+
+    def put(self, user_id: int, data: Dict[str, Any], dirty: bool = False) -> List[Tuple[int, CacheEntry]]:
+        """
+        Inserta/actualiza y devuelve las entradas expulsadas por capacidad.
+        Un put limpio nunca borra el flag dirty de una entrada existente.
+        """
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self._entries[user_id] = CacheEntry(data=data, dirty=dirty)
+        else:
+            entry.data = data
+            entry.dirty = entry.dirty or dirty
+            entry.last_access = time.monotonic()
+            self._entries.move_to_end(user_id)
+
+        evicted: List[Tuple[int, CacheEntry]] = []
+        while len(self._entries) > self.capacity:
+            evicted.append(self._entries.popitem(last=False))
+        return evicted
+
+    def mark_clean(self, user_id: int) -> None:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            entry.dirty = False
+
+    def mark_dirty(self, user_id: int) -> None:
+        entry = self._entries.get(user_id)
+        if entry is not None:
+            entry.dirty = True
+
+    def pop(self, user_id: int) -> Optional[CacheEntry]:
+        return self._entries.pop(user_id, None)
+
+    def dirty_items(self) -> Iterator[Tuple[int, CacheEntry]]:
+        return ((uid, e) for uid, e in list(self._entries.items()) if e.dirty)
+
+    def pop_if_expired(self, user_id: int) -> Optional[CacheEntry]:
+        """Saca la entrada si venció por TTL (así se recogen ediciones hechas a mano al recargar)."""
+        entry = self._entries.get(user_id)
+        if entry is None or not self._expired(entry, time.monotonic()):
+            return None
+        return self._entries.pop(user_id)
+
+    def pop_expired(self) -> List[Tuple[int, CacheEntry]]:
+        """Saca todas las entradas vencidas por TTL (sucias incluidas, para escribirlas)."""
+        if self.ttl is None:
+            return []
+        now = time.monotonic()
+        expired = [uid for uid, e in self._entries.items() if self._expired(e, now)]
+        return [(uid, self._entries.pop(uid)) for uid in expired]
+
+    def stats(self) -> Dict[str, int]:
+        dirty = sum(1 for e in self._entries.values() if e.dirty)
+        return {"entries": len(self._entries), "dirty": dirty, "hits": self.hits, "misses": self.misses}
+
+
+class NegativeCache:
+    """
+    Recuerda usuarios que NO tienen datos ("no existe archivo/filas"), así las
+    lecturas repetidas de desconocidos (=pj ver, /pj crear cancelado) no tocan disco.
+    Acotada por capacidad (LRU) y con TTL por si el dato aparece por fuera del bot
+    (migración, edición manual).
+    """
+
+    def __init__(self, capacity: int = 4096, ttl: Optional[float] = 600.0):
+        self.capacity = max(1, int(capacity))
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self._entries: "OrderedDict[int, float]" = OrderedDict()
+        self.hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, user_id: int) -> bool:
+        added = self._entries.get(user_id)
+        if added is None:
+            return False
+        if self.ttl is not None and (time.monotonic() - added) > self.ttl:
+            del self._entries[user_id]
+            return False
+        self.hits += 1
+        return True
+
+    def add(self, user_id: int) -> None:
+        self._entries[user_id] = time.monotonic()
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def discard(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
@@ -0,0 +1,164 @@
+# src/bot/services/user_journal.py
+"""
+Operaciones de mutación de personajes para el journal append-only.
+
+Cada op es un dict JSON pequeño que describe un cambio (no el personaje entero).
+Todas son idempotentes sobre un documento que ya tiene el cambio aplicado:
+  - set / unset sobrescriben un path,
+  - append no duplica si ya existe un elemento con el mismo "id",
+  - extend es un append de varios (una línea de journal por lote),
+  - remove_id no falla si el elemento ya no está,
+  - set_counts fija cantidades finales de items apilables (core/stacks.py),
+  - put_pj / del_pj reemplazan o borran el personaje completo.
+Así el cog puede mutar el personaje vivo de la cache y registrar la op después,
+y el replay tras un crash no duplica nada.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence
+
+from src.bot.core.dungeon import RUN_KEY
+from src.bot.core.inventory import indexed
+from src.bot.core.stacks import normalize_counts
+
+# Clave de nivel superior del documento de usuario con el último seq incluido en el snapshot
+JOURNAL_SEQ_KEY = "_journal_seq"
+
+Op = Dict[str, Any]
+
+
+def _characters(doc: Dict[str, Any], user_id: int) -> Dict[str, Any]:
+    root = doc.setdefault(str(user_id), {})
+    return root.setdefault("personajes", {})
+
+
+def _walk(node: Dict[str, Any], path: Sequence[str], create: bool) -> Optional[Dict[str, Any]]:
+    for key in path:
+        nxt = node.get(key)
+        if not isinstance(nxt, dict):
+            if not create:
+                return None
+            nxt = {}
+            node[key] = nxt
+        node = nxt
+    return node
+
+
+def apply_op(doc: Dict[str, Any], user_id: int, op: Op) -> None:
+    kind = op.get("op")
+    pj = op.get("pj")
+    chars = _characters(doc, user_id)
+
+    if kind == "put_pj":
+        chars[pj] = op["value"]
+        return
+    if kind == "del_pj":
+        chars.pop(pj, None)
+        return
+
+    ch = chars.get(pj)
+    if not isinstance(ch, dict):
+        return  # personaje borrado después: la op ya no aplica
+
+    path: List[str] = list(op.get("path") or [])
+    if not path:
+        return
+
+    if kind == "set":
+        parent = _walk(ch, path[:-1], create=True)
+        parent[path[-1]] = op.get("value")
+    elif kind == "unset":
+        parent = _walk(ch, path[:-1], create=False)
+        if parent is not None:
+            parent.pop(path[-1], None)
+    # Listas con "id": core/inventory.IndexedItems (búsqueda y baja por id en O(1))
+    elif kind == "append":
+        parent = _walk(ch, path[:-1], create=True)
+        indexed(parent, path[-1]).add(op.get("value"))
+    elif kind == "extend":
+        parent = _walk(ch, path[:-1], create=True)
+        indexed(parent, path[-1]).add_many(op.get("values") or [])
+    elif kind == "remove_id":
+        parent = _walk(ch, path[:-1], create=False)
+        if parent is not None and isinstance(parent.get(path[-1]), list):
+            indexed(parent, path[-1]).pop_id(op.get("id"))
+    elif kind == "set_counts":
+        parent = _walk(ch, path[:-1], create=True)
+        counts = normalize_counts(parent, path[-1])
+        for item_id, n in (op.get("values") or {}).items():
+            if int(n) > 0:
+                counts[item_id] = int(n)
+            else:
+                counts.pop(item_id, None)
+    else:
+        raise ValueError(f"op de journal desconocida: {kind}")
+
+
+# ============================================================
+# Constructores de ops por dominio
+# ============================================================
+def op_put_character(pj: str, ch: Dict[str, Any]) -> Op:
+    return {"op": "put_pj", "pj": pj, "value": ch}
+
+
+def op_delete_character(pj: str) -> Op:
+    return {"op": "del_pj", "pj": pj}
+
+
+def op_set(pj: str, path: Sequence[str], value: Any) -> Op:
+    return {"op": "set", "pj": pj, "path": list(path), "value": value}
+
+
+def op_equip(pj: str, slot: str, item: Optional[Dict[str, Any]]) -> Op:
+    return op_set(pj, ["equipamiento", "artefactos", slot], item)
+
+
+def op_unequip(pj: str, slot: str) -> Op:
+    return op_equip(pj, slot, None)
+
+
+def op_equip_weapon(pj: str, item: Optional[Dict[str, Any]]) -> Op:
+    return op_set(pj, ["equipamiento", "arma_principal"], item)
+
+
+def op_set_bonus_totals(pj: str, totals: Dict[str, Any]) -> Op:
+    # Totales absolutos (core/stats.py: bonus_totals_after), no el delta: replay idempotente
+    return op_set(pj, ["bonos_equipo"], totals)
+
+
+def op_add_item(pj: str, bucket: str, item: Dict[str, Any]) -> Op:
+    return {"op": "append", "pj": pj, "path": ["inventario", bucket], "value": item}
+
+
+def op_add_items(pj: str, bucket: str, items: List[Dict[str, Any]]) -> Op:
+    return {"op": "extend", "pj": pj, "path": ["inventario", bucket], "values": items}
+
+
+def op_remove_item(pj: str, bucket: str, item_id: str) -> Op:
+    return {"op": "remove_id", "pj": pj, "path": ["inventario", bucket], "id": item_id}
+
+
+def op_set_stacks(pj: str, bucket: str, finales: Dict[str, int]) -> Op:
+    # Cantidades finales por item_id (0 borra la entrada), nunca deltas
+    return {"op": "set_counts", "pj": pj, "path": ["inventario", bucket], "values": finales}
+
+
+def op_set_dungeon(pj: str, run: Optional[Dict[str, Any]]) -> Op:
+    # Corrida compacta (core/dungeon.Run.to_dict: seed, camino, resultados); None la cierra
+    if run is None:
+        return {"op": "unset", "pj": pj, "path": [RUN_KEY]}
+    return op_set(pj, [RUN_KEY], run)
+
+
+def op_set_level(pj: str, nivel: int, estadisticas: Dict[str, Any]) -> List[Op]:
+    # Subir de nivel también toca las stats base (mejora_atributos_por_nivel)
+    return [op_set(pj, ["nivel"], int(nivel)), op_set(pj, ["estadisticas"], estadisticas)]
+
+
+def op_add_xp(pj: str, experiencia_total: int) -> Op:
+    # Se registra el valor resultante (no el delta) para que el replay sea idempotente
+    return op_set(pj, ["experiencia"], int(experiencia_total))
+
+
+def op_set_skills(pj: str, habilidades: List[Dict[str, Any]]) -> Op:
+    return op_set(pj, ["kit_habilidades", "habilidades_aprendibles"], habilidades)
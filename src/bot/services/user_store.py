@@ -0,0 +1,459 @@
+# src/bot/services/user_store.py
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from src.bot.services.user_backends import JsonUserBackend, UserBackend, empty_user_doc, replay_journal
+from src.bot.services.user_cache import CacheEntry, LRUUserCache, NegativeCache
+from src.bot.services.user_journal import JOURNAL_SEQ_KEY, Op, apply_op
+
+log = logging.getLogger(__name__)
+
+# Listener de mutaciones: (user_id, ops de la transacción) o (user_id, None) si se
+# guardó el documento entero con `save`. Se llama en el event loop, tras aplicar.
+CommitListener = Callable[[int, Optional[List[Op]]], None]
+
+# ============================================================
+# Paths (relativo al archivo, igual que en los cogs)
+# ============================================================
+SERVICES_DIR = os.path.dirname(os.path.abspath(__file__))  # .../src/bot/services
+BOT_DIR = os.path.dirname(SERVICES_DIR)                    # .../src/bot
+DEFAULT_USERS_DIR = os.path.join(BOT_DIR, "data", "users") # .../src/bot/data/users
+DEFAULT_USERS_DB = os.path.join(BOT_DIR, "data", "users.sqlite3")
+
+# Hilos dedicados al disco: acotado para que un pico de comandos no abra
+# cientos de escrituras simultáneas.
+DEFAULT_IO_WORKERS = 4
+
+DEFAULT_CACHE_SIZE = 512
+DEFAULT_CACHE_TTL = 900.0       # segundos sin uso antes de soltar la entrada
+DEFAULT_FLUSH_INTERVAL = 5.0    # segundos entre flushes de entradas sucias / journal
+DEFAULT_COMPACT_OPS = 200       # ops en journal antes de reescribir el snapshot
+
+
+class UserTransaction:
+    """
+    Vista de un usuario mientras se tiene su lock (ver UserStore.transaction).
+    Las ops registradas con `apply` se confirman juntas al salir del bloque sin error.
+    """
+
+    def __init__(self, user_id: int, data: Dict[str, Any]):
+        self.user_id = user_id
+        self.data = data
+        self.ops: List[Op] = []
+
+    @property
+    def root(self) -> Dict[str, Any]:
+        root = self.data.setdefault(str(self.user_id), {})
+        root.setdefault("personajes", {})
+        return root
+
+    def apply(self, *ops: Op) -> None:
+        self.ops.extend(ops)
+
+
+class UserStore:
+    """
+    API async para los documentos de usuario ({user_id: {"personajes": {...}}}).
+
+    - La persistencia real es un UserBackend enchufable (JSON por usuario por
+      defecto, o SQLite); toda su lectura/escritura corre en un ThreadPoolExecutor
+      acotado, así el event loop nunca se bloquea esperando al disco.
+    - Delante del disco hay una cache LRU write-back: `load` devuelve el documento
+      vivo de la cache y `save` solo lo marca sucio. Un flusher en segundo plano
+      escribe cada usuario sucio una vez por intervalo (varias saves = 1 escritura).
+    - `apply` registra mutaciones pequeñas (ver user_journal.py). Si el backend
+      soporta journal, solo se anexan esas ops (un fsync por usuario y flush) y el
+      snapshot completo se reescribe al compactar; al cargar se reproduce el journal.
+    - Las entradas expulsadas (capacidad/TTL) se escriben antes de soltarse.
+    - Leer nunca escribe: un usuario sin datos recibe un documento vacío en memoria
+      (y queda en una cache negativa); el archivo aparece con la primera mutación.
+    - `transaction(user_id)` serializa leer-validar-mutar por usuario con un
+      asyncio.Lock, así dos comandos simultáneos del mismo usuario no se pisan.
+    """
+
+    def __init__(
+        self,
+        users_dir: str = DEFAULT_USERS_DIR,
+        backend: Optional[UserBackend] = None,
+        max_workers: int = DEFAULT_IO_WORKERS,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        cache_ttl: Optional[float] = DEFAULT_CACHE_TTL,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        compact_ops: int = DEFAULT_COMPACT_OPS,
+    ):
+        self.backend: UserBackend = backend or JsonUserBackend(users_dir)
+        self.flush_interval = max(0.05, float(flush_interval))
+        self.compact_ops = max(1, int(compact_ops))
+        self.cache = LRUUserCache(capacity=cache_size, ttl=cache_ttl)
+        self.missing = NegativeCache()
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="user-store")
+        self._closed = False
+        self._flush_task: Optional[asyncio.Task] = None
+        # Última escritura encolada por usuario: las escrituras de un mismo usuario
+        # se encadenan para que nunca compitan por el .tmp ni lleguen desordenadas.
+        self._writes: Dict[int, asyncio.Future] = {}
+        self._background: Set[asyncio.Task] = set()
+        # Journal: líneas aún no escritas y largo del journal en disco por usuario
+        self._pending_ops: Dict[int, List[str]] = {}
+        self._journal_len: Dict[int, int] = {}
+        # Un lock por usuario; se libera solo cuando ninguna transacción lo referencia.
+        self._locks: "weakref.WeakValueDictionary[int, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # Índices derivados (cache de stats, rankings, ...) que reaccionan a cada commit
+        self._listeners: List[CommitListener] = []
+
+    @property
+    def _journaled(self) -> bool:
+        return self.backend.supports_journal
+
+    # ---------- sync (solo se ejecuta dentro del pool) ----------
+    def _load_sync(self, user_id: int) -> Tuple[Optional[Dict[str, Any]], int]:
+        data = self.backend.read(user_id)
+        if self._journaled:
+            entries = self.backend.read_journal(user_id)
+            if entries:
+                return replay_journal(data, user_id, entries), len(entries)
+        return data or None, 0
+
+    def _snapshot_sync(self, user_id: int, payload: Any) -> None:
+        self.backend.write(user_id, payload)
+        if self._journaled:
+            self.backend.truncate_journal(user_id)
+
+    # ---------- async helpers ----------
+    async def _run(self, fn, *args):
+        if self._closed:
+            raise RuntimeError("UserStore cerrado")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def _chained_write(self, prev: Optional[asyncio.Future], fn, *args) -> None:
+        if prev is not None:
+            try:
+                await prev
+            except Exception:
+                pass  # el error ya se reportó en su propia escritura
+        await self._run(fn, *args)
+
+    def _schedule_write(self, user_id: int, fn, *args) -> asyncio.Future:
+        """
+        Encola la escritura y la registra de inmediato (sin await de por medio), así
+        un `load` posterior ya la ve en vuelo y espera antes de leer el disco.
+        """
+        fut = asyncio.ensure_future(self._chained_write(self._writes.get(user_id), fn, *args))
+        self._writes[user_id] = fut
+
+        def _done(f: asyncio.Future, uid: int = user_id) -> None:
+            if self._writes.get(uid) is f:
+                del self._writes[uid]
+
+        fut.add_done_callback(_done)
+        return fut
+
+    def _track(self, coro) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    async def _watch_write(self, user_id: int, entry: CacheEntry, fut: asyncio.Future) -> None:
+        try:
+            await fut
+        except Exception:
+            log.exception("No se pudo escribir el usuario %s", user_id)
+            # Si sigue en cache, reintentamos en el próximo flush; si fue expulsada, la devolvemos.
+            if user_id in self.cache:
+                self.cache.mark_dirty(user_id)
+            else:
+                self._handle_evicted(self.cache.put(user_id, entry.data, dirty=True))
+
+    async def _watch_journal(self, user_id: int, lines: List[str], fut: asyncio.Future) -> None:
+        try:
+            await fut
+        except Exception:
+            log.exception("No se pudo anexar el journal del usuario %s", user_id)
+            # Devolver las líneas al frente para el próximo flush (mantienen su orden de seq)
+            self._pending_ops[user_id] = lines + self._pending_ops.get(user_id, [])
+
+    def _write_entry(self, user_id: int, entry: CacheEntry) -> asyncio.Task:
+        # Serializar en el loop da un snapshot consistente (nadie muta el dict a la vez);
+        # solo el I/O va al pool. El snapshot incluye todas las ops aplicadas, así que
+        # las líneas pendientes sobran y el journal en disco se trunca tras escribirlo.
+        payload = self.backend.serialize(user_id, entry.data)
+        self._pending_ops.pop(user_id, None)
+        if self._journaled:
+            self._journal_len[user_id] = 0
+        fut = self._schedule_write(user_id, self._snapshot_sync, user_id, payload)
+        return self._track(self._watch_write(user_id, entry, fut))
+
+    def _write_journal(self, user_id: int) -> Optional[asyncio.Task]:
+        lines = self._pending_ops.pop(user_id, None)
+        if not lines:
+            return None
+        fut = self._schedule_write(user_id, self.backend.append_journal, user_id, lines)
+        return self._track(self._watch_journal(user_id, lines, fut))
+
+    def _handle_evicted(self, evicted) -> None:
+        for uid, entry in evicted:
+            if entry.dirty:
+                self._write_entry(uid, entry)
+            else:
+                self._write_journal(uid)
+            self._journal_len.pop(uid, None)
+
+    def _ensure_flusher(self) -> None:
+        if self._flush_task is None and not self._closed:
+            self._flush_task = asyncio.ensure_future(self._flush_loop())
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                self._handle_evicted(self.cache.pop_expired())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Error en el flush periódico de usuarios")
+
+    # ---------- API ----------
+    async def load(self, user_id: int) -> Dict[str, Any]:
+        """
+        Devuelve el documento completo del usuario ({user_id: {"personajes": {...}}}).
+        Es el objeto vivo de la cache: mutarlo y luego llamar a `save`/`apply` lo persiste.
+        Si el usuario no tiene datos devuelve un documento vacío nuevo, sin escribir nada.
+        """
+        # Vencida por TTL: sale por _handle_evicted, que escribe antes su snapshot o sus
+        # líneas de journal pendientes; la lectura de abajo espera esa escritura.
+        expired = self.cache.pop_if_expired(user_id)
+        if expired is not None:
+            self._handle_evicted([(user_id, expired)])
+        cached = self.cache.get(user_id)
+        if cached is not None:
+            return cached
+        if user_id in self.missing:
+            return empty_user_doc(user_id)
+
+        # Si hay una escritura en vuelo (p.ej. entrada recién expulsada), esperar a que aterrice.
+        pending = self._writes.get(user_id)
+        if pending is not None:
+            try:
+                await pending
+            except Exception:
+                pass
+
+        data, journal_len = await self._run(self._load_sync, user_id)
+        # Otro comando pudo haberlo cargado mientras leíamos: gana el de la cache.
+        cached = self.cache.peek(user_id)
+        if cached is not None:
+            return cached
+        if data is None:
+            self.missing.add(user_id)
+            return empty_user_doc(user_id)
+        if journal_len:
+            self._journal_len[user_id] = journal_len
+            self._ensure_flusher()
+        # Journal largo heredado (p.ej. tras un crash): se compacta en el próximo flush.
+        compact = journal_len >= self.compact_ops
+        self._handle_evicted(self.cache.put(user_id, data, dirty=compact))
+        return data
+
+    async def save(self, user_id: int, data: Dict[str, Any]) -> None:
+        """Marca el documento como sucio; el flusher lo escribe completo en el próximo intervalo."""
+        if self._closed:
+            raise RuntimeError("UserStore cerrado")
+        self._ensure_flusher()
+        self.missing.discard(user_id)
+        self._handle_evicted(self.cache.put(user_id, data, dirty=True))
+        self._notify(user_id, None)
+
+    def add_listener(self, listener: CommitListener) -> None:
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: CommitListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, user_id: int, ops: Optional[List[Op]]) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(user_id, ops)
+            except Exception:
+                log.exception("Error en listener de commits de usuario")
+
+    def _lock_for(self, user_id: int) -> asyncio.Lock:
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[user_id] = lock
+        return lock
+
+    @contextlib.asynccontextmanager
+    async def transaction(self, user_id: int) -> AsyncIterator[UserTransaction]:
+        """
+        Uso:
+            async with store.transaction(user_id) as tx:
+                ch = tx.root["personajes"].get(nombre)
+                ...validar / mutar...
+                tx.apply(op_equip(nombre, slot, item))
+
+        Mientras dura el bloque nadie más muta a ese usuario. Las ops se aplican y
+        registran al salir; si el bloque lanza una excepción se descartan. Ninguna
+        transacción escribe a disco: todas las que se encolan tras el lock dentro de
+        un intervalo se vuelcan juntas en el próximo flush (una escritura por usuario).
+        """
+        if self._closed:
+            raise RuntimeError("UserStore cerrado")
+        lock = self._lock_for(user_id)
+        async with lock:
+            data = await self.load(user_id)
+            tx = UserTransaction(user_id, data)
+            yield tx
+            if tx.ops:
+                self._commit(user_id, data, tx.ops)
+
+    async def apply(self, user_id: int, ops: List[Op]) -> Dict[str, Any]:
+        """
+        Atajo: una transacción que solo registra `ops` (user_journal.op_*).
+        No llamar dentro de `transaction` del mismo usuario (usar tx.apply).
+        """
+        async with self.transaction(user_id) as tx:
+            tx.apply(*ops)
+        return tx.data
+
+    def _commit(self, user_id: int, data: Dict[str, Any], ops: List[Op]) -> None:
+        # Las ops son idempotentes: el cog puede haber mutado ya el personaje vivo a mano.
+        self._ensure_flusher()
+        self.missing.discard(user_id)
+        if not self._journaled:
+            for op in ops:
+                apply_op(data, user_id, op)
+            self._handle_evicted(self.cache.put(user_id, data, dirty=True))
+            self._notify(user_id, ops)
+            return
+
+        seq = int(data.get(JOURNAL_SEQ_KEY, 0))
+        lines = self._pending_ops.setdefault(user_id, [])
+        for op in ops:
+            apply_op(data, user_id, op)
+            seq += 1
+            lines.append(json.dumps({"seq": seq, "op": op}, ensure_ascii=False, separators=(",", ":")))
+        data[JOURNAL_SEQ_KEY] = seq
+        self._journal_len[user_id] = self._journal_len.get(user_id, 0) + len(ops)
+        # Re-insertar por si la entrada se expulsó mientras el bloque esperaba
+        self._handle_evicted(self.cache.put(user_id, data))
+        self._notify(user_id, ops)
+
+    async def find_characters(
+        self, nombre: Optional[str] = None, apodo: Optional[str] = None, limit: int = 25
+    ) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """
+        Búsqueda entre todos los usuarios (staff). Primero vuelca lo pendiente para
+        que el backend vea los últimos cambios; con SQLite la consulta usa índices.
+        """
+        await self.flush(compact_all=self._journaled)
+        if self._writes:
+            await asyncio.gather(*list(self._writes.values()), return_exceptions=True)
+        return await self._run(self.backend.find_characters, nombre, apodo, limit)
+
+    async def scan_characters(self, fn: Callable[[int, str, Dict[str, Any]], Any]) -> List[Any]:
+        """
+        Aplica `fn(user_id, nombre, personaje)` a todos los personajes persistidos y
+        devuelve los resultados que no sean None. Vuelca lo pendiente antes (como
+        find_characters) y recorre el backend en el pool: `fn` corre fuera del event
+        loop y no debe tocar el store. Pensado para construir índices derivados.
+        """
+        await self.flush(compact_all=self._journaled)
+        if self._writes:
+            await asyncio.gather(*list(self._writes.values()), return_exceptions=True)
+
+        def scan() -> List[Any]:
+            out = []
+            for uid, nm, ch in self.backend.iter_characters():
+                res = fn(uid, nm, ch)
+                if res is not None:
+                    out.append(res)
+            return out
+
+        return await self._run(scan)
+
+    async def flush(self, compact_all: bool = False) -> int:
+        """
+        Escribe lo pendiente: snapshots de entradas sucias (o con journal largo) y
+        ops del journal del resto. Devuelve cuántos usuarios se escribieron.
+        """
+        for uid, n in list(self._journal_len.items()):
+            if n and (compact_all or n >= self.compact_ops):
+                self.cache.mark_dirty(uid)
+
+        tasks: List[asyncio.Task] = []
+        for uid, entry in list(self.cache.dirty_items()):
+            # Se limpia antes de escribir: una save durante la escritura lo vuelve a ensuciar.
+            self.cache.mark_clean(uid)
+            tasks.append(self._write_entry(uid, entry))
+        for uid in list(self._pending_ops):
+            task = self._write_journal(uid)
+            if task is not None:
+                tasks.append(task)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        return len(tasks)
+
+    async def close(self) -> None:
+        """Detiene el flusher, compacta/escribe todo lo pendiente y libera el pool."""
+        if self._closed:
+            return
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+
+        written = await self.flush(compact_all=True)
+        if self._background:
+            await asyncio.gather(*list(self._background), return_exceptions=True)
+        if self._writes:
+            await asyncio.gather(*list(self._writes.values()), return_exceptions=True)
+
+        self._closed = True
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown, True)
+        self.backend.close()
+        log.info("UserStore cerrado (%d usuarios escritos al cerrar).", written)
+
+    def drain_sync(self) -> int:
+        """
+        Último recurso para el apagado: escribe de forma síncrona lo que siga sucio
+        cuando el event loop ya no existe (p.ej. salida por señal antes de close()).
+        """
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        written = 0
+        for uid, entry in list(self.cache.dirty_items()):
+            try:
+                self._snapshot_sync(uid, self.backend.serialize(uid, entry.data))
+                self.cache.mark_clean(uid)
+                self._pending_ops.pop(uid, None)
+                written += 1
+            except Exception:
+                log.exception("No se pudo escribir el usuario %s al apagar", uid)
+        for uid, lines in list(self._pending_ops.items()):
+            try:
+                self.backend.append_journal(uid, lines)
+                del self._pending_ops[uid]
+                written += 1
+            except Exception:
+                log.exception("No se pudo anexar el journal del usuario %s al apagar", uid)
+        self.backend.close()
+        return written
@@ -1,132 +1,236 @@
 # src/bot/utils/artefact_gen.py
+"""
+Generador de artefactos. Las reglas (stats, valores base, multiplicadores por
+rareza, pesos de tipo) salen de data/items/artefactos.json, compiladas en
+core/artefact_rules.py; acá solo se tira el dado.
+
+Ids: `ARTEFACT_IDS` (core/inventory.IdAllocator, monótono y único por proceso).
+Seeds: sin seed explícito, cada tirada toma uno nuevo de `next_seed()`, un stream
+propio sembrado desde os.urandom (antes era el milisegundo actual, y dos tiradas en
+el mismo milisegundo salían iguales).
+
+El cog pasa `rules=game_data.artefact_rules` (sigue la recarga en caliente);
+sin `rules` se usan las del archivo por defecto, compiladas una vez.
+
+Para lotes (loot, eventos) `generate_artefacts` saca del seed del lote un seed por
+artefacto, asigna los ids en bloque y devuelve registros compactos (tuplas de
+índices a las tablas compiladas); `expand_artefact` los convierte al dict de
+inventario al guardarlos. Cada artefacto guarda su propio seed, igual que una
+tirada suelta: `generate_artefact(slot, rareza, seed=item["seed"])` lo reproduce.
+"""
 from __future__ import annotations
 
+import functools
+import os
 import random
-import time
-import uuid
-from typing import Optional
-
-COMMON_STATS = ["vida","ataque","poder_magico","armadura","resistencia_magica","probabilidad_critica","danio_critico"]
-
-MAIN_TYPES = {
-    "baston": ("vida", "plano"),
-    "arma_artefacto": (["ataque","poder_magico"], "plano"),
-    "caliz": (COMMON_STATS, "porcentaje"),
-    "moneda": (["evasion","suerte","aura","inmortalidad","bloqueo","mana"], "mixed")
-}
-
-RARITY_MAIN_MULT = {1:1.00, 2:1.30, 3:1.60, 4:1.90, 5:2.30}
-RARITY_SUB_MULT  = {1:1.00, 2:1.20, 3:1.40, 4:1.60, 5:1.85}
-
-BASE_MAIN = {
-    ("vida","plano"): 120,
-    ("ataque","plano"): 12,
-    ("poder_magico","plano"): 10,
-
-    ("vida","porcentaje"): 0.08,
-    ("ataque","porcentaje"): 0.06,
-    ("poder_magico","porcentaje"): 0.06,
-    ("armadura","porcentaje"): 0.07,
-    ("resistencia_magica","porcentaje"): 0.07,
-    ("probabilidad_critica","porcentaje"): 0.03,
-    ("danio_critico","porcentaje"): 0.06,
-
-    ("evasion","porcentaje"): 0.06,
-    ("suerte","porcentaje"): 0.06,
-    ("aura","porcentaje"): 0.06,
-    ("inmortalidad","porcentaje"): 0.03,
-    ("bloqueo","porcentaje"): 0.03,
-    ("mana","plano"): 25
-}
-
-BASE_SUB = {
-    ("vida","plano"): 30,
-    ("ataque","plano"): 3,
-    ("poder_magico","plano"): 3,
-    ("armadura","plano"): 4,
-    ("resistencia_magica","plano"): 4,
-
-    ("vida","porcentaje"): 0.03,
-    ("ataque","porcentaje"): 0.02,
-    ("poder_magico","porcentaje"): 0.02,
-    ("armadura","porcentaje"): 0.025,
-    ("resistencia_magica","porcentaje"): 0.025,
-    ("probabilidad_critica","porcentaje"): 0.01,
-    ("danio_critico","porcentaje"): 0.02,
-
-    ("mana","plano"): 8
-}
-
-def _roll_tipo(rng: random.Random) -> str:
-    return "plano" if rng.random() < 0.55 else "porcentaje"
-
-def generate_artefact(slot: str, rareza: int, seed: Optional[int] = None) -> dict:
+import threading
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from src.bot.core.artefact_rules import ARTEFACTOS_FILE, ArtefactRules, SubTable
+from src.bot.core.game_data import DEFAULT_DATA_DIR, read_data_file
+from src.bot.core.inventory import id_allocator
+
+ARTEFACT_IDS = id_allocator("af_")
+
+_seed_lock = threading.Lock()
+_seed_rng = random.Random(os.urandom(16))
+
+
+def next_seed() -> int:
+    with _seed_lock:
+        return _seed_rng.getrandbits(63)
+
+
+def _reseed_after_fork() -> None:
+    global _seed_lock
+    _seed_lock = threading.Lock()
+    _seed_rng.seed(os.urandom(16))
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reseed_after_fork)
+
+
+@functools.lru_cache(maxsize=1)
+def default_rules() -> ArtefactRules:
+    return ArtefactRules.compile(read_data_file(os.path.join(DEFAULT_DATA_DIR, *ARTEFACTOS_FILE.split("/"))))
+
+
+def _sample_subs(rng: random.Random, table: SubTable, k: int) -> List[int]:
+    """k índices de `table.pairs` por muestreo ponderado sin reemplazo (k pasadas sobre la tabla)."""
+    idx = list(range(len(table.pairs)))
+    weights = list(table.weights)
+    total = sum(weights)
+    out: List[int] = []
+    for _ in range(k):
+        r = rng.random() * total
+        j = 0
+        acc = weights[0]
+        while r >= acc and j < len(weights) - 1:
+            j += 1
+            acc += weights[j]
+        out.append(idx.pop(j))
+        total -= weights.pop(j)
+    return out
+
+
+def generate_artefact(
+    slot: str, rareza: int, seed: Optional[int] = None, rules: Optional[ArtefactRules] = None
+) -> dict:
     slot = str(slot).strip().lower()
     rareza = int(rareza)
+    rules = rules or default_rules()
 
-    if slot not in MAIN_TYPES:
+    slot_rules = rules.slot(slot)
+    if slot_rules is None:
         raise ValueError(f"slot inválido: {slot}")
-    if rareza not in {1,2,3,4,5}:
+    if rareza not in rules.rarezas:
         raise ValueError(f"rareza inválida: {rareza}")
 
-    seed = seed if seed is not None else int(time.time() * 1000)
+    seed = seed if seed is not None else next_seed()
     rng = random.Random(seed)
 
-    # Main
-    main_stat, main_tipo = MAIN_TYPES[slot]
-    if slot == "arma_artefacto":
-        main_stat = rng.choice(main_stat)
-    elif slot == "caliz":
-        main_stat = rng.choice(main_stat)
-    elif slot == "moneda":
-        main_stat = rng.choice(main_stat)
-        main_tipo = "plano" if main_stat == "mana" else "porcentaje"
-
-    base_main = BASE_MAIN[(main_stat, main_tipo)]
-    main_val = base_main * RARITY_MAIN_MULT[rareza]
-
-    subs = []
-    used = set()
-
-    def forbidden(stat: str, tipo: str) -> bool:
-        key = f"{stat}:{tipo}"
-        if slot == "baston" and key == "vida:plano":
-            return True
-        if slot == "arma_artefacto" and key in {"ataque:plano","poder_magico:plano"}:
-            return True
-        if slot == "caliz" and stat == main_stat:
-            return True
-        return False
-
-    while len(subs) < 4:
-        stat = rng.choice(COMMON_STATS)
-        tipo = _roll_tipo(rng)
-
-        if forbidden(stat, tipo):
-            continue
-        if (stat, tipo) in used:
-            continue
-
-        base_sub = BASE_SUB.get((stat, tipo))
-        if base_sub is None:
-            continue
-
-        val = base_sub * RARITY_SUB_MULT[rareza]
-        val = round(val, 4) if tipo == "porcentaje" else round(val, 2)
-
-        used.add((stat, tipo))
-        subs.append({"estadistica": stat, "tipo": tipo, "valor": val})
+    main = slot_rules.mains[0] if len(slot_rules.mains) == 1 else rng.choice(slot_rules.mains)
+    sub_values = main.subs.values[rareza]
+    subs = [
+        {"estadistica": main.subs.pairs[i][0], "tipo": main.subs.pairs[i][1], "valor": sub_values[i]}
+        for i in _sample_subs(rng, main.subs, slot_rules.secondary_count)
+    ]
 
     return {
-        "id": f"af_{uuid.uuid4().hex[:8]}",
+        "id": ARTEFACT_IDS.next(),
         "slot": slot,
         "rareza": rareza,
         "nombre": f"{slot.title()} R{rareza}",
         "atributo_principal": {
-            "estadistica": main_stat,
-            "tipo": main_tipo,
-            "valor": round(main_val, 4 if main_tipo == "porcentaje" else 2)
+            "estadistica": main.stat,
+            "tipo": main.tipo,
+            "valor": main.values[rareza],
         },
         "atributos_secundarios": subs,
-        "seed": seed
+        "seed": seed,
     }
+
+
+# ============================================================
+# Lotes: un RNG, ids en bloque, registros compactos
+# ============================================================
+# (id, slot, rareza, índice del principal en SlotRules.mains, índices de substats en SubTable.pairs, seed)
+ArtefactRecord = Tuple[str, str, int, int, Tuple[int, ...], int]
+
+SlotMix = Union[str, Sequence[str], Mapping[str, float], None]
+MIX = "mix"
+
+
+def _slot_weights(rules: ArtefactRules, slot_or_mix: SlotMix) -> Tuple[List[str], List[float]]:
+    if slot_or_mix is None or slot_or_mix == MIX:
+        slots: Dict[str, float] = {s: 1.0 for s in rules.slots}
+    elif isinstance(slot_or_mix, str):
+        slots = {slot_or_mix.strip().lower(): 1.0}
+    elif isinstance(slot_or_mix, Mapping):
+        slots = {str(s).strip().lower(): float(w) for s, w in slot_or_mix.items() if float(w) > 0}
+    else:
+        slots = {str(s).strip().lower(): 1.0 for s in slot_or_mix}
+    for slot in slots:
+        if rules.slot(slot) is None:
+            raise ValueError(f"slot inválido: {slot}")
+    if not slots:
+        raise ValueError("sin slots para generar")
+    names = list(slots)
+    cum, acc = [], 0.0
+    for name in names:
+        acc += slots[name]
+        cum.append(acc)
+    return names, cum
+
+
+def generate_artefacts(
+    slot_or_mix: SlotMix,
+    rareza: int,
+    n: int,
+    seed: Optional[int] = None,
+    rules: Optional[ArtefactRules] = None,
+) -> List[ArtefactRecord]:
+    """
+    `n` artefactos de un slot, de una lista/dict de slots con pesos, o "mix" (todos
+    por igual). El stream del lote elige el slot y el seed de cada artefacto; el
+    contenido sale de ese seed con los mismos pasos que generate_artefact, así que
+    cada registro se puede auditar suelto. Con el mismo seed el lote es
+    reproducible (salvo los ids).
+    """
+    rules = rules or default_rules()
+    rareza = int(rareza)
+    if rareza not in rules.rarezas:
+        raise ValueError(f"rareza inválida: {rareza}")
+    n = max(0, int(n))
+    names, cum = _slot_weights(rules, slot_or_mix)
+
+    stream = random.Random(seed if seed is not None else next_seed())
+    rng = random.Random()
+    # Por slot: (range de principales, [(pesos, total) por principal], secondary_count)
+    plans = []
+    for name in names:
+        sr = rules.slots[name]
+        plans.append((name, range(len(sr.mains)), [(list(m.subs.weights), sum(m.subs.weights)) for m in sr.mains], sr.secondary_count))
+    total_slots = cum[-1]
+    single = len(plans) == 1
+
+    out: List[ArtefactRecord] = []
+    append = out.append
+    for item_id in ARTEFACT_IDS.block(n):
+        if single:
+            name, mains, tables, k = plans[0]
+        else:
+            r = stream.random() * total_slots
+            j = 0
+            while r >= cum[j] and j < len(cum) - 1:
+                j += 1
+            name, mains, tables, k = plans[j]
+        item_seed = stream.getrandbits(63)
+        rng.seed(item_seed)
+        rand = rng.random
+        # Mismo orden de tiradas que generate_artefact: choice del principal y _sample_subs
+        main = mains[0] if len(mains) == 1 else rng.choice(mains)
+        base_weights, total = tables[main]
+
+        # Muestreo ponderado sin reemplazo (como _sample_subs, inline por velocidad)
+        weights = base_weights[:]
+        idx = list(range(len(weights)))
+        picked = []
+        for _ in range(k):
+            r = rand() * total
+            j = 0
+            acc = weights[0]
+            last = len(weights) - 1
+            while r >= acc and j < last:
+                j += 1
+                acc += weights[j]
+            picked.append(idx.pop(j))
+            total -= weights.pop(j)
+        append((item_id, name, rareza, main, tuple(picked), item_seed))
+    return out
+
+
+def expand_artefact(record: ArtefactRecord, rules: Optional[ArtefactRules] = None) -> dict:
+    """Registro compacto -> dict de inventario (mismo formato que generate_artefact)."""
+    rules = rules or default_rules()
+    item_id, slot, rareza, main_idx, subs, seed = record
+    main = rules.slots[slot].mains[main_idx]
+    values = main.subs.values[rareza]
+    pairs = main.subs.pairs
+    return {
+        "id": item_id,
+        "slot": slot,
+        "rareza": rareza,
+        "nombre": f"{slot.title()} R{rareza}",
+        "atributo_principal": {"estadistica": main.stat, "tipo": main.tipo, "valor": main.values[rareza]},
+        "atributos_secundarios": [
+            {"estadistica": pairs[i][0], "tipo": pairs[i][1], "valor": values[i]} for i in subs
+        ],
+        "seed": seed,
+    }
+
+
+def expand_artefacts(records: Iterable[ArtefactRecord], rules: Optional[ArtefactRules] = None) -> List[dict]:
+    rules = rules or default_rules()
+    return [expand_artefact(r, rules) for r in records]
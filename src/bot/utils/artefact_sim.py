@@ -0,0 +1,319 @@
+# src/bot/utils/artefact_sim.py
+"""
+Simulación Monte Carlo del generador de artefactos (balance + benchmark).
+
+Uso:
+    python -m src.bot.utils.artefact_sim --tiradas 1000000 --seed 42
+    python -m src.bot.utils.artefact_sim --slot caliz --rareza 5 --csv caliz.csv
+    python -m src.bot.utils.artefact_sim --modo individual --tiradas 200000
+
+Por cada (slot, rareza) reporta:
+  - frecuencia de cada stat principal,
+  - frecuencia de cada par de substat (estadistica, tipo),
+  - percentiles del valor que aporta cada (estadistica, tipo) por artefacto
+    (principal + substat; 0 si no sale),
+  - reintentos por rechazo esperados por tirada (0: el muestreo es acotado),
+  - tiradas/s del generador, para ver regresiones de velocidad junto al balance.
+
+Las tiradas se parten en bloques de tamaño fijo con un seed derivado de
+(seed, slot, rareza, bloque), así que con el mismo --seed el resultado es el
+mismo sin importar cuántos procesos se usen. Cada proceso solo cuenta índices
+(principal, substat); como los valores son fijos por rareza, las distribuciones
+de valores salen exactas de esos conteos.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import functools
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.bot.core.artefact_rules import ARTEFACTOS_FILE, ArtefactRules, SlotRules
+from src.bot.core.game_data import DEFAULT_DATA_DIR, read_data_file
+from src.bot.utils.artefact_gen import generate_artefact, generate_artefacts
+
+MODOS = ("lote", "individual")
+CHUNK = 100_000
+PERCENTILES = (10, 50, 90, 99)
+
+CSV_FIELDS = [
+    "seccion", "slot", "rareza", "estadistica", "tipo", "tiradas", "cuenta", "frecuencia",
+    *(f"p{q}" for q in PERCENTILES), "media", "tiradas_s", "reintentos_por_tirada",
+]
+
+
+@functools.lru_cache(maxsize=4)
+def _rules(data_dir: str) -> ArtefactRules:
+    return ArtefactRules.compile(read_data_file(os.path.join(data_dir, *ARTEFACTOS_FILE.split("/"))))
+
+
+def _chunk_seed(seed: int, slot: str, rareza: int, index: int) -> int:
+    # random.Random con str usa sha512: estable entre procesos (no depende de PYTHONHASHSEED)
+    return random.Random(f"{seed}:{slot}:{rareza}:{index}").getrandbits(63)
+
+
+# ============================================================
+# Trabajo por bloque (corre en los procesos del pool)
+# ============================================================
+@dataclass
+class ChunkResult:
+    slot: str
+    rareza: int
+    tiradas: int
+    mains: List[int]                      # tiradas por índice de principal
+    subs: Dict[Tuple[int, int], int]      # (principal, índice de substat) -> tiradas
+    segundos: float                       # solo generación
+
+
+def _run_chunk(data_dir: str, modo: str, slot: str, rareza: int, n: int, seed: int) -> ChunkResult:
+    rules = _rules(data_dir)
+    sr = rules.slots[slot]
+    mains = [0] * len(sr.mains)
+    subs: Dict[Tuple[int, int], int] = {}
+
+    if modo == "lote":
+        t0 = time.perf_counter()
+        records = generate_artefacts(slot, rareza, n, seed=seed, rules=rules)
+        elapsed = time.perf_counter() - t0
+        for _, _, _, main, picked, _ in records:
+            mains[main] += 1
+            for i in picked:
+                subs[(main, i)] = subs.get((main, i), 0) + 1
+        return ChunkResult(slot, rareza, n, mains, subs, elapsed)
+
+    # individual: una llamada a generate_artefact por tirada (el camino de /pj roll_artefacto)
+    main_index = {(m.stat, m.tipo): k for k, m in enumerate(sr.mains)}
+    sub_index = [{pair: i for i, pair in enumerate(m.subs.pairs)} for m in sr.mains]
+    rng = random.Random(seed)
+    seeds = [rng.getrandbits(63) for _ in range(n)]
+    t0 = time.perf_counter()
+    items = [generate_artefact(slot, rareza, seed=s, rules=rules) for s in seeds]
+    elapsed = time.perf_counter() - t0
+    for item in items:
+        p = item["atributo_principal"]
+        main = main_index[(p["estadistica"], p["tipo"])]
+        mains[main] += 1
+        for sub in item["atributos_secundarios"]:
+            key = (main, sub_index[main][(sub["estadistica"], sub["tipo"])])
+            subs[key] = subs.get(key, 0) + 1
+    return ChunkResult(slot, rareza, n, mains, subs, elapsed)
+
+
+# ============================================================
+# Agregado y reporte
+# ============================================================
+@dataclass
+class SlotReport:
+    slot: str
+    rareza: int
+    tiradas: int = 0
+    segundos: float = 0.0
+    mains: List[int] = field(default_factory=list)
+    subs: Dict[Tuple[int, int], int] = field(default_factory=dict)
+
+    def merge(self, res: ChunkResult) -> None:
+        if not self.mains:
+            self.mains = [0] * len(res.mains)
+        self.tiradas += res.tiradas
+        self.segundos += res.segundos
+        for k, c in enumerate(res.mains):
+            self.mains[k] += c
+        for key, c in res.subs.items():
+            self.subs[key] = self.subs.get(key, 0) + c
+
+    @property
+    def tiradas_s(self) -> float:
+        return self.tiradas / self.segundos if self.segundos > 0 else 0.0
+
+
+def _percentile(dist: Sequence[Tuple[float, int]], total: int, q: float) -> float:
+    """Percentil (nearest-rank) de una distribución discreta [(valor, cuenta)] ordenada."""
+    if total <= 0:
+        return 0.0
+    rank = max(1, -(-total * q // 100))
+    acc = 0
+    for value, count in dist:
+        acc += count
+        if acc >= rank:
+            return value
+    return dist[-1][0]
+
+
+def value_distributions(sr: SlotRules, rareza: int, rep: SlotReport) -> Dict[Tuple[str, str], List[Tuple[float, int]]]:
+    """(estadistica, tipo) -> [(valor aportado por artefacto, cuenta)] exacto desde los conteos."""
+    dists: Dict[Tuple[str, str], Dict[float, int]] = {}
+    keys = {(m.stat, m.tipo) for m in sr.mains} | {pair for m in sr.mains for pair in m.subs.pairs}
+    for key in keys:
+        dist = dists.setdefault(key, {})
+        for k, m in enumerate(sr.mains):
+            c_main = rep.mains[k]
+            if not c_main:
+                continue
+            base = m.values[rareza] if (m.stat, m.tipo) == key else 0.0
+            with_sub = 0
+            if key in m.subs.pairs:
+                i = m.subs.pairs.index(key)
+                with_sub = rep.subs.get((k, i), 0)
+                v = round(base + m.subs.values[rareza][i], 6)
+                dist[v] = dist.get(v, 0) + with_sub
+            dist[base] = dist.get(base, 0) + c_main - with_sub
+    return {key: sorted((v, c) for v, c in d.items() if c) for key, d in dists.items()}
+
+
+def report_rows(rules: ArtefactRules, reports: Iterable[SlotReport]) -> List[Dict[str, object]]:
+    rows: List[Dict[str, object]] = []
+    for rep in reports:
+        sr = rules.slots[rep.slot]
+        n = rep.tiradas
+        common = {"slot": rep.slot, "rareza": rep.rareza, "tiradas": n}
+        rows.append({
+            "seccion": "rendimiento", **common,
+            "tiradas_s": round(rep.tiradas_s), "reintentos_por_tirada": 0,
+        })
+        for k, m in enumerate(sr.mains):
+            c = rep.mains[k]
+            rows.append({
+                "seccion": "principal", **common, "estadistica": m.stat, "tipo": m.tipo,
+                "cuenta": c, "frecuencia": round(c / n, 6) if n else 0.0,
+            })
+        pair_counts: Dict[Tuple[str, str], int] = {}
+        for (k, i), c in rep.subs.items():
+            pair = sr.mains[k].subs.pairs[i]
+            pair_counts[pair] = pair_counts.get(pair, 0) + c
+        for (stat, tipo), c in sorted(pair_counts.items(), key=lambda kv: -kv[1]):
+            rows.append({
+                "seccion": "substat", **common, "estadistica": stat, "tipo": tipo,
+                "cuenta": c, "frecuencia": round(c / n, 6) if n else 0.0,
+            })
+        for (stat, tipo), dist in sorted(value_distributions(sr, rep.rareza, rep).items()):
+            row: Dict[str, object] = {"seccion": "valor", **common, "estadistica": stat, "tipo": tipo}
+            for q in PERCENTILES:
+                row[f"p{q}"] = _percentile(dist, n, q)
+            row["media"] = round(sum(v * c for v, c in dist) / n, 6) if n else 0.0
+            rows.append(row)
+    return rows
+
+
+def write_csv(path: str, rows: List[Dict[str, object]]) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_table(rows: List[Dict[str, object]], out=sys.stdout) -> None:
+    current = None
+    for row in rows:
+        key = (row["slot"], row["rareza"])
+        if key != current:
+            current = key
+            print(f"\n== {row['slot']} R{row['rareza']} ({row['tiradas']:,} tiradas) ==", file=out)
+        sec = row["seccion"]
+        if sec == "rendimiento":
+            print(f"  {row['tiradas_s']:,} tiradas/s | reintentos por tirada: {row['reintentos_por_tirada']}", file=out)
+        elif sec in ("principal", "substat"):
+            label = f"{row['estadistica']}:{row['tipo']}"
+            print(f"  {sec:<9} {label:<32} {row['frecuencia']:>8.2%}", file=out)
+        else:
+            label = f"{row['estadistica']}:{row['tipo']}"
+            ps = " ".join(f"p{q}={row[f'p{q}']:<8g}" for q in PERCENTILES)
+            print(f"  valor     {label:<32} {ps} media={row['media']:g}", file=out)
+
+
+# ============================================================
+# Orquestación
+# ============================================================
+def simulate(
+    slots: Sequence[str],
+    rarezas: Sequence[int],
+    tiradas: int,
+    seed: int,
+    workers: Optional[int] = None,
+    modo: str = "lote",
+    data_dir: str = DEFAULT_DATA_DIR,
+    chunk: int = CHUNK,
+) -> Tuple[List[SlotReport], float]:
+    """Corre `tiradas` por cada (slot, rareza) en un pool de procesos. Devuelve (reportes, segundos de pared)."""
+    if modo not in MODOS:
+        raise ValueError(f"modo inválido: {modo}")
+    jobs = []
+    for slot in slots:
+        for rareza in rarezas:
+            for index, start in enumerate(range(0, tiradas, chunk)):
+                n = min(chunk, tiradas - start)
+                jobs.append((data_dir, modo, slot, rareza, n, _chunk_seed(seed, slot, rareza, index)))
+
+    reports = {(s, r): SlotReport(s, r) for s in slots for r in rarezas}
+    t0 = time.perf_counter()
+    if workers == 1:
+        results = [_run_chunk(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_chunk, *zip(*jobs))) if jobs else []
+    wall = time.perf_counter() - t0
+    # Merge en el orden de los jobs: mismo resultado con cualquier cantidad de procesos
+    for res in results:
+        reports[(res.slot, res.rareza)].merge(res)
+    return list(reports.values()), wall
+
+
+def _parse_rarezas(text: str, valid: Sequence[int]) -> List[int]:
+    if text == "todas":
+        return list(valid)
+    out: List[int] = []
+    for part in text.split(","):
+        lo, _, hi = part.partition("-")
+        out.extend(range(int(lo), int(hi or lo) + 1))
+    bad = [r for r in out if r not in valid]
+    if bad:
+        raise SystemExit(f"rareza inválida: {bad[0]}")
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulación Monte Carlo del generador de artefactos.")
+    parser.add_argument("--tiradas", type=int, default=1_000_000, help="Tiradas por slot y rareza")
+    parser.add_argument("--slot", default="todos", help="Slot o 'todos'")
+    parser.add_argument("--rareza", default="todas", help="'todas', '5', '1-3' o '1,3,5'")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--procesos", type=int, default=None, help="Tamaño del pool (default: CPUs)")
+    parser.add_argument("--modo", choices=MODOS, default="lote",
+                        help="lote = generate_artefacts, individual = generate_artefact por tirada")
+    parser.add_argument("--chunk", type=int, default=CHUNK, help="Tiradas por bloque (afecta los seeds)")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--csv", default=None, help="Escribe el reporte en CSV")
+    args = parser.parse_args()
+
+    rules = _rules(args.data_dir)
+    slots = list(rules.slots) if args.slot == "todos" else [args.slot]
+    if any(s not in rules.slots for s in slots):
+        raise SystemExit(f"slot inválido: {args.slot}")
+    rarezas = _parse_rarezas(args.rareza, rules.rarezas)
+
+    reports, wall = simulate(
+        slots, rarezas, max(0, args.tiradas), args.seed,
+        workers=args.procesos, modo=args.modo, data_dir=args.data_dir, chunk=max(1, args.chunk),
+    )
+    rows = report_rows(rules, reports)
+    if args.csv:
+        write_csv(args.csv, rows)
+    print_table(rows)
+
+    total = sum(r.tiradas for r in reports)
+    cpu = sum(r.segundos for r in reports)
+    print(
+        f"\n⏱️ {total:,} tiradas ({args.modo}) en {wall:.2f} s de pared: {total / wall if wall else 0:,.0f} tiradas/s; "
+        f"generador {total / cpu if cpu else 0:,.0f} tiradas/s por proceso"
+    )
+    if args.csv:
+        print(f"CSV: {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
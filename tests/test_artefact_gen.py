@@ -0,0 +1,22 @@
+from src.bot.utils.artefact_gen import MIX, expand_artefacts, generate_artefact, generate_artefacts
+
+
+def _without_id(item):
+    return {k: v for k, v in item.items() if k != "id"}
+
+
+def test_bulk_records_replay_with_single_roll():
+    items = expand_artefacts(generate_artefacts(MIX, 4, 300, seed=99))
+    assert len({item["id"] for item in items}) == 300
+    for item in items:
+        assert isinstance(item["seed"], int)
+        again = generate_artefact(item["slot"], item["rareza"], seed=item["seed"])
+        assert _without_id(again) == _without_id(item)
+
+
+def test_same_batch_seed_same_batch():
+    a = [r[1:] for r in generate_artefacts(MIX, 5, 200, seed=7)]
+    b = [r[1:] for r in generate_artefacts(MIX, 5, 200, seed=7)]
+    assert a == b
+    assert a != [r[1:] for r in generate_artefacts(MIX, 5, 200, seed=8)]
+    assert len({r[0] for r in a}) > 1
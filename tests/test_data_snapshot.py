@@ -0,0 +1,91 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from src.bot.core import data_snapshot
+from src.bot.core.data_snapshot import (
+    SNAPSHOT_FILE,
+    build_snapshot,
+    content_hash,
+    load_game_data,
+    read_snapshot,
+)
+from src.bot.core.game_data import DEFAULT_DATA_DIR, IGNORED_DIRS
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = tmp_path / "data"
+    ignore = shutil.ignore_patterns(*IGNORED_DIRS, "*.snapshot")
+    shutil.copytree(DEFAULT_DATA_DIR, path, ignore=ignore)
+    return str(path)
+
+
+def _set_curve_base(data_dir, base):
+    path = os.path.join(data_dir, "niveles.json")
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    data["curva"]["base"] = base
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def _json_item_ids(data_dir):
+    gd, source, _ = load_game_data(data_dir, os.path.join(data_dir, "no_existe.snapshot"))
+    assert source == "json"
+    return gd.items.by_id.keys()
+
+
+def test_matching_hash_loads_snapshot(data_dir):
+    digest, size = build_snapshot(data_dir)
+    assert size > 0 and digest == content_hash(data_dir)
+
+    gd, source, _ = load_game_data(data_dir)
+    assert source == "snapshot"
+    assert gd.xp_curve.cumulative[1] == 100
+    assert gd.items.by_id.keys() == _json_item_ids(data_dir)
+    # El índice de pathways apunta a la carpeta actual, no a la del build
+    pathways = gd.files["pathways.json"]
+    assert os.path.dirname(pathways.path) == data_dir
+
+
+def test_changed_file_falls_back_to_json(data_dir):
+    build_snapshot(data_dir)
+    old_hash = content_hash(data_dir)
+    _set_curve_base(data_dir, 250)
+    assert content_hash(data_dir) != old_hash
+
+    gd, source, _ = load_game_data(data_dir)
+    assert source == "json"
+    assert gd.xp_curve.cumulative[1] == 250
+    path = os.path.join(data_dir, SNAPSHOT_FILE)
+    assert read_snapshot(path, content_hash(data_dir), data_dir) is None
+
+    # Tras recompilar vuelve a usarse el snapshot, ya con el cambio
+    build_snapshot(data_dir)
+    gd, source, _ = load_game_data(data_dir)
+    assert source == "snapshot"
+    assert gd.xp_curve.cumulative[1] == 250
+
+
+def test_added_or_removed_file_changes_hash(data_dir):
+    digest = content_hash(data_dir)
+    extra = os.path.join(data_dir, "extra.json")
+    with open(extra, "w", encoding="utf-8") as f:
+        f.write("{}")
+    assert content_hash(data_dir) != digest
+    os.remove(extra)
+    assert content_hash(data_dir) == digest
+
+
+def test_corrupt_or_old_snapshot_falls_back(data_dir, monkeypatch):
+    path = os.path.join(data_dir, SNAPSHOT_FILE)
+    with open(path, "wb") as f:
+        f.write(b"no es un pickle")
+    assert load_game_data(data_dir)[1] == "json"
+
+    build_snapshot(data_dir)
+    monkeypatch.setattr(data_snapshot, "SNAPSHOT_FORMAT", data_snapshot.SNAPSHOT_FORMAT + 1)
+    assert load_game_data(data_dir)[1] == "json"
@@ -0,0 +1,119 @@
+import asyncio
+import itertools
+import json
+import os
+import shutil
+from types import SimpleNamespace
+
+import pytest
+
+from src.bot.core.game_data import DEFAULT_DATA_DIR, IGNORED_DIRS, GameData
+from src.bot.services.data_watcher import GameDataWatcher
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    path = tmp_path / "data"
+    ignore = shutil.ignore_patterns(*IGNORED_DIRS, "*.snapshot")
+    shutil.copytree(DEFAULT_DATA_DIR, path, ignore=ignore)
+    return str(path)
+
+
+@pytest.fixture
+def watcher(data_dir):
+    bot = SimpleNamespace(game_data=GameData.load(data_dir))
+    w = GameDataWatcher(bot, data_dir)
+    w.prime()
+    return w
+
+
+_ticks = itertools.count(1)
+
+
+def _write(data_dir, name, content):
+    path = os.path.join(data_dir, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content if isinstance(content, str) else json.dumps(content))
+    # mtime distinto aunque la escritura caiga en el mismo tick del reloj
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + next(_ticks) * 1_000_000_000))
+
+
+def _check(watcher, force=False):
+    return asyncio.run(watcher.check(force))
+
+
+def test_no_changes_no_reload(watcher):
+    before = watcher.bot.game_data
+    report = _check(watcher)
+    assert not report.changed and not report.errors
+    assert watcher.bot.game_data is before
+
+
+def test_only_changed_file_is_reparsed(watcher, data_dir):
+    old = watcher.bot.game_data
+    _write(data_dir, "niveles.json", {"curva": {"tabla": [10, 20, 30]}})
+    report = _check(watcher)
+
+    assert list(report.parse_ms) == ["niveles.json"]
+    new = watcher.bot.game_data
+    assert new is not old
+    assert new.xp_curve.cumulative == (0, 10, 30, 60)
+    # Lo que no depende del archivo se comparte tal cual
+    assert new.items is old.items
+    assert new.loot is old.loot
+    assert new.files["pathways.json"] is old.files["pathways.json"]
+    assert old.xp_curve.nivel_max == 100  # el snapshot anterior no se muta
+
+    assert not _check(watcher).changed
+
+
+@pytest.mark.parametrize("name, content", [
+    ("loot.json", [{"id": "t", "drops": [{"item_id": "x", "probabilidad": 2}]}]),
+    ("niveles.json", {"curva": {"tabla": [100, -1]}}),
+    ("rol.json", '{"roles": {'),
+])
+def test_invalid_file_keeps_previous_data(watcher, data_dir, name, content):
+    old = watcher.bot.game_data
+    old_content = old.files[name]
+    _write(data_dir, name, content)
+    report = _check(watcher)
+
+    assert list(report.errors) == [name]
+    assert not report.changed
+    assert watcher.bot.game_data is old
+    assert watcher.last_report is report
+
+    # No se reintenta hasta que el archivo vuelva a cambiar
+    report = _check(watcher)
+    assert not report.errors and not report.changed
+
+    # Arreglado en disco: se aplica
+    _write(data_dir, name, old_content)
+    report = _check(watcher)
+    assert list(report.parse_ms) == [name] and not report.errors
+    assert watcher.bot.game_data is not old
+
+
+def test_invalid_file_does_not_block_valid_ones(watcher, data_dir):
+    _write(data_dir, "loot.json", "[")
+    _write(data_dir, "niveles.json", {"curva": {"tabla": [5]}})
+    report = _check(watcher)
+    assert list(report.errors) == ["loot.json"]
+    assert list(report.parse_ms) == ["niveles.json"]
+    assert watcher.bot.game_data.xp_curve.nivel_max == 2
+
+
+def test_removed_and_added_files(watcher, data_dir):
+    os.remove(os.path.join(data_dir, "tiendas.json"))
+    _write(data_dir, "extra.json", {"a": 1})
+    report = _check(watcher)
+    assert report.removed == ["tiendas.json"]
+    assert list(report.parse_ms) == ["extra.json"]
+    files = watcher.bot.game_data.files
+    assert "tiendas.json" not in files and files["extra.json"] == {"a": 1}
+
+
+def test_force_reparses_everything(watcher, data_dir):
+    report = _check(watcher, force=True)
+    assert set(report.parse_ms) == set(watcher.bot.game_data.files)
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from src.bot.core.dungeon import Run, room_loot, validate_dungeon
+from src.bot.core.game_data import GameData
+from src.bot.core.loot import LootCatalog, LootTable
+
+
+@pytest.fixture(scope="module")
+def game_data():
+    return GameData.load()
+
+
+@pytest.fixture(scope="module")
+def rules(game_data):
+    assert game_data.dungeon is not None
+    return game_data.dungeon
+
+
+def _walk(rules, seed, salida=0):
+    run, rooms = Run.start(seed), []
+    while run is not None:
+        assert run.valid(rules)
+        salidas = run.current(rules).salidas
+        room, run = run.resolve(rules, "s", min(salida, len(salidas) - 1) if salidas else None)
+        rooms.append(room)
+    return rooms
+
+
+@pytest.mark.parametrize("seed", [0, 1, 42, 2**62 + 7])
+def test_same_seed_same_rooms(rules, seed):
+    assert _walk(rules, seed) == _walk(rules, seed)
+    assert _walk(rules, seed, salida=1) == _walk(rules, seed, salida=1)
+
+
+def test_layout_has_fixed_layers(rules):
+    rooms = _walk(rules, 1234)
+    assert len(rooms) == rules.profundidad
+    assert rooms[0].tipo.id == "transicion"
+    assert rooms[rules.profundidad // 2].tipo.id == "sub_jefe"
+    assert rooms[-1].tipo.id == "jefe_final" and rooms[-1].final
+    for a, b in zip(rooms, rooms[1:]):
+        assert b.indice in a.salidas
+
+
+def test_run_round_trip_and_size(rules):
+    run = Run.start(99)
+    for _ in range(rules.profundidad - 1):
+        _, run = run.resolve(rules, "h", 0)
+    data = run.to_dict()
+    assert Run.from_dict(json.loads(json.dumps(data))) == run
+    assert run.valid(rules)
+    assert len(json.dumps(data)) < 120
+    room, nxt = run.resolve(rules, "s")
+    assert room.final and nxt is None
+
+
+def test_from_dict_rejects_garbage():
+    assert Run.from_dict(None) is None
+    assert Run.from_dict({"camino": [0]}) is None
+    assert Run.from_dict({"seed": 1, "camino": []}) is None
+    assert Run.from_dict({"seed": "x", "camino": [0]}) is None
+
+
+def test_invalid_moves(rules):
+    run = Run.start(7)
+    with pytest.raises(ValueError):
+        run.resolve(rules, "s", len(run.current(rules).salidas))
+    with pytest.raises(ValueError):
+        run.resolve(rules, "x")
+    assert not Run(7, (1,)).valid(rules)
+    assert not Run(7, (0, 99)).valid(rules)
+
+
+def test_room_loot_replays(game_data, rules):
+    rooms = _walk(rules, 2024)
+    for room in rooms:
+        again = rules.room(2024, room.profundidad, room.indice)
+        assert again.loot_seed == room.loot_seed
+        assert room_loot(game_data.loot, room) == room_loot(game_data.loot, again)
+
+
+def test_room_loot_splits_tables_and_text(rules):
+    final = _walk(rules, 2024)[-1]
+    assert final.tipo.recompensa == ("botin_epico", "logro_unico")
+    table = LootTable.compile({"id": "botin_epico", "drops": [{"item_id": "x", "probabilidad": 1.0}]})
+    res, sin_tabla = room_loot(LootCatalog({"botin_epico": table}, {}, ()), final)
+    assert res.stacks == {"x": 1}
+    assert sin_tabla == ["logro_unico"]
+
+    res, sin_tabla = room_loot(LootCatalog({}, {}, ()), final)
+    assert not res.stacks
+    assert sin_tabla == ["botin_epico", "logro_unico"]
+
+
+def test_invalid_dungeon_data():
+    with pytest.raises(ValueError):
+        validate_dungeon({"salas": [{"id": "x", "enemigos": {"tiene_enemigos": True, "posibles_enemigos": []}}]})
@@ -0,0 +1,60 @@
+import copy
+import random
+
+from src.bot.core.inventory import ArtefactQuery, IdAllocator, IndexedItems, artefact_page
+
+
+def _item(i, rng):
+    return {"id": f"a{i}", "slot": rng.choice(["caliz", "moneda"]), "rareza": rng.randint(1, 5),
+            "atributo_principal": {"estadistica": rng.choice(["vida", "ataque"])}}
+
+
+def test_indexed_items_match_plain_list():
+    rng = random.Random(3)
+    items = IndexedItems()
+    ref = []
+    for step in range(3000):
+        roll = rng.random()
+        if roll < 0.5:
+            item = _item(rng.randrange(400), rng)
+            if items.add(item):
+                ref.append(item)
+            else:
+                assert any(x["id"] == item["id"] for x in ref)
+        elif roll < 0.9:
+            item_id = f"a{rng.randrange(400)}"
+            popped = items.pop_id(item_id)
+            expected = next((x for x in ref if x["id"] == item_id), None)
+            assert popped is expected
+            if expected is not None:
+                ref.remove(expected)
+        else:
+            items.sort(key=lambda x: x["id"])
+        assert sorted(x["id"] for x in items) == sorted(x["id"] for x in ref)
+        probe = f"a{rng.randrange(400)}"
+        assert items.find(probe) is next((x for x in ref if x["id"] == probe), None)
+
+
+def test_pages_do_not_depend_on_raw_order():
+    rng = random.Random(5)
+    base = [_item(i, rng) for i in range(60)]
+    shuffled = base[:]
+    rng.shuffle(shuffled)
+    query = ArtefactQuery(slot="caliz", orden="stat")
+    a = artefact_page(IndexedItems(base), query, 2, 10)
+    b = artefact_page(IndexedItems(shuffled), query, 2, 10)
+    assert [x["id"] for x in a.rows] == [x["id"] for x in b.rows]
+
+
+def test_copy_keeps_items_and_rebuilds_index():
+    items = IndexedItems([{"id": "x"}, {"id": "y"}])
+    clone = copy.deepcopy(items)
+    assert isinstance(clone, IndexedItems) and clone.find("y") == {"id": "y"}
+
+
+def test_id_allocator_blocks_are_unique_and_long():
+    alloc = IdAllocator("af_")
+    ids = alloc.block(1000) + [alloc.next() for _ in range(10)]
+    assert len(set(ids)) == len(ids)
+    assert all(len(i) >= len("af_") + 17 for i in ids)
+    assert IdAllocator("af_")._process != alloc._process
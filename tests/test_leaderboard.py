@@ -0,0 +1,66 @@
+import asyncio
+import random
+
+from src.bot.core.stats import STAT_KEYS
+from src.bot.services.leaderboard import Leaderboard, SortedIndex
+from src.bot.services.user_journal import op_add_xp, op_put_character, op_set_level
+from src.bot.services.user_store import UserStore
+
+
+def _reference(scores):
+    return sorted(scores, key=lambda m: (tuple(-v for v in scores[m]), m[0], m[1]))
+
+
+def test_sorted_index_matches_full_sort():
+    rng = random.Random(7)
+    scores = {(uid, f"pj{uid}"): (rng.randint(1, 50), rng.randint(0, 999)) for uid in range(300)}
+    index = SortedIndex(scores.items())
+    for _ in range(2000):
+        member = (rng.randrange(320), f"pj{rng.randrange(320)}")
+        if rng.random() < 0.2:
+            index.discard(member)
+            scores.pop(member, None)
+        else:
+            scores[member] = (rng.randint(1, 50), rng.randint(0, 999))
+            index.update(member, scores[member])
+
+    ordered = _reference(scores)
+    assert len(index) == len(ordered)
+    assert [(uid, nm) for _, uid, nm, _ in index.page(0, len(ordered))] == ordered
+    for pos, member in enumerate(ordered):
+        assert index.rank(member) == pos
+        assert index.score(member) == scores[member]
+    assert index.page(10, 5)[0][0] == 11
+
+
+def _character(nivel):
+    estadisticas = {k: {"base": 10.0} for k in STAT_KEYS}
+    estadisticas["recurso"] = {"tipo": "Mana", "cantidad_maxima": {"base": 50.0}}
+    return {
+        "nivel": nivel,
+        "experiencia": 0,
+        "estadisticas": estadisticas,
+        "equipamiento": {"artefactos": {}, "arma_principal": None},
+    }
+
+
+def test_leaderboard_follows_commits(tmp_path):
+    async def main():
+        store = UserStore(str(tmp_path))
+        board = Leaderboard(store)
+        store.add_listener(board.on_commit)
+        try:
+            await store.apply(1, [op_put_character("Ana", _character(3))])
+            await board.ensure_ready()
+            await store.apply(2, [op_put_character("Beto", _character(2))])
+            assert [r[2] for r in board.top("nivel")] == ["Ana", "Beto"]
+
+            await store.apply(2, op_set_level("Beto", 5, _character(5)["estadisticas"]))
+            assert board.rank("nivel", 2, "Beto")[0] == 1
+            await store.apply(1, [op_set_level("Ana", 5, _character(5)["estadisticas"])[0], op_add_xp("Ana", 40)])
+            assert [r[2] for r in board.top("nivel")] == ["Ana", "Beto"]
+            assert board.user_ranks("nivel", 2)[0][0] == 2
+        finally:
+            await store.close()
+
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+import pytest
+
+from src.bot.core.leveling import XpCurve, grant_xp, parse_increments, set_level
+
+CURVE = XpCurve.from_config({"tabla": [100, 200, 300, 400]})   # niveles 1..5
+INCREMENTS = parse_increments({"mejora_atributos_por_nivel": {
+    "vida": 10, "ataque": 2.5, "recurso.cantidad_maxima": 4, "no_existe": 1,
+}})
+
+
+def _character(nivel=1, experiencia=0):
+    return {
+        "nivel": nivel,
+        "experiencia": experiencia,
+        "estadisticas": {
+            "vida": {"base": 100.0},
+            "ataque": {"base": 10.0},
+            "recurso": {"tipo": "Mana", "cantidad_maxima": {"base": 50.0}},
+        },
+    }
+
+
+def _bases(ch):
+    st = ch["estadisticas"]
+    return st["vida"]["base"], st["ataque"]["base"], st["recurso"]["cantidad_maxima"]["base"]
+
+
+def test_cumulative_table():
+    assert CURVE.cumulative == (0, 100, 300, 600, 1000)
+    assert CURVE.nivel_max == 5
+
+
+@pytest.mark.parametrize("xp, nivel", [
+    (0, 1), (99, 1), (100, 2), (299, 2), (300, 3),
+    (600, 4), (999, 4), (1000, 5), (10**9, 5), (-5, 1),
+])
+def test_level_for_thresholds(xp, nivel):
+    assert CURVE.level_for(xp) == nivel
+
+
+def test_xp_helpers():
+    assert CURVE.xp_for_level(3) == 300
+    assert CURVE.xp_for_level(99) == 1000
+    assert CURVE.xp_to_next(250) == 50
+    assert CURVE.xp_to_next(1000) is None
+
+
+def test_default_curve_and_invalid():
+    curve = XpCurve.from_config(None)
+    assert curve.nivel_max == 100
+    assert curve.cumulative[1] == 100
+    with pytest.raises(ValueError):
+        XpCurve.from_config({"tabla": [100, 0]})
+    with pytest.raises(ValueError):
+        XpCurve.from_config({"tabla": []})
+
+
+def test_multi_level_grant_applies_increments_once():
+    ch = _character()
+    change = grant_xp(ch, 650, CURVE, INCREMENTS)
+    assert (change.nivel_antes, change.nivel, change.niveles) == (1, 4, 3)
+    assert ch["nivel"] == 4 and ch["experiencia"] == 650
+    assert _bases(ch) == (100.0 + 10 * 3, 10.0 + 2.5 * 3, 50.0 + 4 * 3)
+
+    # Sin subir de nivel no se tocan las stats
+    change = grant_xp(ch, 10, CURVE, INCREMENTS)
+    assert change.niveles == 0
+    assert _bases(ch) == (130.0, 17.5, 62.0)
+
+
+def test_huge_grant_stops_at_max():
+    ch = _character()
+    change = grant_xp(ch, 10**6, CURVE, INCREMENTS)
+    assert change.nivel == CURVE.nivel_max
+    assert _bases(ch)[0] == 100.0 + 10 * (CURVE.nivel_max - 1)
+
+
+def test_negative_xp_never_lowers_level():
+    ch = _character(nivel=3, experiencia=350)
+    change = grant_xp(ch, -300, CURVE, INCREMENTS)
+    assert (change.nivel, change.experiencia) == (3, 50)
+    assert ch["nivel"] == 3
+    change = grant_xp(ch, -10**6, CURVE, INCREMENTS)
+    assert (ch["nivel"], ch["experiencia"]) == (3, 0)
+    assert _bases(ch) == (100.0, 10.0, 50.0)
+
+
+def test_set_level_clamps_and_rewrites_xp():
+    ch = _character()
+    change = set_level(ch, 99, CURVE, INCREMENTS)
+    assert change.nivel == CURVE.nivel_max == ch["nivel"]
+    assert ch["experiencia"] == CURVE.xp_for_level(CURVE.nivel_max)
+    assert _bases(ch)[0] == 100.0 + 10 * 4
+
+    # Bajar no quita mejoras; la XP queda en el rango del nivel nuevo
+    change = set_level(ch, 2, CURVE, INCREMENTS)
+    assert (change.nivel, ch["experiencia"]) == (2, 100)
+    assert _bases(ch)[0] == 140.0
+    assert set_level(ch, 0, CURVE, INCREMENTS).nivel == 1
+
+    # XP ya dentro del rango del nivel pedido: se conserva
+    ch = _character(nivel=1, experiencia=150)
+    set_level(ch, 2, CURVE, INCREMENTS)
+    assert ch["experiencia"] == 150
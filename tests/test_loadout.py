@@ -0,0 +1,67 @@
+import itertools
+import random
+
+import pytest
+
+from src.bot.core.loadout import LOADOUT_SLOTS, OBJECTIVES, optimize_loadout
+from src.bot.core.stats import ARTEFACT_SLOTS, STAT_KEYS, WEAPON_SOURCE, compute_stats
+from src.bot.utils.artefact_gen import generate_artefact
+
+
+def _weapon(rng, n):
+    stat = rng.choice(["ataque", "poder_magico", "vida"])
+    return {
+        "id": f"arma_{n}",
+        "nombre": f"Arma {n}",
+        "atributo_principal": {"estadistica": stat, "tipo": "plano", "valor": rng.randint(5, 60)},
+        "atributos_secundarios": [
+            {"estadistica": rng.choice(["armadura", "resistencia_magica", "ataque"]), "tipo": "porcentaje",
+             "valor": round(rng.uniform(0.01, 0.2), 3)},
+        ],
+    }
+
+
+def _character(seed):
+    rng = random.Random(seed)
+    estadisticas = {k: {"base": float(rng.randint(10, 200))} for k in STAT_KEYS}
+    estadisticas["recurso"] = {"tipo": "Mana", "cantidad_maxima": {"base": 50.0}}
+    arts = [generate_artefact(rng.choice(ARTEFACT_SLOTS), rng.randint(1, 5), seed=rng.getrandbits(32)) for _ in range(14)]
+    armas = [_weapon(rng, n) for n in range(3)]
+    equipped = {s: next((a for a in arts if a["slot"] == s), None) for s in ARTEFACT_SLOTS}
+    return {
+        "estadisticas": estadisticas,
+        "equipamiento": {"arma_principal": armas[0], "artefactos": equipped},
+        "inventario": {
+            "artefactos": [a for a in arts if a not in equipped.values()],
+            "armas": armas[1:],
+        },
+    }
+
+
+def _brute_force(ch, objetivo):
+    obj = OBJECTIVES[objetivo]
+    equip = ch["equipamiento"]
+    options = {WEAPON_SOURCE: [None, equip["arma_principal"], *ch["inventario"]["armas"]]}
+    for slot in ARTEFACT_SLOTS:
+        pool = [a for a in ch["inventario"]["artefactos"] if a["slot"] == slot]
+        options[slot] = [None, equip["artefactos"][slot], *pool]
+    best = float("-inf")
+    for combo in itertools.product(*(options[s] for s in LOADOUT_SLOTS)):
+        pick = dict(zip(LOADOUT_SLOTS, combo))
+        preview = {
+            "estadisticas": ch["estadisticas"],
+            "equipamiento": {"arma_principal": pick[WEAPON_SOURCE], "artefactos": {s: pick[s] for s in ARTEFACT_SLOTS}},
+        }
+        total = compute_stats(preview)["total"]
+        best = max(best, obj.score({s: total.get(s, 0.0) for s in obj.stats}))
+    return best
+
+
+@pytest.mark.parametrize("objetivo", sorted(OBJECTIVES))
+@pytest.mark.parametrize("seed", range(6))
+def test_optimizer_matches_brute_force(objetivo, seed):
+    ch = _character(seed)
+    res = optimize_loadout(ch, objetivo)
+    assert res.valor == pytest.approx(_brute_force(ch, objetivo), rel=1e-12)
+    assert res.valor >= res.valor_actual - 1e-9
+    assert res.tras_poda <= res.candidatos
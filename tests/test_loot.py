@@ -0,0 +1,83 @@
+import pytest
+
+from src.bot.core.game_data import GameData
+from src.bot.core.item_catalog import ItemCatalog
+from src.bot.core.loot import ENEMIGOS_FILE, LOOT_FILE, LootCatalog, LootTable, validate_loot
+
+FILES = {
+    "items/materiales.json": {"items": {
+        "mat_garra_001": {"nombre": "Garra", "tipo": "Material"},
+        "mat_cuero_001": {"nombre": "Cuero", "tipo": "Material"},
+    }},
+    LOOT_FILE: [
+        {"id": "loot_bestia", "drops": [
+            {"item_id": "mat_garra_001", "probabilidad": 0.6, "cantidad_min": 1, "cantidad_max": 2},
+            {"item_id": "mat_cuero_001", "probabilidad": 0.15},
+            {"item_id": "pocion_sin_catalogo", "probabilidad": 0.05},
+        ]},
+    ],
+    ENEMIGOS_FILE: [{"id": "bestia_lv3", "nombre": "Bestia Sombría", "loot_table_id": "loot_bestia"}],
+}
+
+
+@pytest.fixture(scope="module")
+def loot():
+    return LootCatalog.build(FILES, ItemCatalog.build(FILES))
+
+
+def test_tables_resolve_against_catalog(loot):
+    assert loot.unresolved == ("pocion_sin_catalogo",)
+    assert loot.table_for_enemy("bestia_lv3") is loot.table("loot_bestia")
+    assert loot.table_for_enemy("Bestia Sombría") is loot.table("loot_bestia")
+    assert loot.resolve("bestia_lv3") is loot.resolve("loot_bestia")
+
+
+def test_unresolved_drops_are_reported_apart(loot):
+    res = loot.roll_enemies({"bestia_lv3": 2000}, seed=3)
+    assert set(res.stacks) == {"mat_garra_001", "mat_cuero_001"}
+    assert set(res.sin_catalogo) == {"pocion_sin_catalogo"}
+
+
+def test_shipped_data_builds():
+    # Los ids de loot.json son contenido del juego: solo se exige que compile y se informe
+    loot = GameData.load().loot
+    assert loot.table_for_enemy("bestia_sombria_lv3") is loot.table("loot_bestia_sombria")
+    res = loot.roll_enemies({"bestia_sombria_lv3": 40}, seed=1)
+    assert set(res.stacks) | set(res.sin_catalogo) <= set(loot.table("loot_bestia_sombria").item_ids)
+    assert not set(res.sin_catalogo) - set(loot.unresolved)
+
+
+def test_same_seed_same_loot(loot):
+    a = loot.roll_enemies({"bestia_lv3": 40}, seed=123)
+    b = loot.roll_enemies({"bestia_lv3": 40}, seed=123)
+    assert a == b
+    assert a.tiradas == 40
+
+
+def test_frequencies_match_expected(loot):
+    table = loot.table("loot_bestia")
+    n = 200000
+    res = loot.roll_table(table.id, n, seed=9)
+    got = {**res.stacks, **res.sin_catalogo}
+    for item_id, per_roll in table.expected().items():
+        assert got.get(item_id, 0) / n == pytest.approx(per_roll, rel=0.05)
+
+
+def test_certain_and_impossible_drops():
+    table = LootTable.compile({"id": "t", "drops": [
+        {"item_id": "x", "probabilidad": 1.0, "cantidad_min": 2, "cantidad_max": 2},
+        {"item_id": "y", "probabilidad": 0.0},
+    ]})
+    catalog = LootCatalog({"t": table}, {}, ())
+    assert catalog.roll_table("t", 50, seed=1).stacks == {"x": 100}
+
+
+@pytest.mark.parametrize("bad", [
+    [{"drops": []}],
+    [{"id": "t", "drops": [{"item_id": "x", "probabilidad": 1.5}]}],
+    [{"id": "t", "drops": [{"item_id": "x", "cantidad_min": 3, "cantidad_max": 1}]}],
+    [{"id": "t", "drops": [{"probabilidad": 0.5}]}],
+])
+def test_invalid_tables_fail_validation(bad):
+    with pytest.raises(ValueError):
+        validate_loot(bad)
@@ -0,0 +1,75 @@
+import copy
+
+import pytest
+
+from src.bot.core.game_data import GameData
+from src.bot.core.stacks import pilas, plan_add, plan_remove, split_stacks, stack_counts, stack_rule
+from src.bot.services.user_journal import apply_op, op_set_stacks
+
+MENA = "mat_mena_hierro_001"     # materiales, max_stack 999
+POCION = "con_pocion_vida_001"   # consumibles, max_stack 99
+ESPADA = "wp_espada_hierro_001"  # no apilable
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return GameData.load().items
+
+
+def _character(materiales=None, consumibles=None):
+    return {"inventario": {"materiales": materiales or {}, "consumibles": consumibles or {}}}
+
+
+def _commit(ch, change):
+    doc = {"1": {"personajes": {"Ana": ch}}}
+    for bucket, finales in change.finales.items():
+        apply_op(doc, 1, op_set_stacks("Ana", bucket, finales))
+    return doc["1"]["personajes"]["Ana"]
+
+
+def test_rules_and_stack_math(catalog):
+    assert stack_rule(catalog, MENA).max_stack == 999
+    assert stack_rule(catalog, POCION).bucket == "consumibles"
+    assert stack_rule(catalog, ESPADA) is None
+    assert pilas(2000, 999) == 3 and pilas(0, 999) == 0
+    assert split_stacks(2000, 999) == [999, 999, 2]
+
+
+def test_plan_add_does_not_mutate_and_merges(catalog):
+    ch = _character({MENA: 10})
+    before = copy.deepcopy(ch)
+    change = plan_add(ch, catalog, {MENA: 5000, POCION: 3, ESPADA: 1, "no_existe": 2})
+    assert ch == before
+    assert change.finales == {"materiales": {MENA: 5010}, "consumibles": {POCION: 3}}
+    assert change.aplicados == {MENA: 5000, POCION: 3}
+    assert change.rechazados == {ESPADA: "no apilable", "no_existe": "desconocido"}
+    assert stack_counts(_commit(ch, change), "materiales") == {MENA: 5010}
+
+
+def test_plan_add_respects_max_pilas(catalog):
+    ch = _character({MENA: 998})
+    change = plan_add(ch, catalog, {MENA: 5000}, max_pilas=3)
+    assert change.finales["materiales"][MENA] == 3 * 999
+    assert change.aplicados[MENA] == 3 * 999 - 998
+    assert change.rechazados[MENA] == "sin espacio"
+
+
+def test_plan_remove_is_all_or_nothing(catalog):
+    ch = _character({MENA: 10}, {POCION: 2})
+    change = plan_remove(ch, catalog, {MENA: 4, POCION: 5})
+    assert change.rechazados == {POCION: "faltan 3"}
+    assert change.finales == {} and change.aplicados == {}
+
+    change = plan_remove(ch, catalog, {MENA: 10, POCION: 1})
+    after = _commit(ch, change)
+    assert stack_counts(after, "materiales") == {}
+    assert stack_counts(after, "consumibles") == {POCION: 1}
+
+
+def test_legacy_lists_are_read_and_converted(catalog):
+    legacy = [{"item_id": MENA, "cantidad": 3}, {"id": MENA}, MENA]
+    ch = {"inventario": {"materiales": legacy}}
+    assert stack_counts(ch, "materiales") == {MENA: 5}
+    change = plan_add(ch, catalog, {MENA: 1})
+    assert ch["inventario"]["materiales"] is legacy
+    assert _commit(ch, change)["inventario"]["materiales"] == {MENA: 6}
@@ -0,0 +1,122 @@
+import asyncio
+import random
+
+from src.bot.core.stat_engine import ENGINE_KEYS, STAT_INDEX, StatMatrix, character_rows
+from src.bot.core.stats import (
+    ARTEFACT_SLOTS,
+    BONUS_TOTALS_KEY,
+    STAT_KEYS,
+    bonus_totals_after,
+    compute_character_stats,
+    rebuild_bonus_totals,
+)
+from src.bot.services.leaderboard import STAT_BOARDS, Leaderboard
+from src.bot.services.user_journal import op_equip, op_put_character, op_set_bonus_totals
+from src.bot.services.user_store import UserStore
+from src.bot.utils.artefact_gen import generate_artefact
+
+
+def _character(rng, totals=True):
+    estadisticas = {k: {"base": round(rng.uniform(0, 200), 2)} for k in STAT_KEYS}
+    mana = float(rng.randint(20, 120))
+    estadisticas["recurso"] = {"tipo": "Mana", "cantidad_maxima": {"base": mana}}
+    arts = {
+        s: generate_artefact(s, rng.randint(1, 5), seed=rng.getrandbits(32))
+        if rng.random() < 0.8 else None
+        for s in ARTEFACT_SLOTS
+    }
+    ch = {
+        "nivel": 1,
+        "estadisticas": estadisticas,
+        "equipamiento": {"artefactos": arts, "arma_principal": None},
+    }
+    if totals:
+        ch[BONUS_TOTALS_KEY] = rebuild_bonus_totals(ch)
+    return ch
+
+
+def _assert_exact(matrix, chars):
+    batch = matrix.compute()
+    assert sorted(batch.members) == sorted(chars)
+    for n, member in enumerate(batch.members):
+        ref = compute_character_stats(chars[member])
+        for part in ("base", "adicionales", "total"):
+            row = getattr(batch, part)[n]
+            assert [float(v) for v in row] == [ref[part].get(k, 0.0) for k in ENGINE_KEYS]
+        assert matrix.total(member).tolist() == batch.total[n].tolist()
+
+
+def test_matrix_is_bit_identical_under_updates():
+    rng = random.Random(3)
+    matrix = StatMatrix(capacity=4)  # obliga a crecer
+    chars = {}
+    for step in range(600):
+        member = rng.randrange(80)
+        if rng.random() < 0.2:
+            matrix.discard(member)
+            chars.pop(member, None)
+        else:
+            chars[member] = _character(rng, totals=rng.random() < 0.8)
+            matrix.set(member, chars[member])
+        assert len(matrix) == len(chars)
+    _assert_exact(matrix, chars)
+    assert matrix.total(-1) is None
+
+
+def test_rows_follow_delta_totals_and_ignore_stale_ones():
+    rng = random.Random(5)
+    ch = _character(rng)
+    slot = ARTEFACT_SLOTS[0]
+    item = generate_artefact(slot, 5, seed=9)
+    totals = bonus_totals_after(ch, {slot: item})
+    ch["equipamiento"]["artefactos"][slot] = item
+    ch[BONUS_TOTALS_KEY] = totals
+    matrix = StatMatrix()
+    matrix.set("a", ch)
+    _assert_exact(matrix, {"a": ch})
+
+    # Totales de otro equipo: se reconstruyen del equipo en lugar de usarlos
+    ch[BONUS_TOTALS_KEY] = {**totals, "plano": {"vida": 1e6}, "fuentes": {}}
+    _, flat, _ = character_rows(ch)
+    assert flat[STAT_INDEX["vida"]] != 1e6
+    matrix.set("a", ch)
+    _assert_exact(matrix, {"a": ch})
+
+
+def test_leaderboard_stat_boards_use_the_matrix(tmp_path):
+    async def main():
+        rng = random.Random(8)
+        store = UserStore(str(tmp_path))
+        board = Leaderboard(store)
+        store.add_listener(board.on_commit)
+        chars = {(uid, f"pj{uid}"): _character(rng) for uid in range(1, 30)}
+        try:
+            for (uid, nombre), ch in chars.items():
+                await store.apply(uid, [op_put_character(nombre, ch)])
+            await board.ensure_ready()
+            assert len(board.stats) == len(chars)
+
+            # Cambio incremental: solo se reescribe la fila de ese personaje
+            uid, nombre = 5, "pj5"
+            ch = chars[(uid, nombre)]
+            slot = ARTEFACT_SLOTS[1]
+            item = generate_artefact(slot, 5, seed=77)
+            totals = bonus_totals_after(ch, {slot: item})
+            await store.apply(uid, [
+                op_equip(nombre, slot, item),
+                op_set_bonus_totals(nombre, totals),
+            ])
+            ch["equipamiento"]["artefactos"][slot] = item
+            ch[BONUS_TOTALS_KEY] = totals
+
+            for member, ch in chars.items():
+                total = compute_character_stats(ch)["total"]
+                for stat in STAT_BOARDS:
+                    assert board.indexes[stat].score(member) == (total[stat],)
+            vida = {m: compute_character_stats(ch)["total"]["vida"] for m, ch in chars.items()}
+            ordered = sorted(chars, key=lambda m: (-vida[m], m))
+            assert [(r[1], r[2]) for r in board.top("vida", 1, len(chars))] == ordered
+        finally:
+            await store.close()
+
+    asyncio.run(main())
@@ -0,0 +1,216 @@
+import asyncio
+import copy
+import random
+
+import pytest
+
+from src.bot.core.stats import (
+    ARTEFACT_SLOTS,
+    BONUS_TOLERANCE,
+    BONUS_TOTALS_KEY,
+    STAT_KEYS,
+    StatCache,
+    WEAPON_SOURCE,
+    bonus_drift,
+    bonus_totals_after,
+    compute_character_stats,
+    compute_stats,
+    compute_stats_from_totals,
+    equipment_fingerprint,
+    op_affects_stats,
+    rebuild_bonus_totals,
+    stored_bonus_totals,
+)
+from src.bot.services.user_journal import (
+    op_add_xp,
+    op_equip,
+    op_put_character,
+    op_set,
+    op_set_level,
+)
+from src.bot.services.user_store import UserStore
+from src.bot.utils.artefact_gen import generate_artefact
+
+
+def _weapon(rng, n):
+    return {
+        "id": f"arma_{n}",
+        "atributo_principal": {"estadistica": rng.choice(["ataque", "vida"]), "tipo": "plano",
+                               "valor": rng.randint(5, 60)},
+        "atributos_secundarios": [
+            {"estadistica": rng.choice(["armadura", "ataque", "mana"]), "tipo": "porcentaje",
+             "valor": round(rng.uniform(0.01, 0.2), 3)},
+        ],
+    }
+
+
+def _character(rng):
+    estadisticas = {k: {"base": float(rng.randint(10, 200))} for k in STAT_KEYS}
+    estadisticas["recurso"] = {"tipo": "Mana", "cantidad_maxima": {"base": 50.0}}
+    return {
+        "estadisticas": estadisticas,
+        "equipamiento": {"arma_principal": None, "artefactos": {s: None for s in ARTEFACT_SLOTS}},
+    }
+
+
+def _equip(ch, slot, item):
+    equip = ch["equipamiento"]
+    if slot == WEAPON_SOURCE:
+        equip["arma_principal"] = item
+    else:
+        equip["artefactos"][slot] = item
+
+
+def _max_diff(a, b):
+    return max(
+        abs(a[part].get(k, 0.0) - b[part].get(k, 0.0))
+        for part in ("base", "adicionales", "total")
+        for k in set(a[part]) | set(b[part])
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_delta_totals_track_compute_stats(seed):
+    rng = random.Random(seed)
+    ch = _character(rng)
+    ch[BONUS_TOTALS_KEY] = rebuild_bonus_totals(ch)
+    slots = list(ARTEFACT_SLOTS) + [WEAPON_SOURCE]
+    for n in range(300):
+        slot = rng.choice(slots)
+        if rng.random() < 0.25:
+            item = None
+        elif slot == WEAPON_SOURCE:
+            item = _weapon(rng, n)
+        else:
+            item = generate_artefact(slot, rng.randint(1, 5), seed=rng.getrandbits(32))
+        totals = bonus_totals_after(ch, {slot: item})
+        _equip(ch, slot, item)
+        ch[BONUS_TOTALS_KEY] = totals
+
+        assert stored_bonus_totals(ch) is totals
+        assert _max_diff(compute_character_stats(ch), compute_stats(ch)) < 1e-9
+        drift, _ = bonus_drift(ch)
+        assert drift < BONUS_TOLERANCE
+
+
+def test_fresh_totals_match_compute_stats_exactly():
+    rng = random.Random(7)
+    ch = _character(rng)
+    _equip(ch, WEAPON_SOURCE, _weapon(rng, 0))
+    for slot in ARTEFACT_SLOTS:
+        _equip(ch, slot, generate_artefact(slot, 5, seed=rng.getrandbits(32)))
+    assert compute_stats_from_totals(ch, rebuild_bonus_totals(ch)) == compute_stats(ch)
+
+
+def test_stale_totals_are_rejected_and_rebuilt():
+    rng = random.Random(11)
+    ch = _character(rng)
+    slot = ARTEFACT_SLOTS[0]
+    _equip(ch, slot, generate_artefact(slot, 3, seed=1))
+    ch[BONUS_TOTALS_KEY] = rebuild_bonus_totals(ch)
+
+    # Otro proceso cambió el artefacto sin tocar los totales: "fuentes" ya no coincide
+    stale = copy.deepcopy(ch[BONUS_TOTALS_KEY])
+    stale["plano"] = {"ataque": 9999.0}
+    _equip(ch, slot, generate_artefact(slot, 5, seed=2))
+    ch[BONUS_TOTALS_KEY] = stale
+
+    assert stored_bonus_totals(ch) is None
+    assert compute_character_stats(ch) == compute_stats(ch)
+    drift, rebuilt = bonus_drift(ch)
+    assert drift == float("inf")
+    assert rebuilt == rebuild_bonus_totals(ch)
+
+    # El siguiente equipar parte de los totales reconstruidos, no de los viejos
+    other = ARTEFACT_SLOTS[1]
+    item = generate_artefact(other, 2, seed=3)
+    totals = bonus_totals_after(ch, {other: item})
+    _equip(ch, other, item)
+    assert totals["plano"].get("ataque", 0.0) < 9999.0
+    ch[BONUS_TOTALS_KEY] = totals
+    assert bonus_drift(ch)[0] < BONUS_TOLERANCE
+
+
+@pytest.mark.parametrize("broken", [None, [], {"plano": {}}, {"plano": [], "porcentaje": {}}])
+def test_malformed_totals_fall_back(broken):
+    ch = _character(random.Random(1))
+    ch[BONUS_TOTALS_KEY] = broken
+    assert stored_bonus_totals(ch) is None
+    assert compute_character_stats(ch) == compute_stats(ch)
+
+
+# ============================================================
+# StatCache
+# ============================================================
+def test_fingerprint_and_affected_ops():
+    ch = _character(random.Random(2))
+    fp = equipment_fingerprint(ch)
+    ch["apodo"] = "x"
+    assert equipment_fingerprint(ch) == fp
+    ch["equipamiento"]["artefactos"]["caliz"] = generate_artefact("caliz", 1, seed=1)
+    assert equipment_fingerprint(ch) != fp
+
+    assert op_affects_stats(op_set("A", ["estadisticas", "vida", "base"], 1.0))
+    assert op_affects_stats(op_equip("A", "caliz", None))
+    assert all(op_affects_stats(op) for op in op_set_level("A", 2, {}))
+    assert op_affects_stats(op_put_character("A", {}))
+    assert not op_affects_stats(op_add_xp("A", 10))
+    assert not op_affects_stats(op_set("A", ["apodo"], "z"))
+
+
+def test_stat_cache_invalidated_by_store_commits(tmp_path):
+    async def main():
+        store = UserStore(str(tmp_path))
+        cache = StatCache()
+        store.add_listener(cache.on_commit)
+        try:
+            rng = random.Random(5)
+            await store.apply(1, [
+                op_put_character("A", _character(rng)),
+                op_put_character("B", _character(rng)),
+            ])
+
+            async def get(nombre):
+                doc = await store.load(1)
+                return cache.get(1, nombre, doc["1"]["personajes"][nombre])
+
+            def counts():
+                return cache.hits, cache.misses
+
+            first = await get("A")
+            await get("B")
+            assert counts() == (0, 2)
+            assert await get("A") is first
+            assert counts() == (1, 2)
+
+            # Stats base: la huella no cambia, solo la invalidación por op lo detecta
+            await store.apply(1, [op_set("A", ["estadisticas", "vida", "base"], 999.0)])
+            res = await get("A")
+            assert counts() == (1, 3)
+            assert res["total"]["vida"] == 999.0
+
+            await store.apply(1, [op_set("A", ["nivel"], 5)])
+            await get("A")
+            assert counts() == (1, 4)
+
+            await store.apply(1, [op_equip("A", "caliz", generate_artefact("caliz", 4, seed=9))])
+            await get("A")
+            assert counts() == (1, 5)
+
+            # Ops que no tocan stats (o de otro personaje) conservan la entrada
+            await store.apply(1, [op_set("A", ["apodo"], "z"), op_add_xp("A", 50)])
+            await store.apply(1, [op_set("B", ["estadisticas", "vida", "base"], 1.0)])
+            await get("A")
+            assert counts() == (2, 5)
+            assert cache.stats()["entries"] == 1
+
+            # save() sin ops invalida todos los personajes del usuario
+            await get("B")
+            await store.save(1, await store.load(1))
+            await get("A")
+            await get("B")
+            assert counts() == (2, 8)
+        finally:
+            await store.close()
+
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+import copy
+
+import pytest
+
+from src.bot.services.user_backends import empty_user_doc, replay_journal
+from src.bot.services.user_journal import (
+    JOURNAL_SEQ_KEY,
+    apply_op,
+    op_add_item,
+    op_add_items,
+    op_delete_character,
+    op_put_character,
+    op_remove_item,
+    op_set,
+    op_set_stacks,
+)
+
+UID = 1
+
+
+def _doc():
+    doc = empty_user_doc(UID)
+    doc[str(UID)]["personajes"]["Ana"] = {
+        "nivel": 1,
+        "inventario": {
+            "artefactos": [{"id": "a1"}, {"id": "a2"}],
+            "materiales": [{"item_id": "mat_hierro", "cantidad": 3}],
+        },
+    }
+    return doc
+
+
+OPS = {
+    "put_pj": op_put_character("Beto", {"nivel": 2}),
+    "del_pj": op_delete_character("Ana"),
+    "set": op_set("Ana", ["nivel"], 5),
+    "unset": {"op": "unset", "pj": "Ana", "path": ["nivel"]},
+    "append": op_add_item("Ana", "artefactos", {"id": "a3"}),
+    "extend": op_add_items("Ana", "artefactos", [{"id": "a3"}, {"id": "a4"}]),
+    "remove_id": op_remove_item("Ana", "artefactos", "a1"),
+    "set_counts": op_set_stacks("Ana", "materiales", {"mat_hierro": 10, "mat_cobre": 0}),
+}
+
+
+@pytest.mark.parametrize("kind", sorted(OPS))
+def test_every_op_is_idempotent(kind):
+    op = OPS[kind]
+    assert op["op"] == kind
+    once = _doc()
+    apply_op(once, UID, op)
+    twice = copy.deepcopy(once)
+    apply_op(twice, UID, op)
+    assert twice == once
+    assert once != _doc() or kind == "unset"
+
+
+def test_ops_on_deleted_character_are_ignored():
+    doc = _doc()
+    apply_op(doc, UID, op_delete_character("Ana"))
+    for op in OPS.values():
+        if op["op"] not in ("put_pj", "del_pj"):
+            apply_op(doc, UID, op)
+    assert doc[str(UID)]["personajes"] == {}
+
+
+def test_unknown_op_raises():
+    with pytest.raises(ValueError):
+        apply_op(_doc(), UID, {"op": "nope", "pj": "Ana", "path": ["x"]})
+
+
+def test_set_counts_normalizes_legacy_list():
+    doc = _doc()
+    apply_op(doc, UID, op_set_stacks("Ana", "materiales", {"mat_cobre": 2}))
+    assert doc[str(UID)]["personajes"]["Ana"]["inventario"]["materiales"] == {"mat_hierro": 3, "mat_cobre": 2}
+
+
+def test_replay_skips_entries_already_in_snapshot():
+    ops = [OPS["set"], OPS["append"], OPS["remove_id"]]
+    entries = [{"seq": i + 1, "op": op} for i, op in enumerate(ops)]
+
+    full = replay_journal(_doc(), UID, entries)
+    assert full[JOURNAL_SEQ_KEY] == 3
+
+    # Snapshot escrito tras la seq 2 y journal sin truncar (crash): el replay da lo mismo
+    partial = replay_journal(_doc(), UID, entries[:2])
+    again = replay_journal(copy.deepcopy(partial), UID, entries)
+    assert again == full
+    assert replay_journal(copy.deepcopy(full), UID, entries) == full
+
+
+def test_replay_without_snapshot_starts_empty():
+    doc = replay_journal(None, UID, [{"seq": 1, "op": op_put_character("Ana", {"nivel": 1})}])
+    assert doc[str(UID)]["personajes"] == {"Ana": {"nivel": 1}}
+    assert replay_journal(None, UID, []) is None
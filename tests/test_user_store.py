@@ -0,0 +1,110 @@
+import asyncio
+import json
+import time
+
+from src.bot.services.migrate_users import migrate
+from src.bot.services.user_backends import iter_user_files
+from src.bot.services.user_journal import op_put_character, op_set
+from src.bot.services.user_store import UserStore
+
+
+def _character(nombre, nivel=1):
+    return {"nombre": nombre, "apodo": nombre[:1], "nivel": nivel}
+
+
+def _crash(store):
+    """Corta el store sin compactar (como una caída): el journal queda en disco."""
+    if store._flush_task is not None:
+        store._flush_task.cancel()
+    store._executor.shutdown(wait=True)
+
+
+def _journal_seqs(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["seq"] for line in f]
+
+
+def test_search_finds_user_evicted_before_compaction(tmp_path):
+    async def main():
+        store = UserStore(str(tmp_path), cache_size=1, compact_ops=1000)
+        try:
+            await store.apply(1, [op_put_character("Alice", _character("Alice"))])
+            # El usuario 2 expulsa al 1, que queda en disco solo como 1.journal
+            await store.apply(2, [op_put_character("Bob", _character("Bob"))])
+            await store.flush()
+            assert 1 not in store.cache
+
+            found = await store.find_characters("Alice")
+            assert [(uid, nm) for uid, nm, _ in found] == [(1, "Alice")]
+            names = await store.scan_characters(lambda uid, nm, ch: (uid, nm))
+            assert sorted(names) == [(1, "Alice"), (2, "Bob")]
+        finally:
+            await store.close()
+
+    asyncio.run(main())
+
+
+def test_iter_user_files_replays_journal(tmp_path):
+    async def main():
+        store = UserStore(str(tmp_path), compact_ops=1000)
+        await store.apply(1, [op_put_character("Alice", _character("Alice"))])
+        await store.close()  # snapshot completo
+        store = UserStore(str(tmp_path), compact_ops=1000)
+        await store.apply(1, [op_set("Alice", ["nivel"], 7)])
+        await store.apply(2, [op_put_character("Bob", _character("Bob"))])
+        await store.flush()
+        _crash(store)
+
+    asyncio.run(main())
+    assert (tmp_path / "1.json").exists() and (tmp_path / "1.journal").exists()
+    assert not (tmp_path / "2.json").exists()
+
+    docs = dict(iter_user_files(str(tmp_path)))
+    assert docs[1]["1"]["personajes"]["Alice"]["nivel"] == 7
+    assert "Bob" in docs[2]["2"]["personajes"]
+
+    users, chars = migrate(str(tmp_path), str(tmp_path / "users.sqlite3"))
+    assert (users, chars) == (2, 2)
+
+
+def test_ttl_expiry_flushes_journal_before_reload(tmp_path):
+    async def main():
+        store = UserStore(str(tmp_path), cache_ttl=0.05, flush_interval=60, compact_ops=1000)
+        await store.apply(1, [op_put_character("Ana", _character("Ana"))])
+        await store.apply(1, [op_set("Ana", ["nivel"], 5)])
+        time.sleep(0.1)
+        data = await store.load(1)
+        assert data["1"]["personajes"]["Ana"]["nivel"] == 5
+        await store.apply(1, [op_set("Ana", ["nivel"], 6)])
+        await store.flush()
+        _crash(store)
+
+    asyncio.run(main())
+    assert _journal_seqs(tmp_path / "1.journal") == [1, 2, 3]
+
+
+def test_reopen_replays_journal(tmp_path):
+    async def main():
+        store = UserStore(str(tmp_path), compact_ops=1000)
+        await store.apply(1, [op_put_character("Ana", _character("Ana"))])
+        await store.apply(1, [op_set("Ana", ["nivel"], 9)])
+        await store.flush()
+        _crash(store)
+
+        reopened = UserStore(str(tmp_path), compact_ops=1000)
+        try:
+            data = await reopened.load(1)
+            assert data["1"]["personajes"]["Ana"]["nivel"] == 9
+            await reopened.apply(1, [op_set("Ana", ["nivel"], 10)])
+        finally:
+            await reopened.close()
+
+        final = UserStore(str(tmp_path))
+        try:
+            data = await final.load(1)
+            assert data["1"]["personajes"]["Ana"]["nivel"] == 10
+        finally:
+            await final.close()
+
+    asyncio.run(main())
+    assert not (tmp_path / "1.journal").exists()